@@ -0,0 +1,93 @@
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import SimpleLazyObject, empty
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_KEY = "trip:db:primary:{user_id}"
+
+_request_state = contextvars.ContextVar("replica_request_state", default=None)
+
+
+def stick_to_primary(user_id):
+    if settings.REPLICA_DATABASES and settings.REPLICA_STICKY_SECONDS > 0:
+        cache.set(STICKY_KEY.format(user_id=user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+class RequestState:
+    """Picks one replica per safe request, dropping back to the primary for users who just wrote."""
+
+    def __init__(self, request):
+        self.request = request
+        self.alias = PRIMARY
+        self.user_checked = True
+        if request.method in SAFE_METHODS and settings.REPLICA_DATABASES:
+            self.alias = random.choice(settings.REPLICA_DATABASES)
+            self.user_checked = False
+
+    def read_alias(self):
+        if not self.user_checked:
+            user = getattr(self.request, "user", None)
+            # Until authentication has run (JWT resolves it inside the view) only the stickiness is unknown
+            if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+                return self.alias
+            self.user_checked = True
+            if user is not None and user.is_authenticated and cache.get(STICKY_KEY.format(user_id=user.pk)):
+                self.alias = PRIMARY
+        return self.alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Database cache entries, such as throttle counters, are read where they are written
+        if model._meta.app_label == "django_cache":
+            return PRIMARY
+        # Related objects come from wherever their instance was read, e.g. a primary-only lookup
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _request_state.get()
+        # Commands, workers and open transactions keep reading from the primary
+        if state is None or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_state.set(RequestState(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+    async def __acall__(self, request):
+        token = _request_state.set(RequestState(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_state.reset(token)
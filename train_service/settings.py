@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "trip.metrics.RequestMetricsMiddleware",
+    "train_service.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -72,17 +74,81 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "train_service.wsgi.application"
 
-DATABASES = {
-    "default": {
+
+def postgres_database(host, port, prefix="POSTGRES"):
+    """
+    Connection settings for one alias. Connections persist for {prefix}_CONN_MAX_AGE seconds,
+    or with {prefix}_POOL=1 come from a psycopg 3 pool (needs psycopg[pool]) sized per alias.
+    """
+    database = {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": os.environ["POSTGRES_DB"],
         "USER": os.environ["POSTGRES_USER"],
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
-        "HOST": os.environ["POSTGRES_HOST"],
-        "PORT": os.environ["POSTGRES_PORT"],
+        "HOST": host,
+        "PORT": port,
+        "CONN_MAX_AGE": int(os.environ.get(f"{prefix}_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
+    if os.environ.get(f"{prefix}_POOL") == "1":
+        # Django refuses persistent connections on top of a pool
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.environ.get(f"{prefix}_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.environ.get(f"{prefix}_POOL_MAX_SIZE", 10)),
+            }
+        }
+    return database
+
+
+DATABASES = {
+    "default": postgres_database(os.environ["POSTGRES_HOST"], os.environ["POSTGRES_PORT"]),
 }
 
+# Read replicas as "host[:port],host[:port]"; safe-method requests read from them
+for index, replica in enumerate(filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))):
+    replica_host, _, replica_port = replica.strip().partition(":")
+    DATABASES[f"replica_{index}"] = postgres_database(
+        replica_host, replica_port or os.environ["POSTGRES_PORT"], prefix="POSTGRES_REPLICA"
+    )
+    DATABASES[f"replica_{index}"]["TEST"] = {"MIRROR": "default"}
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["train_service.db_router.ReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they create an order
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Throttle counters must be shared by every worker process; create the table with createcachetable
+    "throttle": {
+        "BACKEND": "train_service.throttling.CounterDatabaseCache",
+        "LOCATION": "throttle_cache",
+        # Culling drops live counters, keep room for one entry per client and window
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("THROTTLE_CACHE_MAX_ENTRIES", 100000))},
+    },
+}
+
+# Local memory is per process, use a shared cache when running several workers
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = CACHES["throttle"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+# Cache alias and lifetime (seconds) for reference-data responses
+RESPONSE_CACHE_ALIAS = os.environ.get("RESPONSE_CACHE_ALIAS", "default")
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 60))
+
+# /metrics is open in DEBUG, otherwise it needs "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+# Add Server-Timing (app, db, serializer) headers to responses for staff users
+SERVER_TIMING_FOR_STAFF = os.environ.get("SERVER_TIMING_FOR_STAFF", "1") == "1"
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -101,15 +167,63 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Opt in to building list rows with .values() instead of serializers on endpoints that declare
+# fast_list_fields, and to rendering and parsing JSON with orjson
+FAST_LIST_RESPONSES = os.environ.get("FAST_LIST_RESPONSES", "") == "1"
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.ClaimsJWTAuthentication',
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "trip.renderers.ORJSONRenderer" if FAST_LIST_RESPONSES else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "trip.parsers.ORJSONParser" if FAST_LIST_RESPONSES else "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Scopes used by train_service.throttling on order creation, login and registration;
+    # an empty value turns a scope off
+    "DEFAULT_THROTTLE_RATES": {
+        "order_user": os.environ.get("THROTTLE_ORDER_USER", "60/min"),
+        "order_ip": os.environ.get("THROTTLE_ORDER_IP", "300/min"),
+        "login_user": os.environ.get("THROTTLE_LOGIN_USER", "20/min"),
+        "login_ip": os.environ.get("THROTTLE_LOGIN_IP", "60/min"),
+        "register_ip": os.environ.get("THROTTLE_REGISTER_IP", "30/hour"),
+    },
 }
 
+# Throttle counters live in this cache; it has to be shared (database or REDIS_URL) for limits to hold
+# across worker processes
+THROTTLE_CACHE_ALIAS = os.environ.get("THROTTLE_CACHE_ALIAS", "throttle")
+
 AUTH_USER_MODEL = "user.User"
 
+# Users whose active/staff/revocation state each process keeps for token checks
+AUTH_USER_STATE_CACHE_SIZE = int(os.environ.get("AUTH_USER_STATE_CACHE_SIZE", 10000))
+# Seconds a process trusts its copy of a user's state; changes reach other workers within this time
+# even without a shared cache (REDIS_URL)
+AUTH_USER_STATE_TTL = int(os.environ.get("AUTH_USER_STATE_TTL", 30))
+
+# How long seats reserved through /api/trip/journey/{id}/hold/ stay reserved
+SEAT_HOLD_TTL = int(os.environ.get("SEAT_HOLD_TTL", 300))
+
+# Queue every POST /api/trip/order/ for the process_order_queue worker; clients can also opt in per
+# request with "Prefer: respond-async"
+ASYNC_ORDERS = os.environ.get("ASYNC_ORDERS", "") == "1"
+
+# Default minimum change time, in minutes, between legs returned by /api/trip/plan/
+PLANNER_MIN_TRANSFER = int(os.environ.get("PLANNER_MIN_TRANSFER", 10))
+
+# Longest departure window the journey list expands schedules into virtual journeys for, in days
+SCHEDULE_LIST_MAX_DAYS = int(os.environ.get("SCHEDULE_LIST_MAX_DAYS", 92))
+
+# Serve journey/station/route reads from native async views; only worthwhile under an ASGI server
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "") == "1"
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
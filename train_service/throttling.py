@@ -0,0 +1,154 @@
+import base64
+import hashlib
+import pickle
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Turns a rate such as 10/min into (10, 60)."""
+    if not rate:
+        return None, None
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+class CounterDatabaseCache(DatabaseCache):
+    """
+    DatabaseCache with an atomic incr: the entry is locked while it is read and only its value is
+    rewritten, so concurrent counters queue instead of overwriting each other and keep their expiry.
+    """
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(self._table)
+        lock = " FOR UPDATE" if connection.features.has_select_for_update else ""
+        now = connection.ops.adapt_datetimefield_value(timezone.now().replace(microsecond=0))
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            cursor.execute(f"SELECT value FROM {table} WHERE cache_key = %s AND expires > %s{lock}", [key, now])
+            row = cursor.fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(base64.b64decode(connection.ops.process_clob(row[0]).encode())) + delta
+            cursor.execute(
+                f"UPDATE {table} SET value = %s WHERE cache_key = %s",
+                [base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode("latin1"), key],
+            )
+        return value
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding-window counter: the current window's count plus the previous window's, weighted by how
+    much of it still overlaps. A request is counted before it is checked, so concurrent requests each
+    see their own count, and a shared throttle cache gives every worker process the same counts.
+    """
+    scope = None
+    cache_format = "throttle:{scope}:{ident}:{window}"
+    timer = time.time
+
+    def __init__(self):
+        self.num_requests, self.duration = parse_rate(self.get_rate())
+        self.wait_time = None
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key_ident(self, request, view):
+        raise NotImplementedError(".get_cache_key_ident() must be overridden")
+
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        ident = self.get_cache_key_ident(request, view)
+        if ident is None:
+            return True
+
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        window, elapsed = int(window), elapsed / self.duration
+        current_key = self.cache_format.format(scope=self.scope, ident=ident, window=window)
+        previous_key = self.cache_format.format(scope=self.scope, ident=ident, window=window - 1)
+
+        previous = cache.get(previous_key, 0)
+        # Keep the window around for the next one to weigh it
+        cache.add(current_key, 0, self.duration * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired between add and incr
+            cache.add(current_key, 1, self.duration * 2)
+            current = 1
+        # Weighed against the requests before this one, as if it had been checked first
+        if previous * (1 - elapsed) + current - 1 >= self.num_requests:
+            # Rejected requests don't use up the limit
+            cache.decr(current_key)
+            self.wait_time = self._wait(previous, current - 1, elapsed)
+            return False
+        return True
+
+    def _wait(self, previous, current, elapsed):
+        if previous and current < self.num_requests:
+            # Until the previous window's weight has decayed enough to let one more request in
+            return max((1 - (self.num_requests - current) / previous - elapsed) * self.duration, 0)
+        return (1 - elapsed) * self.duration
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserScopeThrottle(SlidingWindowThrottle):
+    """Counts per authenticated user; anonymous requests are left to the IP scope."""
+
+    def get_cache_key_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class IPScopeThrottle(SlidingWindowThrottle):
+    def get_cache_key_ident(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginScopeThrottle(SlidingWindowThrottle):
+    """Counts attempts per submitted username, whichever address they come from."""
+
+    def get_cache_key_ident(self, request, view):
+        username = request.data.get(get_user_model().USERNAME_FIELD)
+        if not isinstance(username, str) or not username:
+            return None
+        return hashlib.sha256(username.lower().encode()).hexdigest()[:32]
+
+
+class OrderUserThrottle(UserScopeThrottle):
+    scope = "order_user"
+
+
+class OrderIPThrottle(IPScopeThrottle):
+    scope = "order_ip"
+
+
+class LoginUserThrottle(LoginScopeThrottle):
+    scope = "login_user"
+
+
+class LoginIPThrottle(IPScopeThrottle):
+    scope = "login_ip"
+
+
+class RegisterIPThrottle(IPScopeThrottle):
+    scope = "register_ip"
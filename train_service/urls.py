@@ -18,9 +18,12 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularSwaggerView
 
+from trip.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/doc/swagger/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("api/trip/", include("trip.urls"), name="trip"),
-    path("api/users/", include("user.urls"), name="user")
+    path("api/users/", include("user.urls"), name="user"),
+    path("metrics", metrics_view, name="metrics"),
 ]
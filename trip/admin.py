@@ -1,12 +1,26 @@
 from django.contrib import admin
 
-from trip.models import TrainType, Ticket, Journey, Crew, Route, Station, Order, Train
+from trip.models import TrainType, Ticket, Journey, Crew, Route, Station, Order, Train, SeatHold, Coach, OrderRequest, \
+    OccupancyRollup, JourneySchedule
 
 admin.site.register(TrainType)
-admin.site.register(Train)
 admin.site.register(Order)
 admin.site.register(Station)
 admin.site.register(Route)
 admin.site.register(Crew)
 admin.site.register(Journey)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(OrderRequest)
+admin.site.register(OccupancyRollup)
+admin.site.register(JourneySchedule)
+
+
+class CoachInline(admin.TabularInline):
+    model = Coach
+    extra = 0
+
+
+@admin.register(Train)
+class TrainAdmin(admin.ModelAdmin):
+    inlines = [CoachInline]
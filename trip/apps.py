@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class TripConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "trip"
+
+    def ready(self):
+        import trip.signals  # noqa: F401
+        from django.conf import settings
+
+        if "trip.metrics.RequestMetricsMiddleware" in settings.MIDDLEWARE:
+            from django.db.backends.signals import connection_created
+            from trip.metrics import instrument_serializers, install_query_recorder
+            instrument_serializers()
+            connection_created.connect(install_query_recorder, dispatch_uid="trip_query_recorder")
@@ -0,0 +1,135 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern
+from rest_framework import exceptions
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from trip.fast_lists import FastListMixin
+from trip.response_cache import CachedListMixin, CachedRetrieveMixin
+from trip.views import JourneyViewSet, StationViewSet, RouteViewSet
+
+ASYNC_READ_ACTIONS = {
+    JourneyViewSet: ("list", "retrieve"),
+    StationViewSet: ("list",),
+    RouteViewSet: ("list",),
+}
+
+
+async def aauthenticate(request):
+    # Mirrors Request._authenticate, awaiting authenticators that provide aauthenticate()
+    for authenticator in request.authenticators:
+        aauthenticate_method = getattr(authenticator, "aauthenticate", None)
+        try:
+            if aauthenticate_method is not None:
+                user_auth = await aauthenticate_method(request)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+
+        if user_auth is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth
+            return
+    request._not_authenticated()
+
+
+async def alist(view, request):
+    if isinstance(view, JourneyViewSet):
+        response = await sync_to_async(view.scheduled_list)()
+        if response is not None:
+            return response
+    queryset = view.filter_queryset(view.get_queryset())
+    if isinstance(view, FastListMixin) and view.use_fast_list():
+        field_map = view.fast_list_map()
+        queryset = queryset.values(*field_map.lookups)
+        render = field_map.rows
+    else:
+        def render(rows):
+            return view.get_serializer(rows, many=True).data
+
+    page = None
+    if view.paginator is not None:
+        page = await view.paginator.apaginate_queryset(queryset, request, view)
+    if page is None:
+        return Response(render([row async for row in queryset.aiterator()]))
+    return view.get_paginated_response(render(page))
+
+
+async def aretrieve(view, request):
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    try:
+        instance = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+    except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+        raise Http404
+    view.check_object_permissions(request, instance)
+    return Response(view.get_serializer(instance).data)
+
+
+ASYNC_HANDLERS = {
+    "list": (alist, CachedListMixin),
+    "retrieve": (aretrieve, CachedRetrieveMixin),
+}
+
+
+def async_read_view(callback):
+    """
+    Wraps a router view so GET/HEAD run natively on the event loop: authentication,
+    the queryset and pagination are awaited, while filtering, permissions and
+    serializers are the viewset's own. Other methods fall through to the sync view.
+    """
+    action = callback.actions["get"]
+    handler, cached_mixin = ASYNC_HANDLERS[action]
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await sync_to_async(callback)(request, *args, **kwargs)
+
+        viewset = callback.cls(**callback.initkwargs)
+        viewset.action_map = callback.actions
+        viewset.args = args
+        viewset.kwargs = kwargs
+        viewset.request = request
+        request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = request
+        viewset.action = action
+        viewset.headers = viewset.default_response_headers
+        # The browsable API renders forms with sync queries, so the async path only speaks JSON
+        viewset.renderer_classes = [
+            renderer for renderer in viewset.renderer_classes if not issubclass(renderer, BrowsableAPIRenderer)
+        ]
+
+        try:
+            await aauthenticate(request)
+            viewset.initial(request, *args, **kwargs)
+            if isinstance(viewset, cached_mixin):
+                response = await viewset.acached_response(request, lambda: handler(viewset, request))
+            else:
+                response = await handler(viewset, request)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+
+        response = viewset.finalize_response(request, response, *args, **kwargs)
+        # A plain HttpResponse keeps Django from rendering the template response in a worker thread
+        return HttpResponse(response.render().content, status=response.status_code, headers=response.headers)
+
+    view.cls = callback.cls
+    view.initkwargs = callback.initkwargs
+    view.actions = callback.actions
+    view.csrf_exempt = True
+    return view
+
+
+def async_read_urls(urls):
+    patterns = []
+    for pattern in urls:
+        callback = getattr(pattern, "callback", None)
+        actions = getattr(callback, "actions", None) or {}
+        if actions.get("get") in ASYNC_READ_ACTIONS.get(getattr(callback, "cls", None), ()):
+            pattern = URLPattern(pattern.pattern, async_read_view(callback), pattern.default_args, pattern.name)
+        patterns.append(pattern)
+    return patterns
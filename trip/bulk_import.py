@@ -0,0 +1,284 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from trip.geo import invalidate_station_index
+from trip.models import Station, Route, Train, TrainType, Crew, Journey
+from trip.planner import record_timetable_change
+from trip.response_cache import bump_model_version
+from trip.rollups import refresh_journey_rollups
+from trip.search import sync_search_rows
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ("csv", "jsonl")
+
+# Marks lookup keys shared by several rows, e.g. two stations with the same name
+AMBIGUOUS = object()
+
+
+class RowError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def guess_format(filename):
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl"}.get(extension)
+
+
+def read_records(stream, fmt):
+    """Yields (line number, record) from a text stream; malformed JSONL lines yield a None record."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def lookup_table(pairs):
+    table = {}
+    for key, value in pairs:
+        table[key] = AMBIGUOUS if key in table else value
+    return table
+
+
+class RowImporter:
+    model = None
+    fields = ()
+
+    def clean(self, record, errors, name, source=None):
+        source = source or name
+        value = record.get(source)
+        if value is None or value == "":
+            errors[source] = ["This field is required."]
+            return None
+        try:
+            return self.model._meta.get_field(name).clean(value, None)
+        except DjangoValidationError as error:
+            errors[source] = error.messages
+            return None
+
+    @staticmethod
+    def resolve(table, key, errors, name, label):
+        if key is None or key == "":
+            errors[name] = ["This field is required."]
+            return None
+        found = table.get(key)
+        if found is None:
+            errors[name] = [f"Unknown {label} {key}."]
+        elif found is AMBIGUOUS:
+            errors[name] = [f"{label.capitalize()} {key} is not unique, rename it before importing."]
+        return found
+
+    def build(self, record):
+        errors = {}
+        values = {name: self.clean(record, errors, name) for name in self.fields}
+        values.update(self.related(record, errors))
+        if errors:
+            raise RowError(errors)
+        return self.make(values)
+
+    def make(self, values):
+        return self.model(**values)
+
+    def related(self, record, errors):
+        return {}
+
+    def save(self, objects):
+        return self.model.objects.bulk_create(objects)
+
+    def saved(self, objects):
+        # bulk_create skips the signals that keep in-process indexes and caches fresh
+        bump_model_version(self.model)
+
+
+class StationImporter(RowImporter):
+    model = Station
+    fields = ("name", "latitude", "longitude")
+
+    def saved(self, objects):
+        super().saved(objects)
+        invalidate_station_index()
+
+
+class TrainImporter(RowImporter):
+    model = Train
+    fields = ("name", "cargo_num", "places_in_cargo")
+
+    def __init__(self):
+        self.train_types = lookup_table(TrainType.objects.values_list("name", "id").iterator())
+
+    def related(self, record, errors):
+        return {"train_type_id": self.resolve(self.train_types, record.get("train_type"), errors, "train_type",
+                                              "train type")}
+
+
+class RouteImporter(RowImporter):
+    model = Route
+    fields = ("distance",)
+
+    def __init__(self):
+        self.stations = lookup_table(Station.objects.values_list("name", "id").iterator())
+
+    def related(self, record, errors):
+        return {
+            f"{name}_id": self.resolve(self.stations, record.get(name), errors, name, "station")
+            for name in ("source", "destination")
+        }
+
+
+class JourneyImporter(RowImporter):
+    """Journeys name their train and either a route id or source/destination station names."""
+    model = Journey
+    fields = ("departure_time", "arrival_time")
+
+    def __init__(self):
+        self.trains = lookup_table(Train.objects.values_list("name", "id").iterator())
+        self.route_ids = set(Route.objects.values_list("id", flat=True).iterator())
+        self.routes = lookup_table(
+            ((source, destination), route_id)
+            for route_id, source, destination in Route.objects.values_list(
+                "id", "source__name", "destination__name"
+            ).iterator()
+        )
+        self.crew_ids = set(Crew.objects.values_list("id", flat=True).iterator())
+
+    def clean(self, record, errors, name, source=None):
+        value = super().clean(record, errors, name, source)
+        if value is not None and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def related(self, record, errors):
+        values = {"train_id": self.resolve(self.trains, record.get("train"), errors, "train", "train")}
+        values["route_id"] = self._route(record, errors)
+        values["crew"] = self._crew(record, errors)
+        return values
+
+    def _route(self, record, errors):
+        route = record.get("route")
+        if route not in (None, ""):
+            try:
+                route = int(route)
+            except (TypeError, ValueError):
+                route = None
+            if route not in self.route_ids:
+                errors["route"] = [f"Unknown route {record['route']}."]
+            return route
+
+        source, destination = record.get("source"), record.get("destination")
+        if not source or not destination:
+            errors["route"] = ["Give a route id or source and destination station names."]
+            return None
+        return self.resolve(self.routes, (source, destination), errors, "route", "route")
+
+    def _crew(self, record, errors):
+        crew = record.get("crew") or []
+        if isinstance(crew, str):
+            crew = crew.replace(";", " ").split()
+        try:
+            crew = sorted({int(member) for member in crew})
+        except (TypeError, ValueError):
+            errors["crew"] = ["Crew must be a list of crew ids."]
+            return []
+        unknown = [member for member in crew if member not in self.crew_ids]
+        if unknown:
+            errors["crew"] = [f"Unknown crew ids: {', '.join(map(str, unknown))}."]
+        return crew
+
+    def make(self, values):
+        crew = values.pop("crew")
+        return Journey(**values), crew
+
+    def save(self, objects):
+        journeys = Journey.objects.bulk_create([journey for journey, _ in objects])
+        Journey.crew.through.objects.bulk_create([
+            Journey.crew.through(journey_id=journey.id, crew_id=member)
+            for journey, (_, crew) in zip(journeys, objects)
+            for member in crew
+        ])
+        sync_search_rows([journey.id for journey in journeys])
+        refresh_journey_rollups([journey.id for journey in journeys])
+        return journeys
+
+    def saved(self, objects):
+        record_timetable_change([journey.id for journey in objects])
+
+
+IMPORTERS = {
+    "station": StationImporter,
+    "route": RouteImporter,
+    "train": TrainImporter,
+    "journey": JourneyImporter,
+}
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.valid = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def run_import(kind, records, dry_run=False, chunk_size=CHUNK_SIZE, on_error=None):
+    """
+    Validates (line, record) pairs in chunks and bulk-inserts the valid rows of each chunk in
+    one transaction; invalid rows are reported and skipped. Only one chunk is held in memory.
+    """
+    importer = IMPORTERS[kind]()
+    report = ImportReport()
+    chunk = []
+
+    def flush():
+        if chunk and not dry_run:
+            with transaction.atomic():
+                saved = importer.save(chunk)
+                transaction.on_commit(lambda: importer.saved(saved))
+            report.created += len(chunk)
+        report.valid += len(chunk)
+        chunk.clear()
+
+    for line, record in records:
+        report.rows += 1
+        try:
+            if record is None:
+                raise RowError({"non_field_errors": ["Line is not a JSON object."]})
+            chunk.append(importer.build(record))
+        except RowError as error:
+            report.add_error(line, error.errors)
+            if on_error is not None:
+                on_error(line, error.errors)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    return report
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def iso_datetime(value):
+    # DateTimeField's default representation without its per-value overhead
+    if value is None:
+        return None
+    if settings.USE_TZ:
+        current = timezone.get_current_timezone()
+        value = value.astimezone(current) if timezone.is_aware(value) else timezone.make_aware(value, current)
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+if api_settings.DATETIME_FORMAT != ISO_8601:
+    iso_datetime = serializers.DateTimeField().to_representation  # noqa: F811
+
+
+class FieldMap:
+    """
+    Output keys mapped to queryset lookups for ``.values()``. A nested dict builds a nested
+    object and a ``(lookup, convert)`` pair passes the value through ``convert`` first.
+    """
+
+    def __init__(self, fields):
+        self.lookups = []
+        self.spec = self._compile(fields)
+
+    def _compile(self, fields):
+        spec = []
+        for key, source in fields.items():
+            if isinstance(source, dict):
+                spec.append((key, None, None, self._compile(source)))
+                continue
+            lookup, convert = source if isinstance(source, tuple) else (source, None)
+            if lookup not in self.lookups:
+                self.lookups.append(lookup)
+            spec.append((key, lookup, convert, None))
+        return spec
+
+    def _build(self, spec, values):
+        row = {}
+        for key, lookup, convert, children in spec:
+            if children is not None:
+                row[key] = self._build(children, values)
+            elif convert is None:
+                row[key] = values[lookup]
+            else:
+                row[key] = convert(values[lookup])
+        return row
+
+    def row(self, values):
+        return self._build(self.spec, values)
+
+    def rows(self, values):
+        return [self._build(self.spec, row) for row in values]
+
+
+class FastListMixin:
+    """
+    List action that skips the serializer for viewsets declaring ``fast_list_fields``. The map
+    must produce exactly what the list serializer does and include the keyset ordering fields.
+    """
+    fast_list_fields = None
+
+    @classmethod
+    def fast_list_map(cls):
+        field_map = cls.__dict__.get("_fast_list_map")
+        if field_map is None:
+            field_map = cls._fast_list_map = FieldMap(cls.fast_list_fields)
+        return field_map
+
+    def use_fast_list(self):
+        return settings.FAST_LIST_RESPONSES and self.fast_list_fields is not None
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        field_map = self.fast_list_map()
+        queryset = self.filter_queryset(self.get_queryset()).values(*field_map.lookups)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(field_map.rows(page))
+        return Response(field_map.rows(queryset))
@@ -0,0 +1,109 @@
+import heapq
+import math
+import threading
+import time
+
+from django.core.cache import cache
+
+from trip.models import Station
+
+EARTH_RADIUS_KM = 6371.0088
+STATION_INDEX_VERSION_KEY = "trip:station_index:version"
+
+
+def to_unit_vector(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def chord_for_km(distance_km):
+    # Straight-line distance between unit vectors grows with great-circle distance
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class StationIndex:
+    """k-d tree over stations placed on the unit sphere, so longitude wrap-around needs no special cases."""
+
+    def __init__(self, stations):
+        self.stations = list(stations)
+        points = [
+            (to_unit_vector(station[2], station[3]), position)
+            for position, station in enumerate(self.stations)
+        ]
+        self.root = self._build(points, 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        return (
+            points[middle],
+            axis,
+            self._build(points[:middle], depth + 1),
+            self._build(points[middle + 1:], depth + 1),
+        )
+
+    def nearest(self, latitude, longitude, limit, radius_km=None):
+        target = to_unit_vector(latitude, longitude)
+        max_chord_sq = chord_for_km(radius_km) ** 2 if radius_km is not None else math.inf
+        best = []  # max-heap of (-distance_sq, position)
+
+        def visit(node):
+            if node is None:
+                return
+            (point, position), axis, left, right = node
+            distance_sq = sum((point[i] - target[i]) ** 2 for i in range(3))
+            if distance_sq <= max_chord_sq:
+                if len(best) < limit:
+                    heapq.heappush(best, (-distance_sq, position))
+                elif distance_sq < -best[0][0]:
+                    heapq.heapreplace(best, (-distance_sq, position))
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            bound = min(max_chord_sq, -best[0][0] if len(best) == limit else math.inf)
+            if diff * diff <= bound:
+                visit(far)
+
+        if limit > 0:
+            visit(self.root)
+
+        results = []
+        for _, position in sorted(best, reverse=True):
+            station = self.stations[position]
+            results.append((station, haversine_km(latitude, longitude, station[2], station[3])))
+        return results
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_station_index():
+    global _index, _index_version
+    version = cache.get(STATION_INDEX_VERSION_KEY, 0)
+    if _index is None or version != _index_version:
+        with _index_lock:
+            if _index is None or version != _index_version:
+                _index = StationIndex(Station.objects.values_list("id", "name", "latitude", "longitude"))
+                _index_version = version
+    return _index
+
+
+def invalidate_station_index():
+    # Seeded from the clock so a flushed cache never brings back a version an old index was built at
+    if not cache.add(STATION_INDEX_VERSION_KEY, time.time_ns(), timeout=None):
+        try:
+            cache.incr(STATION_INDEX_VERSION_KEY)
+        except ValueError:
+            cache.add(STATION_INDEX_VERSION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,51 @@
+import operator
+from datetime import timedelta
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from trip.models import Journey, SeatHold, Ticket
+
+
+def active_holds():
+    return SeatHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def place_holds(journey_id, user_id, seats):
+    seats = sorted(seats)
+    lookup = reduce(operator.or_, (Q(cargo=cargo, seat=seat) for cargo, seat in seats))
+
+    with transaction.atomic():
+        # Every hold on a journey goes through its row lock, so concurrent
+        # requests for the same seats queue here instead of failing on insert.
+        journey = Journey.objects.select_for_update().get(id=journey_id)
+
+        SeatHold.objects.filter(lookup, journey=journey, expires_at__lte=timezone.now()).delete()
+
+        conflicts = set(Ticket.objects.filter(lookup, journey=journey).values_list("cargo", "seat"))
+        conflicts.update(
+            active_holds().filter(lookup, journey=journey)
+            .exclude(user_id=user_id)
+            .values_list("cargo", "seat")
+        )
+        if conflicts:
+            return [], sorted(conflicts)
+
+        SeatHold.objects.filter(lookup, journey=journey, user_id=user_id).delete()
+        expires_at = timezone.now() + timedelta(seconds=settings.SEAT_HOLD_TTL)
+        holds = SeatHold.objects.bulk_create([
+            SeatHold(journey=journey, user_id=user_id, cargo=cargo, seat=seat, expires_at=expires_at)
+            for cargo, seat in seats
+        ])
+        return holds, []
+
+
+def release_holds(journey_id, user_id):
+    return SeatHold.objects.filter(journey_id=journey_id, user_id=user_id).delete()[0]
+
+
+def release_expired_holds():
+    return SeatHold.objects.filter(expires_at__lte=timezone.now()).delete()[0]
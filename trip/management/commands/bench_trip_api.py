@@ -0,0 +1,131 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from trip.models import Station, Train, Route, Journey
+from trip.urls import router
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class Command(BaseCommand):
+    help = "Drive every trip API endpoint in-process and report latency and query counts as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def endpoints(self):
+        endpoints = []
+        for prefix, viewset, basename in router.registry:
+            basename = basename or router.get_default_basename(viewset)
+            endpoints.append((f"{prefix}-list", reverse(f"trip:{basename}-list"), {}))
+            if hasattr(viewset, "retrieve"):
+                instance = viewset.queryset.model.objects.order_by("id").first()
+                if instance is not None:
+                    endpoints.append((f"{prefix}-detail", reverse(f"trip:{basename}-detail", args=[instance.id]), {}))
+
+        journey = Journey.objects.order_by("id").first()
+        route = Route.objects.order_by("id").first()
+        station = Station.objects.order_by("id").first()
+        if journey is not None:
+            endpoints.append(("journey-seats", reverse("trip:journey-seats", args=[journey.id]), {}))
+            endpoints.append(("journey-list-cursor", reverse("trip:journey-list"), {"pagination": "cursor"}))
+            endpoints.append(("journey-list-day", reverse("trip:journey-list"), {
+                "departure_time": journey.departure_time.strftime("%Y-%m-%d"),
+            }))
+        if station is not None:
+            endpoints.append(("station-nearby", reverse("trip:station-nearby"), {
+                "lat": station.latitude, "lon": station.longitude, "limit": 10,
+            }))
+        if route is not None and journey is not None:
+            first = Journey.objects.order_by("departure_time").first()
+            endpoints.append(("plan", reverse("trip:plan"), {
+                "from": route.source_id,
+                "to": route.destination_id,
+                "depart_after": (first.departure_time - timedelta(days=1)).strftime("%Y-%m-%d %H:%M"),
+            }))
+        return endpoints
+
+    def run_endpoints(self, client, options):
+        results = {}
+        for name, url, params in self.endpoints():
+            statuses = [client.get(url, params).status_code for _ in range(options["warmup"])]
+
+            latencies, queries = [], []
+            started = time.perf_counter()
+            for _ in range(options["iterations"]):
+                with CaptureQueriesContext(connection) as captured:
+                    request_started = time.perf_counter()
+                    response = client.get(url, params)
+                    latencies.append((time.perf_counter() - request_started) * 1000)
+                queries.append(len(captured))
+                statuses.append(response.status_code)
+            elapsed = time.perf_counter() - started
+
+            results[name] = {
+                "url": url,
+                "params": params,
+                # The first error if any request failed, so one bad response can't hide behind later ones
+                "status": next((status for status in statuses if not 200 <= status < 300), statuses[-1]),
+                "requests": len(latencies),
+                "p50_ms": round(percentile(latencies, 0.50), 3),
+                "p95_ms": round(percentile(latencies, 0.95), 3),
+                "p99_ms": round(percentile(latencies, 0.99), 3),
+                "mean_queries": round(sum(queries) / len(queries), 2),
+                "max_queries": max(queries),
+                "throughput_rps": round(len(latencies) / elapsed, 1),
+            }
+        return results
+
+    def handle(self, *args, **options):
+        if not Train.objects.exists():
+            raise CommandError("No trip data found, run seed_trip_data first")
+
+        user, _ = get_user_model().objects.get_or_create(
+            username="bench_admin", defaults={"is_staff": True, "email": "bench_admin@example.com"}
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        # The client sends Host: testserver, which the deployment's ALLOWED_HOSTS would reject with a 400
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            results = self.run_endpoints(client, options)
+
+        failed = {name: result["status"] for name, result in results.items() if not 200 <= result["status"] < 300}
+        if failed:
+            raise CommandError(
+                "Endpoints answered with errors, no report written: "
+                + ", ".join(f"{name} ({status})" for name, status in failed.items())
+            )
+
+        report = json.dumps({
+            "created_at": timezone.now().isoformat(),
+            "iterations": options["iterations"],
+            "rows": {
+                "stations": Station.objects.count(),
+                "trains": Train.objects.count(),
+                "routes": Route.objects.count(),
+                "journeys": Journey.objects.count(),
+            },
+            "endpoints": results,
+        }, indent=2, default=str)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report + "\n")
+        else:
+            self.stdout.write(report)
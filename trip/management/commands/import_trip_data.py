@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.bulk_import import IMPORTERS, FORMATS, CHUNK_SIZE, guess_format, read_records, run_import
+
+
+class Command(BaseCommand):
+    help = "Stream stations, routes, trains or journeys from a CSV/JSONL file into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path", help="File to import, - for stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Only validate the rows")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the file format from its name, pass --format")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        def report_error(line, errors):
+            self.stderr.write(f"line {line}: {errors}")
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            report = run_import(
+                options["kind"],
+                read_records(stream, fmt),
+                dry_run=options["dry_run"],
+                chunk_size=options["chunk_size"],
+                on_error=report_error,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        count = report.valid if options["dry_run"] else report.created
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} of {report.rows} {options['kind']} rows, {report.error_count} rows with errors"
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trip.order_queue import QUEUE_BATCH_SIZE, process_order_queue
+
+
+class Command(BaseCommand):
+    help = "Allocate seats for orders queued by the async ordering mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=QUEUE_BATCH_SIZE)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running and poll every N seconds when the queue is empty (default: drain once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            completed, failed = process_order_queue(options["batch_size"])
+            if completed or failed:
+                self.stdout.write(f"Completed {completed} and failed {failed} queued orders")
+                continue
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from trip.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute occupancy rollups from journeys and tickets, e.g. to backfill them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", help="First departure day to rebuild, YYYY-MM-DD")
+        parser.add_argument("--to", dest="end", help="Last departure day to rebuild, YYYY-MM-DD")
+
+    @staticmethod
+    def _day(value, name):
+        if value is None:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f"--{name} must be a date like 2024-10-01")
+        return day
+
+    def handle(self, *args, **options):
+        start, end = self._day(options["start"], "from"), self._day(options["end"], "to")
+        written = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} occupancy rollup rows"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trip.holds import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release seat holds whose TTL has passed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and sweep every N seconds (default: sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            released = release_expired_holds()
+            self.stdout.write(f"Released {released} expired seat holds")
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,150 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from trip.geo import invalidate_station_index
+from trip.models import TrainType, Train, Coach, Station, Route, Crew, Journey, Order, Ticket
+from trip.planner import record_timetable_change
+from trip.response_cache import bump_model_version
+from trip.rollups import refresh_journey_rollups
+from trip.search import sync_search_rows
+from trip.services import start_of_day
+
+BATCH_SIZE = 1000
+TRAIN_TYPES = ("Intercity", "Regional", "Express", "Night", "Suburban")
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate deterministic synthetic trip data for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=200)
+        parser.add_argument("--routes", type=int, default=500)
+        parser.add_argument("--trains", type=int, default=100)
+        parser.add_argument("--crew", type=int, default=300)
+        parser.add_argument("--journeys", type=int, default=5000)
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--tickets-per-order", type=int, default=3)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+        # A fixed first day keeps the generated timetable identical for a given seed
+        parser.add_argument("--start", type=date.fromisoformat, default=date(2030, 1, 1),
+                            help="First departure day, YYYY-MM-DD; journeys span the following 90 days")
+
+    def _create(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        start = start_of_day(options["start"], timezone.get_default_timezone())
+
+        with transaction.atomic():
+            train_types = self._create(TrainType, [TrainType(name=name) for name in TRAIN_TYPES])
+            stations = self._create(Station, [
+                Station(
+                    name=f"Station {index}",
+                    latitude=round(rng.uniform(44.4, 52.3), 5),
+                    longitude=round(rng.uniform(22.1, 40.2), 5),
+                )
+                for index in range(options["stations"])
+            ])
+            trains = self._create(Train, [
+                Train(
+                    name=f"Train {index}",
+                    cargo_num=rng.randint(4, 16),
+                    places_in_cargo=rng.choice((36, 54, 64, 80)),
+                    train_type=rng.choice(train_types),
+                )
+                for index in range(options["trains"])
+            ])
+            # Every third train leads with a roomier first-class coach
+            coaches = self._create(Coach, [
+                Coach(train=train, number=1, seats=train.places_in_cargo // 2, coach_class="first")
+                for train in trains[::3]
+            ])
+            first_class = {coach.train_id: coach.seats for coach in coaches}
+            routes = self._create(Route, [
+                Route(source=source, destination=destination, distance=rng.randint(20, 1200))
+                for source, destination in (rng.sample(stations, 2) for _ in range(options["routes"]))
+            ])
+            crew = self._create(Crew, [
+                Crew(first_name=f"First {index}", last_name=f"Last {index}") for index in range(options["crew"])
+            ])
+
+            journeys = []
+            for _ in range(options["journeys"]):
+                departure = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 90, 5))
+                route = rng.choice(routes)
+                journeys.append(Journey(
+                    route=route,
+                    train=rng.choice(trains),
+                    departure_time=departure,
+                    arrival_time=departure + timedelta(minutes=max(route.distance // 2, 15)),
+                ))
+            journeys = self._create(Journey, journeys)
+            self._create(Journey.crew.through, [
+                Journey.crew.through(journey_id=journey.id, crew_id=member.id)
+                for journey in journeys
+                for member in rng.sample(crew, min(len(crew), 3))
+            ])
+
+            users = self._seed_users(options["users"])
+            orders = self._create(Order, [Order(user=rng.choice(users)) for _ in range(options["orders"])])
+
+            positions = {train.id: list(self._seat_positions(train, first_class.get(train.id))) for train in trains}
+            next_seat = {}
+            tickets = []
+            for order in orders:
+                journey = rng.choice(journeys)
+                seats = positions[journey.train_id]
+                for _ in range(options["tickets_per_order"]):
+                    taken = next_seat.get(journey.id, 0)
+                    if taken >= len(seats):
+                        break
+                    next_seat[journey.id] = taken + 1
+                    cargo, seat = seats[taken]
+                    ticket = Ticket(order=order, journey=journey, cargo=cargo, seat=seat)
+                    ticket.fill_snapshot(journey)
+                    tickets.append(ticket)
+            self._create(Ticket, tickets)
+
+            journey_ids = [journey.id for journey in journeys]
+            for index in range(0, len(journey_ids), BATCH_SIZE):
+                sync_search_rows(journey_ids[index:index + BATCH_SIZE])
+                refresh_journey_rollups(journey_ids[index:index + BATCH_SIZE])
+
+        # bulk_create skips the signals that keep in-process indexes and caches fresh
+        for model in (Station, TrainType, Train, Route):
+            bump_model_version(model)
+        invalidate_station_index()
+        record_timetable_change(journey_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(stations)} stations, {len(routes)} routes, {len(trains)} trains, "
+            f"{len(journeys)} journeys, {len(orders)} orders and {len(tickets)} tickets"
+        ))
+
+    @staticmethod
+    def _seat_positions(train, first_class_seats):
+        for cargo in range(1, train.cargo_num + 1):
+            seats = first_class_seats if cargo == 1 and first_class_seats is not None else train.places_in_cargo
+            for seat in range(1, seats + 1):
+                yield cargo, seat
+
+    @staticmethod
+    def _seed_users(count):
+        user_model = get_user_model()
+        users = []
+        for index in range(max(count, 1)):
+            user, created = user_model.objects.get_or_create(
+                username=f"seed_user_{index}", defaults={"email": f"seed_user_{index}@example.com"}
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=["password"])
+            users.append(user)
+        return users
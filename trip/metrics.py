@@ -0,0 +1,202 @@
+import contextvars
+import hmac
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework import serializers
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = contextvars.ContextVar("trip_request_metrics", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "sql_seconds", "serializer_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - started
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, seconds, stats):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                    "count": 0,
+                    "seconds": 0.0,
+                    "queries": 0,
+                    "sql_seconds": 0.0,
+                    "serializer_seconds": 0.0,
+                }
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][index] += 1
+            series["count"] += 1
+            series["seconds"] += seconds
+            series["queries"] += stats.queries
+            series["sql_seconds"] += stats.sql_seconds
+            series["serializer_seconds"] += stats.serializer_seconds
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def render(self):
+        lines = [
+            "# HELP trip_http_request_duration_seconds Request latency",
+            "# TYPE trip_http_request_duration_seconds histogram",
+        ]
+        totals = []
+        with self.lock:
+            series = sorted(
+                (labels, dict(values, buckets=list(values["buckets"])))
+                for labels, values in self.series.items()
+            )
+
+        for (view, action, method, status_code), values in series:
+            label = f'view="{view}",action="{action}",method="{method}",status="{status_code}"'
+            for bound, count in zip(LATENCY_BUCKETS, values["buckets"]):
+                lines.append(f'trip_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'trip_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {values["count"]}')
+            lines.append(f'trip_http_request_duration_seconds_sum{{{label}}} {values["seconds"]}')
+            lines.append(f'trip_http_request_duration_seconds_count{{{label}}} {values["count"]}')
+            totals.append((label, values))
+
+        for name, key, description in (
+            ("trip_http_request_sql_queries_total", "queries", "SQL queries run by requests"),
+            ("trip_http_request_sql_seconds_total", "sql_seconds", "Time spent in SQL"),
+            ("trip_http_request_serializer_seconds_total", "serializer_seconds", "Time spent serializing"),
+        ):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{{{label}}} {values[key]}" for label, values in totals)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Installed once per connection: under ASGI queries run in sync_to_async worker threads,
+    # each with its own connection, and the stats reach them through the copied context
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _timed_data(data_property):
+    def data(self):
+        stats = _current.get()
+        if stats is None:
+            return data_property.fget(self)
+        started = time.perf_counter()
+        try:
+            return data_property.fget(self)
+        finally:
+            stats.serializer_seconds += time.perf_counter() - started
+    return property(data)
+
+
+def instrument_serializers():
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(serializer_class.data, "_trip_timed", False):
+            timed = _timed_data(serializer_class.data)
+            timed.fget._trip_timed = True
+            serializer_class.data = timed
+
+
+def _view_labels(view_func, method):
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", "unknown"), method.lower()
+    actions = getattr(view_func, "actions", None) or {}
+    return view_class.__name__, actions.get(method.lower(), method.lower())
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, stats, time.perf_counter() - started)
+
+    def observe(self, request, response, stats, seconds):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            view, action = "unresolved", request.method.lower()
+        else:
+            view, action = _view_labels(match.func, request.method)
+        registry.observe((view, action, request.method, response.status_code), seconds, stats)
+
+        user = getattr(request, "user", None)
+        # Don't resolve a lazy session user just for the header
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            user = None
+        if settings.SERVER_TIMING_FOR_STAFF and user is not None and user.is_staff:
+            response["Server-Timing"] = (
+                f"app;dur={seconds * 1000:.1f}, "
+                f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                f"ser;dur={stats.serializer_seconds * 1000:.1f}"
+            )
+        return response
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(provided.encode(), token.encode()):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,97 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_search_rows(apps, schema_editor):
+    Journey = apps.get_model("trip", "Journey")
+    JourneySearchRow = apps.get_model("trip", "JourneySearchRow")
+
+    journeys = (
+        Journey.objects.select_related("route__source", "route__destination", "train__train_type")
+        .prefetch_related("crew")
+        .annotate(tickets_sold=models.Count("ticket"))
+    )
+    rows = []
+    for journey in journeys.iterator(chunk_size=1000):
+        route, train = journey.route, journey.train
+        try:
+            places_in_cargo = max(int(train.places_in_cargo), 0)
+        except ValueError:
+            places_in_cargo = 0
+        rows.append(
+            JourneySearchRow(
+                journey=journey,
+                route_id=route.id,
+                source_name=route.source.name,
+                destination_name=route.destination.name,
+                distance=route.distance,
+                train_id=train.id,
+                train_name=train.name,
+                train_type_name=train.train_type.name,
+                cargo_num=train.cargo_num,
+                places_in_cargo=train.places_in_cargo,
+                departure_time=journey.departure_time,
+                arrival_time=journey.arrival_time,
+                crew=sorted(crew.id for crew in journey.crew.all()),
+                capacity=max(train.cargo_num, 0) * places_in_cargo,
+                tickets_sold=journey.tickets_sold,
+            )
+        )
+    JourneySearchRow.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0005_seathold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JourneySearchRow",
+            fields=[
+                (
+                    "journey",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_row",
+                        serialize=False,
+                        to="trip.journey",
+                    ),
+                ),
+                ("route_id", models.BigIntegerField()),
+                ("source_name", models.CharField(max_length=255)),
+                ("destination_name", models.CharField(max_length=255)),
+                ("distance", models.IntegerField()),
+                ("train_id", models.BigIntegerField()),
+                ("train_name", models.CharField(max_length=255)),
+                ("train_type_name", models.CharField(max_length=255)),
+                ("cargo_num", models.IntegerField()),
+                ("places_in_cargo", models.CharField(max_length=255)),
+                ("departure_time", models.DateTimeField()),
+                ("arrival_time", models.DateTimeField()),
+                ("crew", models.JSONField(default=list)),
+                ("capacity", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["departure_time"], name="trip_journe_departu_092d5e_idx"
+                    ),
+                    models.Index(
+                        fields=["route_id", "departure_time"],
+                        name="trip_journe_route_i_17a950_idx",
+                    ),
+                    models.Index(
+                        fields=["train_id", "departure_time"],
+                        name="trip_journe_train_i_75b7ea_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_search_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0006_journeysearchrow"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["departure_time"], name="trip_journe_departu_abc074_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["arrival_time"], name="trip_journe_arrival_63c7e0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="trip_journe_route_i_a4ee51_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["train", "departure_time"],
+                name="trip_journe_train_i_427eb2_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journeysearchrow",
+            index=models.Index(
+                fields=["arrival_time"], name="trip_journe_arrival_6baf15_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def clean_places_in_cargo(apps, schema_editor):
+    # Free-text values that can't become a non-negative integer count as no seats
+    for model_name in ("Train", "JourneySearchRow"):
+        model = apps.get_model("trip", model_name)
+        for pk, places_in_cargo in model.objects.values_list(
+            "pk", "places_in_cargo"
+        ).iterator(chunk_size=1000):
+            value = places_in_cargo.strip()
+            if not value.isdigit() or value != places_in_cargo:
+                model.objects.filter(pk=pk).update(
+                    places_in_cargo=value if value.isdigit() else "0"
+                )
+
+
+def populate_layouts(apps, schema_editor):
+    JourneySearchRow = apps.get_model("trip", "JourneySearchRow")
+    rows = []
+    for row in JourneySearchRow.objects.only(
+        "pk", "cargo_num", "places_in_cargo"
+    ).iterator(chunk_size=1000):
+        row.layout = [[row.places_in_cargo, ""]] * max(row.cargo_num, 0)
+        rows.append(row)
+        if len(rows) == 1000:
+            JourneySearchRow.objects.bulk_update(rows, ["layout"])
+            rows = []
+    JourneySearchRow.objects.bulk_update(rows, ["layout"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0007_journey_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="seathold",
+            options={"ordering": ["cargo", "seat"]},
+        ),
+        migrations.AlterModelOptions(
+            name="ticket",
+            options={"ordering": ["cargo", "seat"]},
+        ),
+        migrations.RunPython(clean_places_in_cargo, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="journeysearchrow",
+            name="layout",
+            field=models.JSONField(default=list),
+        ),
+        migrations.AlterField(
+            model_name="journeysearchrow",
+            name="places_in_cargo",
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="train",
+            name="places_in_cargo",
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.RunPython(populate_layouts, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="seathold",
+            unique_together={("journey", "cargo", "seat")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together={("journey", "cargo", "seat")},
+        ),
+        migrations.CreateModel(
+            name="Coach",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField()),
+                ("seats", models.PositiveIntegerField()),
+                ("coach_class", models.CharField(blank=True, max_length=63)),
+                (
+                    "train",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coaches",
+                        to="trip.train",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["number"],
+                "unique_together": {("train", "number")},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+def station_label(station):
+    return f"{station.name}, {station.latitude}, {station.longitude}"
+
+
+def fill_snapshots(apps, schema_editor):
+    # Historical models have no __str__, so the route label is spelled out as Route.__str__ renders it
+    Ticket = apps.get_model("trip", "Ticket")
+    tickets = []
+    for ticket in Ticket.objects.select_related(
+        "journey__route__source", "journey__route__destination", "journey__train"
+    ).iterator(chunk_size=1000):
+        journey = ticket.journey
+        route = journey.route
+        ticket.route_label = f"{station_label(route.source)}, {station_label(route.destination)}, {route.distance}"
+        ticket.train_name = journey.train.name
+        ticket.departure_time = journey.departure_time
+        ticket.arrival_time = journey.arrival_time
+        tickets.append(ticket)
+        if len(tickets) == 1000:
+            Ticket.objects.bulk_update(
+                tickets, ["route_label", "train_name", "departure_time", "arrival_time"]
+            )
+            tickets = []
+    Ticket.objects.bulk_update(
+        tickets, ["route_label", "train_name", "departure_time", "arrival_time"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0008_coach_layout"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="arrival_time",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="departure_time",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="route_label",
+            field=models.CharField(blank=True, max_length=1023),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="train_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+TABLES = ("trip_station", "trip_train")
+
+
+def create_indexes(apps, schema_editor):
+    # Trigram and prefix indexes for /station/search/ and /train/search/; other databases use the in-process trie
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TABLES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_name_trgm ON {table} USING gin (lower(name) gin_trgm_ops)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_name_prefix ON {table} (lower(name) text_pattern_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_name_trgm")
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_name_prefix")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0010_orderrequest"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
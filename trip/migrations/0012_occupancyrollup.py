@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0011_name_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OccupancyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("journeys", models.IntegerField(default=0)),
+                ("capacity", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="trip.route",
+                    ),
+                ),
+                (
+                    "train_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="trip.traintype",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="trip_occupa_day_75e09e_idx")
+                ],
+                "unique_together": {("route", "day", "train_type")},
+            },
+        ),
+    ]
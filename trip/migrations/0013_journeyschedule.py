@@ -0,0 +1,87 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:03
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trip", "0012_occupancyrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="schedule_day",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="JourneySchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("duration", models.DurationField()),
+                (
+                    "weekdays",
+                    models.CharField(
+                        default="1111111",
+                        max_length=7,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^[01]{7}$", "Use seven 0/1 flags from Monday."
+                            )
+                        ],
+                    ),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField(blank=True, null=True)),
+                (
+                    "crew",
+                    models.ManyToManyField(
+                        blank=True, related_name="schedule", to="trip.crew"
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule",
+                        to="trip.route",
+                    ),
+                ),
+                (
+                    "train",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule",
+                        to="trip.train",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="journey",
+                to="trip.journeyschedule",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="journey",
+            unique_together={("schedule", "schedule_day")},
+        ),
+    ]
@@ -1,4 +1,9 @@
+import uuid
+from datetime import datetime
+
+from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from train_service import settings
@@ -14,12 +19,39 @@ class TrainType(models.Model):
 class Train(models.Model):
     name = models.CharField(max_length=255)
     cargo_num = models.IntegerField()
-    places_in_cargo = models.CharField(max_length=255)
+    places_in_cargo = models.PositiveIntegerField()
     train_type = models.ForeignKey(TrainType, on_delete=models.CASCADE, related_name="train")
 
     def __str__(self):
         return f"{self.name}, {self.cargo_num}, {self.places_in_cargo}, {self.train_type}"
 
+    def coach_layout(self):
+        """(seats, coach_class) for cargos 1..cargo_num; cargos without a Coach row have places_in_cargo seats."""
+        coaches = {coach.number: coach for coach in self.coaches.all()}
+        layout = []
+        for number in range(1, max(self.cargo_num, 0) + 1):
+            coach = coaches.get(number)
+            layout.append((coach.seats, coach.coach_class) if coach else (self.places_in_cargo, ""))
+        return layout
+
+    @property
+    def capacity(self):
+        return sum(seats for seats, _ in self.coach_layout())
+
+
+class Coach(models.Model):
+    train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name="coaches")
+    number = models.PositiveIntegerField()
+    seats = models.PositiveIntegerField()
+    coach_class = models.CharField(max_length=63, blank=True)
+
+    def __str__(self):
+        return f"{self.train.name}, {self.number}, {self.seats}, {self.coach_class}"
+
+    class Meta:
+        unique_together = ("train", "number")
+        ordering = ["number"]
+
 
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -58,39 +90,196 @@ class Crew(models.Model):
         return f"{self.first_name}, {self.last_name}"
 
 
+class JourneySchedule(models.Model):
+    """A recurring journey: listed as virtual journeys and stored as a Journey once a ticket is booked on one."""
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedule")
+    train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name="schedule")
+    crew = models.ManyToManyField(Crew, related_name="schedule", blank=True)
+    # Local time of day in TIME_ZONE
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    # One flag per weekday from Monday, e.g. 1111100 for weekdays only
+    weekdays = models.CharField(
+        max_length=7, default="1111111", validators=[RegexValidator(r"^[01]{7}$", "Use seven 0/1 flags from Monday.")]
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.route}, {self.train}, {self.departure_time}, {self.weekdays}"
+
+    def runs_on(self, day):
+        return (
+            self.valid_from <= day
+            and (self.valid_until is None or day <= self.valid_until)
+            and self.weekdays[day.weekday()] == "1"
+        )
+
+    def departure_on(self, day):
+        return timezone.make_aware(datetime.combine(day, self.departure_time), timezone.get_default_timezone())
+
+
 class Journey(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="journey")
     train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name="journey")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="journey")
+    # Set on journeys created from a schedule when their first ticket was booked
+    schedule = models.ForeignKey(
+        JourneySchedule, on_delete=models.SET_NULL, null=True, blank=True, related_name="journey"
+    )
+    schedule_day = models.DateField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.route}, {self.train}, {self.departure_time}, {self.arrival_time}, {self.crew}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["departure_time"]),
+            models.Index(fields=["arrival_time"]),
+            models.Index(fields=["route", "departure_time"]),
+            models.Index(fields=["train", "departure_time"]),
+        ]
+        unique_together = ("schedule", "schedule_day")
+
 
 class Ticket(models.Model):  #
     cargo = models.IntegerField()
     seat = models.IntegerField()
     journey = models.ForeignKey(Journey, on_delete=models.CASCADE, related_name="ticket")
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="ticket")
+    # Journey details as sold, so order history needs no joins and survives later timetable edits
+    route_label = models.CharField(max_length=1023, blank=True)
+    train_name = models.CharField(max_length=255, blank=True)
+    departure_time = models.DateTimeField(null=True, blank=True)
+    arrival_time = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.cargo}, {self.seat}, {self.journey}, {self.order}"
 
+    def fill_snapshot(self, journey):
+        """Copy the journey details; the journey needs route__source, route__destination and train loaded."""
+        self.route_label = str(journey.route)
+        self.train_name = journey.train.name
+        self.departure_time = journey.departure_time
+        self.arrival_time = journey.arrival_time
+
+    @staticmethod
+    def validate_position(cargo, seat, error_to_raise, layout=None):
+        if cargo < 1:
+            raise error_to_raise("cargo must be a positive integer")
+        if seat < 1:
+            raise error_to_raise("seat`s must be greater then 1")
+        if layout is not None:
+            if cargo > len(layout):
+                raise error_to_raise(f"cargo must be in range [1, {len(layout)}]")
+            if seat > layout[cargo - 1][0]:
+                raise error_to_raise(f"seat must be in range [1, {layout[cargo - 1][0]}] in cargo {cargo}")
+
     def clean(self):
-        if self.cargo < 0:
-            raise ValidationError("cargo must be a positive integer")
-        if self.seat < 1:
-            raise ValidationError("seat`s must be greater then 1")
+        Ticket.validate_position(self.cargo, self.seat, ValidationError, self.journey.train.coach_layout())
 
-        if Ticket.objects.filter(journey=self.journey, seat=self.seat).exists():
+        if Ticket.objects.filter(journey=self.journey, cargo=self.cargo, seat=self.seat).exists():
             raise ValidationError(f"{self.seat} is already taken please select another")
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        if self._state.adding and not self.route_label:
+            self.fill_snapshot(self.journey)
         super(Ticket, self).save(*args, **kwargs)
 
     class Meta:
-        unique_together = ("journey", "seat")
-        ordering = ["seat"]
+        unique_together = ("journey", "cargo", "seat")
+        ordering = ["cargo", "seat"]
+
+
+class SeatHold(models.Model):
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    journey = models.ForeignKey(Journey, on_delete=models.CASCADE, related_name="seat_hold")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_hold")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.cargo}, {self.seat}, {self.journey_id}, {self.expires_at}"
+
+    class Meta:
+        unique_together = ("journey", "cargo", "seat")
+        ordering = ["cargo", "seat"]
+
+
+class OrderRequest(models.Model):
+    """An order queued by the async ordering mode, allocated later by the process_order_queue worker."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        COMPLETED = "completed"
+        FAILED = "failed"
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="order_request")
+    tickets = models.JSONField()
+    status = models.CharField(max_length=15, choices=Status.choices, default=Status.PENDING)
+    order = models.OneToOneField(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name="request")
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.token}, {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"]),
+        ]
+
+
+class JourneySearchRow(models.Model):
+    journey = models.OneToOneField(Journey, on_delete=models.CASCADE, primary_key=True, related_name="search_row")
+    route_id = models.BigIntegerField()
+    source_name = models.CharField(max_length=255)
+    destination_name = models.CharField(max_length=255)
+    distance = models.IntegerField()
+    train_id = models.BigIntegerField()
+    train_name = models.CharField(max_length=255)
+    train_type_name = models.CharField(max_length=255)
+    cargo_num = models.IntegerField()
+    places_in_cargo = models.PositiveIntegerField()
+    layout = models.JSONField(default=list)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    crew = models.JSONField(default=list)
+    capacity = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.source_name}, {self.destination_name}, {self.departure_time}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["departure_time"]),
+            models.Index(fields=["arrival_time"]),
+            models.Index(fields=["route_id", "departure_time"]),
+            models.Index(fields=["train_id", "departure_time"]),
+        ]
+
+
+class OccupancyRollup(models.Model):
+    # Seats and sales per route, departure day (in TIME_ZONE) and train type, maintained by trip.rollups
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="+")
+    train_type = models.ForeignKey(TrainType, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    journeys = models.IntegerField(default=0)
+    capacity = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.route_id}, {self.train_type_id}, {self.day}: {self.tickets_sold}/{self.capacity}"
+
+    class Meta:
+        unique_together = ("route", "day", "train_type")
+        indexes = [
+            models.Index(fields=["day"]),
+        ]
@@ -0,0 +1,157 @@
+import heapq
+import threading
+
+from django.db import connection
+from django.db.models import Case, When, Value, IntegerField, Q
+from django.db.models.functions import Lower, Length
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from trip.response_cache import model_versions
+
+
+def max_edits(query):
+    # Short queries get no typo budget, otherwise every name would match
+    if len(query) <= 2:
+        return 0
+    return 1 if len(query) <= 7 else 2
+
+
+class NameIndex:
+    """
+    Prefix trie over every word of the names. A search walks the trie with a Levenshtein row per node,
+    so a node within the typo budget of the query matches every name below it.
+    """
+
+    def __init__(self, names):
+        self.names = {}
+        self.root = {}
+        for pk, name in names:
+            self.names[pk] = name
+            words = name.lower().split()
+            for position in range(len(words)):
+                # The rest of the name from each word on, so "lviv main" also finds "Lviv Main Station"
+                self._insert(" ".join(words[position:]), pk, position == 0)
+
+    def _insert(self, text, pk, name_start):
+        node = self.root
+        for char in text:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append((pk, name_start))
+
+    @staticmethod
+    def _collect(node, found, distance):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    for pk, name_start in child:
+                        rank = (distance, not name_start)
+                        if rank < found.get(pk, (distance + 1,)):
+                            found[pk] = rank
+                else:
+                    stack.append(child)
+
+    def search(self, query, limit):
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+        budget = max_edits(query)
+        found = {}
+        first_row = list(range(len(query) + 1))
+        if first_row[-1] <= budget:
+            self._collect(self.root, found, first_row[-1])
+
+        # Rows of the optimal string alignment distance, so a swapped pair of letters is one typo
+        stack = [(child, char, first_row, None, None) for char, child in self.root.items() if char is not None]
+        while stack:
+            node, char, previous, before, previous_char = stack.pop()
+            row = [previous[0] + 1]
+            for column in range(1, len(query) + 1):
+                cost = 0 if query[column - 1] == char else 1
+                row.append(min(row[column - 1] + 1, previous[column] + 1, previous[column - 1] + cost))
+                if column > 1 and query[column - 1] == previous_char and query[column - 2] == char:
+                    row[column] = min(row[column], before[column - 2] + 1)
+            if row[-1] <= budget:
+                self._collect(node, found, row[-1])
+            if min(row) <= budget:
+                stack.extend(
+                    (child, next_char, row, previous, char)
+                    for next_char, child in node.items() if next_char is not None
+                )
+
+        return heapq.nsmallest(
+            limit,
+            found,
+            key=lambda pk: (*found[pk], len(self.names[pk]), self.names[pk].lower(), pk),
+        )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_name_index(model):
+    # Rebuilt when the model's response-cache version moves, which every save, delete and bulk load bumps
+    version = model_versions((model,))
+    index = _indexes.get(model)
+    if index is None or index[0] != version:
+        with _indexes_lock:
+            index = _indexes.get(model)
+            if index is None or index[0] != version:
+                index = _indexes[model] = (version, NameIndex(model.objects.values_list("id", "name").iterator()))
+    return index[1]
+
+
+def _postgres_search(queryset, query, limit):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # Both conditions are served by the indexes on lower(name) from migration 0011
+    query = query.lower()
+    return list(
+        queryset.annotate(
+            lower_name=Lower("name"),
+            similarity=TrigramWordSimilarity(Value(query), Lower("name")),
+        )
+        .filter(Q(lower_name__startswith=query) | Q(TrigramWordSimilar(Lower("name"), Value(query))))
+        .annotate(name_start=Case(When(lower_name__startswith=query, then=0), default=1, output_field=IntegerField()))
+        .order_by("name_start", "-similarity", Length("name"), "lower_name", "id")[:limit]
+    )
+
+
+def search_by_name(queryset, query, limit):
+    """Ranked prefix and typo-tolerant name matches: trigram indexes on Postgres, the in-process trie elsewhere."""
+    if connection.vendor == "postgresql":
+        return _postgres_search(queryset, query, limit)
+    ids = get_name_index(queryset.model).search(query, limit)
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+class NameSearchMixin:
+    """``search`` action for viewsets over a model with a ``name`` field, serialized with the list serializer."""
+    max_search_results = 50
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", type=OpenApiTypes.STR, required=True, description="Name or its start (ex. ?q=kyiv)"),
+            OpenApiParameter("limit", type=OpenApiTypes.INT, description="Number of results, max 50"),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="search")
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This parameter is required."})
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), self.max_search_results)
+        except ValueError:
+            raise ValidationError({"limit": "must be an integer"})
+
+        results = search_by_name(self.get_queryset(), query, limit)
+        return Response(self.get_serializer(results, many=True).data)
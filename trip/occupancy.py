@@ -0,0 +1,158 @@
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from trip.models import Coach, Ticket
+
+SEAT_MAP_CACHE_KEY = "trip:seat_map:v3:{journey_id}:{version}"
+SEAT_MAP_VERSION_KEY = "trip:seat_map:version:{journey_id}"
+SEAT_MAP_TIMEOUT = 60 * 60
+
+
+def train_capacity(prefix=""):
+    """
+    Seats on a train as an SQL expression, e.g. ``Train.objects.annotate(capacity=train_capacity())``
+    or ``Journey.objects.annotate(capacity=train_capacity("train__"))``. Coach overrides are summed
+    in a subquery so the annotation can sit next to other aggregates.
+    """
+    overrides = (
+        Coach.objects.filter(train=OuterRef(f"{prefix}pk"), number__lte=F("train__cargo_num"))
+        .values("train")
+        .annotate(extra=Sum(F("seats") - F("train__places_in_cargo")))
+        .values("extra")
+    )
+    return F(f"{prefix}cargo_num") * F(f"{prefix}places_in_cargo") + Coalesce(Subquery(overrides), 0)
+
+
+def journey_layout(journey):
+    # The search row carries the layout, so the seat map needs no extra query for coaches
+    try:
+        return journey.search_row.layout
+    except ObjectDoesNotExist:
+        return journey.train.coach_layout()
+
+
+class SeatMap:
+    """One bit per (cargo, seat) pair, cargo and seat numbers start at 1; ``layout`` is the seats per cargo."""
+
+    def __init__(self, layout, bits=None):
+        self.layout = tuple(layout)
+        self.offsets = [0]
+        for seats in self.layout:
+            self.offsets.append(self.offsets[-1] + seats)
+        size = (self.offsets[-1] + 7) // 8
+        self.bits = bytearray(bits) if bits is not None else bytearray(size)
+
+    def _index(self, cargo, seat):
+        if 1 <= cargo <= len(self.layout) and 1 <= seat <= self.layout[cargo - 1]:
+            return self.offsets[cargo - 1] + seat - 1
+        return None
+
+    def mark(self, cargo, seat):
+        index = self._index(cargo, seat)
+        if index is not None:
+            self.bits[index >> 3] |= 1 << (index & 7)
+
+    def is_taken(self, cargo, seat):
+        index = self._index(cargo, seat)
+        return index is not None and bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    @property
+    def cargo_num(self):
+        return len(self.layout)
+
+    @property
+    def capacity(self):
+        return self.offsets[-1]
+
+    @property
+    def taken_count(self):
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+    def cargos(self):
+        for cargo, seats in enumerate(self.layout, 1):
+            free, taken = [], []
+            for seat in range(1, seats + 1):
+                (taken if self.is_taken(cargo, seat) else free).append(seat)
+            yield {"cargo": cargo, "free": free, "taken": taken}
+
+    def dump(self):
+        return self.layout, bytes(self.bits)
+
+
+def _cache_key(journey_id, version):
+    return SEAT_MAP_CACHE_KEY.format(journey_id=journey_id, version=version)
+
+
+def _version_key(journey_id):
+    return SEAT_MAP_VERSION_KEY.format(journey_id=journey_id)
+
+
+def _current_version(journey_id):
+    # Seeded from the clock so a version evicted from the cache is never handed out again
+    return cache.get_or_set(_version_key(journey_id), time.time_ns, SEAT_MAP_TIMEOUT)
+
+
+def _next_version(journey_id):
+    key = _version_key(journey_id)
+    cache.add(key, time.time_ns(), SEAT_MAP_TIMEOUT)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return None
+
+
+def build_seat_map(journey_id, layout):
+    seat_map = SeatMap(layout)
+    for cargo, seat in Ticket.objects.filter(journey_id=journey_id).values_list("cargo", "seat"):
+        seat_map.mark(cargo, seat)
+    return seat_map
+
+
+def get_seat_map(journey_id, layout):
+    layout = tuple(seats for seats, _ in layout)
+    key = _cache_key(journey_id, _current_version(journey_id))
+    cached = cache.get(key)
+    if cached is not None and cached[0] == layout:
+        return SeatMap(*cached)
+
+    seat_map = build_seat_map(journey_id, layout)
+    cache.set(key, seat_map.dump(), SEAT_MAP_TIMEOUT)
+    return seat_map
+
+
+def mark_seats_taken(journey_id, seats):
+    """
+    Writes the map of the next version as the previous one plus the seats; call it once the tickets are
+    committed. Each writer gets its own version from incr, so concurrent sales never overwrite each
+    other's bits. When the previous map is missing, e.g. another writer has not stored it yet, nothing
+    is written and the next read rebuilds the map from the tickets.
+    """
+    version = _next_version(journey_id)
+    if version is None:
+        return
+    cached = cache.get(_cache_key(journey_id, version - 1))
+    if cached is None:
+        return
+
+    seat_map = SeatMap(*cached)
+    for cargo, seat in seats:
+        seat_map.mark(cargo, seat)
+    # A reader may have rebuilt this version already, from tickets that include these
+    cache.add(_cache_key(journey_id, version), seat_map.dump(), SEAT_MAP_TIMEOUT)
+
+
+def mark_tickets_taken(tickets):
+    seats = {}
+    for ticket in tickets:
+        seats.setdefault(ticket.journey_id, []).append((ticket.cargo, ticket.seat))
+    for journey_id, journey_seats in seats.items():
+        mark_seats_taken(journey_id, journey_seats)
+
+
+def invalidate_seat_map(journey_id):
+    # Moving to a version without a map makes the next read rebuild it
+    _next_version(journey_id)
@@ -0,0 +1,197 @@
+import operator
+from datetime import date
+from functools import reduce
+
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from trip.holds import active_holds
+from trip.models import Journey, Order, OrderRequest, SeatHold, Ticket
+from trip.occupancy import mark_tickets_taken
+from trip.schedules import bookable_schedules, booked_journeys, materialize
+from trip.search import record_tickets_sold
+
+QUEUE_BATCH_SIZE = 500
+RETRY_MESSAGE = "some of the selected seats were just taken, please try again"
+
+
+def _queued_ticket(ticket):
+    if "occurrence" in ticket:
+        # Scheduled departures not stored yet get their journey when the worker allocates the order
+        schedule_id, day = ticket["occurrence"]
+        return {"schedule": schedule_id, "date": day.isoformat(), "cargo": ticket["cargo"], "seat": ticket["seat"]}
+    return {"journey": ticket["journey_id"], "cargo": ticket["cargo"], "seat": ticket["seat"]}
+
+
+def enqueue_order(user_id, tickets):
+    return OrderRequest.objects.create(user_id=user_id, tickets=[_queued_ticket(ticket) for ticket in tickets])
+
+
+def _target(ticket):
+    if "journey" in ticket:
+        return ticket["journey"]
+    return ticket["schedule"], date.fromisoformat(ticket["date"])
+
+
+def _positions(order_request):
+    return [(_target(ticket), ticket["cargo"], ticket["seat"]) for ticket in order_request.tickets]
+
+
+def _label(target):
+    if isinstance(target, tuple):
+        return f"schedule {target[0]} on {target[1]}"
+    return f"journey {target}"
+
+
+def _finish(order_requests):
+    now = timezone.now()
+    for order_request in order_requests:
+        order_request.processed_at = now
+    OrderRequest.objects.bulk_update(order_requests, ["status", "order", "errors", "processed_at"])
+
+
+def _allocate_group(ids):
+    """Allocates queued orders for the same journeys, oldest first, in one transaction under the journey locks."""
+    with transaction.atomic():
+        # skip_locked lets several workers drain the queue without taking the same requests
+        order_requests = list(
+            OrderRequest.objects.select_for_update(skip_locked=True)
+            .filter(id__in=ids, status=OrderRequest.Status.PENDING)
+            .order_by("id")
+        )
+        if not order_requests:
+            return []
+        positions = {order_request.id: _positions(order_request) for order_request in order_requests}
+        occurrences = {target for wanted in positions.values() for target, _, _ in wanted if isinstance(target, tuple)}
+        # Departures stored since the order was queued book onto their journey; the rest need a bookable schedule
+        booked = booked_journeys(occurrences)
+        schedules = bookable_schedules(occurrences - set(booked))
+        for order_id, wanted in positions.items():
+            positions[order_id] = [(booked.get(target, target), cargo, seat) for target, cargo, seat in wanted]
+        journey_ids = sorted({
+            target for wanted in positions.values() for target, _, _ in wanted if not isinstance(target, tuple)
+        })
+
+        # Lock journeys in id order, the same rows OrderSerializer.create and seat holds lock on
+        journeys = {
+            journey.id: journey
+            for journey in Journey.objects.select_for_update(of=("self",))
+            .select_related("route__source", "route__destination", "train")
+            .filter(id__in=journey_ids)
+            .order_by("id")
+        }
+        taken = set(Ticket.objects.filter(journey_id__in=journey_ids).values_list("journey_id", "cargo", "seat"))
+        held = {
+            (journey_id, cargo, seat): user_id
+            for journey_id, cargo, seat, user_id in active_holds()
+            .filter(journey_id__in=journey_ids)
+            .values_list("journey_id", "cargo", "seat", "user_id")
+        }
+
+        accepted = []
+        for order_request in order_requests:
+            wanted = positions[order_request.id]
+            missing = sorted(
+                {target for target, _, _ in wanted if target not in journeys and target not in schedules}, key=str
+            )
+            conflicts = sorted(
+                (
+                    position for position in wanted
+                    if position in taken or held.get(position, order_request.user_id) != order_request.user_id
+                ),
+                key=str,
+            )
+            if missing:
+                order_request.errors = [
+                    f"journey {target} does not exist" if not isinstance(target, tuple)
+                    else f"{_label(target)} is no longer bookable"
+                    for target in missing
+                ]
+            elif conflicts:
+                order_request.errors = [
+                    f"{seat} is already taken please select another ({_label(target)}, cargo {cargo})"
+                    for target, cargo, seat in conflicts
+                ]
+            else:
+                taken.update(wanted)
+                accepted.append(order_request)
+                continue
+            order_request.status = OrderRequest.Status.FAILED
+
+        # Only departures an accepted order books are stored, in this transaction
+        stored = {
+            occurrence: materialize(schedules[occurrence], occurrence[1]).id
+            for occurrence in sorted({
+                target for order_request in accepted for target, _, _ in positions[order_request.id]
+                if isinstance(target, tuple)
+            })
+        }
+        if stored:
+            journeys.update(
+                Journey.objects.select_for_update(of=("self",))
+                .select_related("route__source", "route__destination", "train")
+                .in_bulk(sorted(stored.values()))
+            )
+            for order_request in accepted:
+                positions[order_request.id] = [
+                    (stored.get(target, target), cargo, seat) for target, cargo, seat in positions[order_request.id]
+                ]
+
+        orders = Order.objects.bulk_create([Order(user_id=order_request.user_id) for order_request in accepted])
+        tickets = []
+        for order_request, order in zip(accepted, orders):
+            order_request.order = order
+            order_request.status = OrderRequest.Status.COMPLETED
+            for journey_id, cargo, seat in positions[order_request.id]:
+                ticket = Ticket(order=order, journey_id=journey_id, cargo=cargo, seat=seat)
+                ticket.fill_snapshot(journeys[journey_id])
+                tickets.append(ticket)
+        tickets = Ticket.objects.bulk_create(tickets)
+
+        if accepted:
+            SeatHold.objects.filter(reduce(operator.or_, (
+                Q(journey_id=journey_id, cargo=cargo, seat=seat, user_id=order_request.user_id)
+                for order_request in accepted
+                for journey_id, cargo, seat in positions[order_request.id]
+            ))).delete()
+            record_tickets_sold(tickets)
+            transaction.on_commit(lambda: mark_tickets_taken(tickets))
+        _finish(order_requests)
+        return order_requests
+
+
+def allocate_group(ids):
+    try:
+        return _allocate_group(ids)
+    except IntegrityError:
+        # A seat was sold outside the journey locks; retry one by one so only that order fails
+        if len(ids) > 1:
+            return [order_request for order_id in ids for order_request in allocate_group([order_id])]
+        order_requests = list(OrderRequest.objects.filter(id__in=ids, status=OrderRequest.Status.PENDING))
+        for order_request in order_requests:
+            order_request.status = OrderRequest.Status.FAILED
+            order_request.errors = [RETRY_MESSAGE]
+        _finish(order_requests)
+        return order_requests
+
+
+def process_order_queue(batch_size=QUEUE_BATCH_SIZE):
+    """Allocates the oldest pending orders, grouped by the journeys they book; returns (completed, failed)."""
+    groups = {}
+    pending = (
+        OrderRequest.objects.filter(status=OrderRequest.Status.PENDING)
+        .order_by("id")
+        .values_list("id", "tickets")[:batch_size]
+    )
+    for order_id, tickets in pending:
+        groups.setdefault(tuple(sorted({str(_target(ticket)) for ticket in tickets})), []).append(order_id)
+
+    completed = failed = 0
+    for ids in groups.values():
+        for order_request in allocate_group(ids):
+            if order_request.status == OrderRequest.Status.COMPLETED:
+                completed += 1
+            else:
+                failed += 1
+    return completed, failed
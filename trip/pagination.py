@@ -1,6 +1,242 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+import operator
+from functools import cmp_to_key, reduce
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination over a unique ordering such as ("departure_time", "id").
+    The view may override the ordering with a ``keyset_ordering`` attribute.
+    """
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = ("-id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, view):
+        return [
+            (name.lstrip("-"), name.startswith("-"))
+            for name in getattr(view, "keyset_ordering", self.ordering)
+        ]
+
+    @staticmethod
+    def _encode_value(value):
+        # Keep full microsecond precision, DjangoJSONEncoder truncates it
+        return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+    def encode_cursor(self, values, backwards):
+        payload = json.dumps({"v": values, "b": backwards}, default=self._encode_value)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(ordering, payload["v"], strict=True)
+            ]
+            return values, bool(payload["b"])
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _seek(ordering, values, backwards):
+        conditions = []
+        for position, (name, descending) in enumerate(ordering):
+            lookup = "lt" if descending != backwards else "gt"
+            equal = {prefix_name: values[index] for index, (prefix_name, _) in enumerate(ordering[:position])}
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": values[position]}))
+        return reduce(operator.or_, conditions)
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = ordering = self.get_ordering(view)
+        values, self.backwards = self.decode_cursor(request, queryset.model, ordering)
+        self.has_cursor = values is not None
+        self.cursor_values = values
+
+        queryset = queryset.order_by(*[
+            f"{'-' if descending != self.backwards else ''}{name}" for name, descending in ordering
+        ])
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values, self.backwards))
+        return queryset[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._set_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        return self._set_page([row async for row in queryset.aiterator()])
+
+    def _compare(self, a, b):
+        for (_, descending), left, right in zip(self.keys, a, b):
+            if left != right:
+                return (1 if left > right else -1) * (-1 if descending else 1)
+        return 0
+
+    def paginate_merged(self, queryset, get_rows, request, view=None):
+        """
+        Pages a queryset merged with in-memory rows (dicts with the ordering fields, e.g. virtual journeys).
+        Only page_size + 1 rows are fetched; ``get_rows(cursor_values, backwards, limit)`` returns the
+        in-memory rows from the cursor on, in page order, and may stop once ``limit`` of them are past it.
+        """
+        queryset = self._page_queryset(queryset, request, view)
+        direction = -1 if self.backwards else 1
+
+        def key(row):
+            return [row[name] for name, _ in self.keys]
+
+        rows = get_rows(self.cursor_values, self.backwards, self.page_size + 1)
+        if self.cursor_values is not None:
+            rows = [row for row in rows if self._compare(key(row), self.cursor_values) * direction > 0]
+        merged = sorted(
+            [*queryset, *rows], key=cmp_to_key(lambda a, b: self._compare(key(a), key(b)) * direction)
+        )
+        return self._set_page(merged[:self.page_size + 1])
+
+    def _set_page(self, rows):
+        self.has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.backwards:
+            rows.reverse()
+        self.page = rows
+        return rows
+
+    def _link(self, row, backwards):
+        url = self.request.build_absolute_uri()
+        # Rows are model instances, or dicts on the .values() fast list path
+        values = [row[name] if isinstance(row, dict) else getattr(row, name) for name, _ in self.keys]
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, backwards))
+
+    def get_next_link(self):
+        if not self.page or not (self.has_cursor if self.backwards else self.has_more):
+            return None
+        return self._link(self.page[-1], backwards=False)
+
+    def get_previous_link(self):
+        if not self.page or not (self.has_more if self.backwards else self.has_cursor):
+            return None
+        return self._link(self.page[0], backwards=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor returned in the next/previous links",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page",
+                "schema": {"type": "integer"},
+            },
+        ]
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10
     max_page_size = 100
+    page_size_query_param = "page_size"
+    pagination_query_param = "pagination"
+
+    def _use_keyset(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = KeysetPagination() if self._use_keyset(request) else None
+        if self.keyset:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_merged(self, queryset, get_rows, request, view=None):
+        # Rows built in memory can't be counted or offset with the queryset, so merged lists page by cursor
+        self.keyset = KeysetPagination()
+        return self.keyset.paginate_merged(queryset, get_rows, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.keyset = KeysetPagination() if self._use_keyset(request) else None
+        if self.keyset:
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        bottom = (number - 1) * page_size
+        rows = [row async for row in queryset[bottom:bottom + page_size].aiterator()]
+        self.page = Page(rows, number, paginator)
+        self.request = request
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination without a total count",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+        ] + KeysetPagination().get_schema_operation_parameters(view)[:1]
@@ -0,0 +1,22 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from trip.renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    """Parses UTF-8 bodies with orjson; anything it rejects goes through JSONParser for the same result or error."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,135 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from trip.models import Journey
+
+TIMETABLE_VERSION_KEY = "trip:timetable:version"
+TIMETABLE_CHANGE_KEY = "trip:timetable:change:{version}"
+TIMETABLE_CHANGE_TIMEOUT = 60 * 60
+MAX_INCREMENTAL_CHANGES = 500
+MAX_LEGS = 8
+
+CONNECTION_FIELDS = ("departure_time", "arrival_time", "route__source_id", "route__destination_id", "id")
+
+
+class Timetable:
+    """
+    In-memory connection list sorted by departure, one connection per Journey.
+    Each process builds it once and then patches it from the change log that
+    journey signals append to the cache.
+    """
+
+    def __init__(self):
+        self.connections = None
+        self.by_journey = {}
+        self.version = None
+        self.lock = threading.Lock()
+
+    def _load(self, journey_ids=None):
+        queryset = Journey.objects.all()
+        if journey_ids is not None:
+            queryset = queryset.filter(id__in=journey_ids)
+        return [
+            connection for connection in queryset.values_list(*CONNECTION_FIELDS)
+            if connection[1] > connection[0]
+        ]
+
+    def rebuild(self, version):
+        connections = sorted(self._load())
+        self.by_journey = {connection[4]: connection for connection in connections}
+        self.connections = connections
+        self.version = version
+
+    def apply_changes(self, journey_ids, version):
+        connections = list(self.connections)
+        for journey_id in journey_ids:
+            old = self.by_journey.pop(journey_id, None)
+            if old is not None:
+                del connections[bisect_left(connections, old)]
+        for connection in self._load(journey_ids):
+            insort(connections, connection)
+            self.by_journey[connection[4]] = connection
+        self.connections = connections
+        self.version = version
+
+    def refresh(self):
+        version = cache.get(TIMETABLE_VERSION_KEY, 0)
+        if self.connections is not None and version == self.version:
+            return
+
+        with self.lock:
+            if (
+                self.connections is None
+                or version < self.version
+                or version - self.version > MAX_INCREMENTAL_CHANGES
+            ):
+                self.rebuild(version)
+                return
+            if version == self.version:
+                return
+
+            keys = [
+                TIMETABLE_CHANGE_KEY.format(version=number)
+                for number in range(self.version + 1, version + 1)
+            ]
+            changes = cache.get_many(keys)
+            if len(changes) != len(keys):
+                self.rebuild(version)
+                return
+            self.apply_changes({journey_id for ids in changes.values() for journey_id in ids}, version)
+
+    def earliest_arrival(self, origin, target, depart_after, min_transfer):
+        connections = self.connections
+        # The origin needs no transfer buffer
+        arrival = {origin: depart_after - min_transfer}
+        via = {}
+
+        for index in range(bisect_left(connections, (depart_after,)), len(connections)):
+            departure, arrival_time, source, destination, _ = connection = connections[index]
+            if target in via and departure >= arrival[target]:
+                break
+            reached = arrival.get(source)
+            if reached is None or reached + min_transfer > departure:
+                continue
+            if destination not in arrival or arrival_time < arrival[destination]:
+                arrival[destination] = arrival_time
+                via[destination] = connection
+
+        if target not in via:
+            return None
+
+        legs = []
+        station = target
+        while station != origin and len(legs) < MAX_LEGS:
+            connection = via[station]
+            legs.append(connection)
+            station = connection[2]
+        if station != origin:
+            return None
+        return legs[::-1]
+
+    def plan(self, origin, target, depart_after, min_transfer, limit):
+        self.refresh()
+        itineraries = []
+        while len(itineraries) < limit:
+            legs = self.earliest_arrival(origin, target, depart_after, min_transfer)
+            if legs is None:
+                break
+            itineraries.append(legs)
+            depart_after = legs[0][0] + timedelta(microseconds=1)
+        return itineraries
+
+
+timetable = Timetable()
+
+
+def record_timetable_change(journey_ids):
+    journey_ids = list(journey_ids)
+    if not journey_ids:
+        return
+    cache.add(TIMETABLE_VERSION_KEY, 0, timeout=None)
+    version = cache.incr(TIMETABLE_VERSION_KEY)
+    cache.set(TIMETABLE_CHANGE_KEY.format(version=version), journey_ids, TIMETABLE_CHANGE_TIMEOUT)
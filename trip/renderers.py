@@ -0,0 +1,41 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Floats where orjson and repr() disagree (exponents, magnitudes below 1e-4); strings that merely
+# look like them only cost a fallback to the stdlib encoder
+FLOAT_MISMATCH = re.compile(rb"\d[eE]|0\.0000\d")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders with orjson when the result is byte-for-byte what JSONRenderer would produce,
+    and falls back to it otherwise (indented output, big integers, ambiguous floats).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            rendered = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if FLOAT_MISMATCH.search(rendered):
+            return super().render(data, accepted_media_type, renderer_context)
+        return rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
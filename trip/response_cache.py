@@ -0,0 +1,101 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+MODEL_VERSION_KEY = "trip:model_version:{label}"
+RESPONSE_KEY = "trip:response:{name}:{digest}"
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(model):
+    return MODEL_VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def model_versions(models):
+    backend = response_cache()
+    keys = [_version_key(model) for model in models]
+    versions = backend.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from a fresh value so an evicted counter can't collide with old entries
+            backend.add(key, time.time_ns(), timeout=None)
+            versions[key] = backend.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_model_version(model):
+    backend = response_cache()
+    key = _version_key(model)
+    if not backend.add(key, time.time_ns(), timeout=None):
+        try:
+            backend.incr(key)
+        except ValueError:
+            backend.add(key, time.time_ns(), timeout=None)
+
+
+class CachedResponseMixin:
+    """
+    Caches list/retrieve responses under the versions of ``cache_models``
+    and answers matching If-None-Match headers with 304.
+    """
+    cache_models = ()
+
+    def _response_key(self, request):
+        digest = hashlib.sha1(
+            f"{request.get_full_path()}|{request.accepted_media_type}".encode()
+        ).hexdigest()
+        return RESPONSE_KEY.format(name=f"{self.basename}:{self.action}", digest=digest)
+
+    def _cache_lookup(self, request):
+        versions = model_versions(self.cache_models)
+        key = self._response_key(request)
+        etag = '"{}"'.format(hashlib.sha1(f"{key}|{versions}".encode()).hexdigest())
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return key, versions, headers, Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cached = response_cache().get(key)
+        if cached is not None and cached[0] == versions:
+            return key, versions, headers, Response(cached[1], headers=headers)
+        return key, versions, headers, None
+
+    def _cache_store(self, key, versions, headers, response):
+        if response.status_code == status.HTTP_200_OK:
+            response_cache().set(key, (versions, response.data), settings.RESPONSE_CACHE_TIMEOUT)
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    def cached_response(self, request, build_response):
+        key, versions, headers, response = self._cache_lookup(request)
+        if response is None:
+            response = self._cache_store(key, versions, headers, build_response())
+        return response
+
+    async def acached_response(self, request, build_response):
+        # Cache round trips are short and never touch the database, so async views call them directly
+        key, versions, headers, response = self._cache_lookup(request)
+        if response is None:
+            response = self._cache_store(key, versions, headers, await build_response())
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedListMixin, self).list(request, *args, **kwargs))
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CachedRetrieveMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -0,0 +1,193 @@
+import operator
+from datetime import timedelta
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from trip.models import Journey, OccupancyRollup, Ticket
+from trip.occupancy import train_capacity
+from trip.services import start_of_day
+
+ROLLUP_FIELDS = ("journeys", "capacity", "tickets_sold")
+KEY_CHUNK_SIZE = 100
+REBUILD_BATCH_SIZE = 2000
+
+
+def journey_day(departure_time):
+    # Days follow TIME_ZONE rather than the request's timezone so every writer agrees on the row
+    return timezone.localtime(departure_time, timezone.get_default_timezone()).date()
+
+
+def rollup_keys(journey_ids):
+    """(route_id, train_type_id, day) of each journey, by journey id."""
+    return {
+        journey_id: (route_id, train_type_id, journey_day(departure_time))
+        for journey_id, route_id, train_type_id, departure_time in Journey.objects.filter(id__in=journey_ids)
+        .values_list("id", "route_id", "train__train_type_id", "departure_time")
+    }
+
+
+def _journeys_in(keys):
+    tz = timezone.get_default_timezone()
+    return Journey.objects.filter(reduce(operator.or_, (
+        Q(
+            route_id=route_id,
+            train__train_type_id=train_type_id,
+            departure_time__gte=start_of_day(day, tz),
+            departure_time__lt=start_of_day(day + timedelta(days=1), tz),
+        )
+        for route_id, train_type_id, day in keys
+    )))
+
+
+def _rows_in(keys):
+    return OccupancyRollup.objects.filter(reduce(operator.or_, (
+        Q(route_id=route_id, train_type_id=train_type_id, day=day) for route_id, train_type_id, day in keys
+    )))
+
+
+def aggregate_rollups(journeys):
+    """Rollup rows computed from the journeys and their tickets, one per route, day and train type."""
+    sold = (
+        Ticket.objects.filter(journey=OuterRef("pk"))
+        .order_by()
+        .values("journey")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    rows = (
+        journeys.annotate(day=TruncDate("departure_time", tzinfo=timezone.get_default_timezone()))
+        .values("route_id", "train__train_type_id", "day")
+        .annotate(
+            journey_count=Count("id"),
+            seats=Sum(train_capacity("train__")),
+            sold=Sum(Coalesce(Subquery(sold), 0)),
+        )
+        .order_by()
+    )
+    for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        yield OccupancyRollup(
+            route_id=row["route_id"],
+            train_type_id=row["train__train_type_id"],
+            day=row["day"],
+            journeys=row["journey_count"],
+            capacity=row["seats"] or 0,
+            tickets_sold=row["sold"] or 0,
+        )
+
+
+def _upsert(rows):
+    OccupancyRollup.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["route", "day", "train_type"],
+        update_fields=ROLLUP_FIELDS,
+    )
+
+
+def refresh_rollups(keys):
+    """Recomputes the rows of the given keys from journeys and tickets; keys without journeys are dropped."""
+    keys = sorted({key for key in keys if key is not None})
+    for index in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = set(keys[index:index + KEY_CHUNK_SIZE])
+        rows = [
+            row for row in aggregate_rollups(_journeys_in(chunk))
+            if (row.route_id, row.train_type_id, row.day) in chunk
+        ]
+        _upsert(rows)
+        empty = chunk - {(row.route_id, row.train_type_id, row.day) for row in rows}
+        if empty:
+            _rows_in(empty).delete()
+
+
+def refresh_journey_rollups(journey_ids):
+    refresh_rollups(rollup_keys(journey_ids).values())
+
+
+def _insert_missing(counts):
+    # Start the rows from the tickets without this sale, i.e. the committed ones. A concurrent sale may
+    # insert the same key first; its row wins and both sales are then added by the increments.
+    rows = []
+    for row in aggregate_rollups(_journeys_in(counts)):
+        key = (row.route_id, row.train_type_id, row.day)
+        if key in counts:
+            row.tickets_sold -= counts[key]
+            rows.append(row)
+    OccupancyRollup.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def add_tickets_sold(journey_counts):
+    """Moves the sold counts by journey in place; runs in the caller's transaction, like the search rows."""
+    keys = rollup_keys(journey_counts)
+    counts = {}
+    for journey_id, count in journey_counts.items():
+        if journey_id in keys:
+            counts[keys[journey_id]] = counts.get(keys[journey_id], 0) + count
+
+    missing = {
+        key: count for key, count in counts.items()
+        if count and not _rows_in([key]).update(tickets_sold=F("tickets_sold") + count)
+    }
+    if not missing:
+        return
+    # A journey from before the rollups existed gets its row built from the tickets first
+    _insert_missing(missing)
+    for key, count in missing.items():
+        _rows_in([key]).update(tickets_sold=F("tickets_sold") + count)
+
+
+def rebuild_rollups(start=None, end=None):
+    """Recomputes every row, or the rows of days from start to end inclusive; returns how many were written."""
+    journeys = Journey.objects.all()
+    stale = OccupancyRollup.objects.all()
+    tz = timezone.get_default_timezone()
+    if start is not None:
+        journeys = journeys.filter(departure_time__gte=start_of_day(start, tz))
+        stale = stale.filter(day__gte=start)
+    if end is not None:
+        journeys = journeys.filter(departure_time__lt=start_of_day(end + timedelta(days=1), tz))
+        stale = stale.filter(day__lte=end)
+
+    written = 0
+    with transaction.atomic():
+        stale.delete()
+        batch = []
+        for row in aggregate_rollups(journeys):
+            batch.append(row)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                written += len(OccupancyRollup.objects.bulk_create(batch))
+                batch = []
+        written += len(OccupancyRollup.objects.bulk_create(batch))
+    return written
+
+
+GROUP_FIELDS = {"route": "route_id", "train_type": "train_type_id"}
+
+
+def occupancy_series(start, end, route_ids=None, train_type_ids=None, group_by=()):
+    """Daily totals from the rollup rows, optionally split by route and train type; empty days are omitted."""
+    rows = OccupancyRollup.objects.filter(day__gte=start, day__lte=end)
+    if route_ids:
+        rows = rows.filter(route_id__in=route_ids)
+    if train_type_ids:
+        rows = rows.filter(train_type_id__in=train_type_ids)
+    fields = ["day", *(GROUP_FIELDS[name] for name in group_by)]
+    rows = (
+        rows.values(*fields)
+        .annotate(journey_count=Sum("journeys"), seats=Sum("capacity"), sold=Sum("tickets_sold"))
+        .order_by(*fields)
+    )
+    return [
+        {
+            "day": row["day"],
+            **{name: row[GROUP_FIELDS[name]] for name in group_by},
+            "journeys": row["journey_count"],
+            "capacity": row["seats"],
+            "tickets_sold": row["sold"],
+            "load_factor": round(row["sold"] / row["seats"], 4) if row["seats"] else None,
+        }
+        for row in rows
+    ]
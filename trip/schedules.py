@@ -0,0 +1,144 @@
+import operator
+from datetime import timedelta
+from functools import reduce
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from trip.models import Journey, JourneySchedule
+
+
+def local_date(moment):
+    # Schedules run on days in TIME_ZONE, whatever timezone the request used
+    return timezone.localtime(moment, timezone.get_default_timezone()).date()
+
+
+def active_schedules(start, end, route_ids=None, train_ids=None):
+    """Schedules valid on any day from start to end, with what their virtual journeys show."""
+    schedules = JourneySchedule.objects.filter(
+        Q(valid_until__isnull=True) | Q(valid_until__gte=local_date(start)),
+        valid_from__lte=local_date(end),
+    )
+    if route_ids:
+        schedules = schedules.filter(route_id__in=route_ids)
+    if train_ids:
+        schedules = schedules.filter(train_id__in=train_ids)
+    return schedules.select_related(
+        "route__source", "route__destination", "train__train_type"
+    ).prefetch_related("crew", "train__coaches")
+
+
+def occurrences(schedules, start, end, reverse=False):
+    """
+    (schedule, day, departure) for departures in [start, end) that have no Journey row yet, lazily in
+    the journey list's order (departure time, then -schedule.id), or backwards with reverse.
+    """
+    first, last = local_date(start), local_date(end)
+    booked = set(
+        Journey.objects.filter(schedule__in=schedules, schedule_day__range=(first, last))
+        .values_list("schedule_id", "schedule_day")
+    )
+    step = timedelta(days=-1 if reverse else 1)
+    day = last if reverse else first
+    while first <= day <= last:
+        # A schedule departs on its local day, so the days come out in departure order
+        departures = sorted(
+            (
+                (schedule.departure_on(day), -schedule.id, schedule)
+                for schedule in schedules
+                if schedule.runs_on(day) and (schedule.id, day) not in booked
+            ),
+            key=lambda departure: departure[:2],
+            reverse=reverse,
+        )
+        for departure, _, schedule in departures:
+            if start <= departure < end:
+                yield schedule, day, departure
+        day += step
+
+
+def virtual_row(schedule, day, departure):
+    """A journey that has not been booked yet, keyed like the JourneySearchRow values of the journey list."""
+    route, train = schedule.route, schedule.train
+    return {
+        # A schedule departs once at a given time, so -schedule.id orders virtual rows in the keyset
+        # (departure_time, journey_id) without clashing with stored journeys
+        "journey_id": -schedule.id,
+        "schedule": schedule.id,
+        "date": day,
+        "route_id": route.id,
+        "source_name": route.source.name,
+        "destination_name": route.destination.name,
+        "distance": route.distance,
+        "train_id": train.id,
+        "train_name": train.name,
+        "cargo_num": train.cargo_num,
+        "places_in_cargo": train.places_in_cargo,
+        "train_type_name": train.train_type.name,
+        "departure_time": departure,
+        "arrival_time": departure + schedule.duration,
+        "crew": sorted(member.id for member in schedule.crew.all()),
+        "capacity": train.capacity,
+        "tickets_sold": 0,
+    }
+
+
+def bookable_schedules(occurrences):
+    """Schedules by (schedule_id, day) for the departures that run on that day and have not left yet."""
+    schedules = JourneySchedule.objects.select_related("train").prefetch_related("crew", "train__coaches").in_bulk(
+        {schedule_id for schedule_id, _ in occurrences}
+    )
+    now = timezone.now()
+    return {
+        (schedule_id, day): schedules[schedule_id]
+        for schedule_id, day in occurrences
+        if schedule_id in schedules
+        and schedules[schedule_id].runs_on(day)
+        and schedules[schedule_id].departure_on(day) > now
+    }
+
+
+def booked_journeys(occurrences):
+    """Journey ids by (schedule_id, day) for the departures that already have a Journey row."""
+    if not occurrences:
+        return {}
+    lookup = reduce(operator.or_, (Q(schedule_id=schedule_id, schedule_day=day) for schedule_id, day in occurrences))
+    return {
+        (schedule_id, day): journey_id
+        for journey_id, schedule_id, day in Journey.objects.filter(lookup).values_list(
+            "id", "schedule_id", "schedule_day"
+        )
+    }
+
+
+def materialize(schedule, day):
+    """
+    The Journey for a schedule's departure on day, created if needed. Call it in the transaction that
+    books the first tickets, so a rejected order leaves no journey behind.
+    """
+    departure = schedule.departure_on(day)
+    try:
+        with transaction.atomic():
+            journey = Journey.objects.create(
+                route_id=schedule.route_id,
+                train_id=schedule.train_id,
+                departure_time=departure,
+                arrival_time=departure + schedule.duration,
+                schedule=schedule,
+                schedule_day=day,
+            )
+            journey.crew.set(schedule.crew.all())
+    except IntegrityError:
+        # Booked by someone else meanwhile
+        journey = Journey.objects.get(schedule_id=schedule.id, schedule_day=day)
+    return journey
+
+
+def book_occurrences(occurrences):
+    """Journey ids by (schedule_id, day), storing missing ones; departures no longer bookable are left out."""
+    journey_ids = booked_journeys(occurrences)
+    schedules = bookable_schedules(set(occurrences) - set(journey_ids))
+    for occurrence in sorted(schedules):
+        journey_ids[occurrence] = materialize(schedules[occurrence], occurrence[1]).id
+    return journey_ids
@@ -0,0 +1,70 @@
+from django.db.models import Count, F
+
+from trip.models import Journey, JourneySearchRow
+from trip.rollups import add_tickets_sold
+
+SEARCH_ROW_FIELDS = (
+    "route_id",
+    "source_name",
+    "destination_name",
+    "distance",
+    "train_id",
+    "train_name",
+    "train_type_name",
+    "cargo_num",
+    "places_in_cargo",
+    "layout",
+    "departure_time",
+    "arrival_time",
+    "crew",
+    "capacity",
+    "tickets_sold",
+)
+
+
+def build_search_row(journey):
+    route, train = journey.route, journey.train
+    layout = [[seats, coach_class] for seats, coach_class in train.coach_layout()]
+    return JourneySearchRow(
+        journey=journey,
+        route_id=route.id,
+        source_name=route.source.name,
+        destination_name=route.destination.name,
+        distance=route.distance,
+        train_id=train.id,
+        train_name=train.name,
+        train_type_name=train.train_type.name,
+        cargo_num=train.cargo_num,
+        places_in_cargo=train.places_in_cargo,
+        layout=layout,
+        departure_time=journey.departure_time,
+        arrival_time=journey.arrival_time,
+        crew=sorted(crew.id for crew in journey.crew.all()),
+        capacity=sum(seats for seats, _ in layout),
+        tickets_sold=journey.tickets_sold,
+    )
+
+
+def sync_search_rows(journey_ids):
+    journeys = (
+        Journey.objects.filter(id__in=journey_ids)
+        .select_related("route__source", "route__destination", "train__train_type")
+        .prefetch_related("crew", "train__coaches")
+        .annotate(tickets_sold=Count("ticket"))
+    )
+    rows = [build_search_row(journey) for journey in journeys]
+    JourneySearchRow.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["journey"],
+        update_fields=SEARCH_ROW_FIELDS,
+    )
+
+
+def record_tickets_sold(tickets, delta=1):
+    counts = {}
+    for ticket in tickets:
+        counts[ticket.journey_id] = counts.get(ticket.journey_id, 0) + delta
+    for journey_id, count in counts.items():
+        JourneySearchRow.objects.filter(journey_id=journey_id).update(tickets_sold=F("tickets_sold") + count)
+    add_tickets_sold(counts)
@@ -1,7 +1,17 @@
-from django.db import transaction
+import operator
+from functools import reduce
+
+from django.db import transaction, IntegrityError
+from django.db.models import Q
 from rest_framework import serializers
 
-from trip.models import Crew, Station, TrainType, Train, Ticket, Journey, Route, Order
+from trip.fast_lists import iso_datetime
+from trip.holds import active_holds
+from trip.models import Crew, Station, TrainType, Train, Coach, Ticket, Journey, Route, Order, SeatHold, \
+    JourneySearchRow, OrderRequest, JourneySchedule
+from trip.occupancy import mark_tickets_taken, journey_layout
+from trip.schedules import bookable_schedules, booked_journeys, book_occurrences
+from trip.search import record_tickets_sold
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -16,16 +26,64 @@ class StationSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "latitude", "longitude")
 
 
+class NearbyStationSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    distance_km = serializers.FloatField()
+
+
 class TrainTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainType
         fields = ("id", "name")
 
 
+class CoachSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Coach
+        fields = ("number", "seats", "coach_class")
+
+
 class TrainSerializer(serializers.ModelSerializer):
+    coaches = CoachSerializer(many=True, required=False)
+
     class Meta:
         model = Train
-        fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type")
+        fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type", "coaches")
+
+    def validate(self, attrs):
+        coaches = attrs.get("coaches")
+        if coaches is not None:
+            cargo_num = attrs.get("cargo_num", getattr(self.instance, "cargo_num", 0))
+            numbers = [coach["number"] for coach in coaches]
+            if len(numbers) != len(set(numbers)):
+                raise serializers.ValidationError({"coaches": "each coach number can be listed only once"})
+            if any(not 1 <= number <= cargo_num for number in numbers):
+                raise serializers.ValidationError({"coaches": f"coach numbers must be in range [1, {cargo_num}]"})
+        return attrs
+
+    @staticmethod
+    def _set_coaches(train, coaches):
+        train.coaches.all().delete()
+        for coach in coaches:
+            Coach.objects.create(train=train, **coach)
+
+    def create(self, validated_data):
+        coaches = validated_data.pop("coaches", [])
+        with transaction.atomic():
+            train = Train.objects.create(**validated_data)
+            self._set_coaches(train, coaches)
+        return train
+
+    def update(self, instance, validated_data):
+        coaches = validated_data.pop("coaches", None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if coaches is not None:
+                self._set_coaches(instance, coaches)
+        return instance
 
 
 class TrainListSerializer(serializers.ModelSerializer):
@@ -36,6 +94,16 @@ class TrainListSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type")
 
 
+# Same output as TrainListSerializer, for the .values() fast list path
+TRAIN_LIST_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "cargo_num": "cargo_num",
+    "places_in_cargo": "places_in_cargo",
+    "train_type": "train_type__name",
+}
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
@@ -66,6 +134,23 @@ class JourneySerializer(serializers.ModelSerializer):
         fields = ("id", "route", "train", "departure_time", "arrival_time", "crew")
 
 
+class JourneyScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JourneySchedule
+        fields = (
+            "id", "route", "train", "crew", "departure_time", "duration", "weekdays", "valid_from", "valid_until"
+        )
+
+    def validate(self, attrs):
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get("valid_until", getattr(self.instance, "valid_until", None))
+        if valid_until is not None and valid_from is not None and valid_until < valid_from:
+            raise serializers.ValidationError({"valid_until": "must not be before valid_from"})
+        if attrs.get("duration") is not None and attrs["duration"].total_seconds() <= 0:
+            raise serializers.ValidationError({"duration": "must be positive"})
+        return attrs
+
+
 class JourneyListSerializer(serializers.ModelSerializer):
     route = RouteListSerializer(many=False, read_only=True)
     train = TrainListSerializer(many=False, read_only=True)
@@ -84,36 +169,288 @@ class JourneyDetailSerializer(serializers.ModelSerializer):
         fields = ("id", "route", "train", "departure_time", "arrival_time", "crew")
 
 
+class JourneySearchRouteSerializer(serializers.Serializer):
+    # What RouteListSerializer gives for the journey's route
+    id = serializers.IntegerField(source="route_id")
+    distance = serializers.IntegerField()
+
+
+class JourneySearchTrainSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="train_id")
+    name = serializers.CharField(source="train_name")
+    cargo_num = serializers.IntegerField()
+    places_in_cargo = serializers.IntegerField()
+    train_type = serializers.CharField(source="train_type_name")
+
+
+class JourneySearchRowSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="journey_id", read_only=True)
+    route = JourneySearchRouteSerializer(source="*", read_only=True)
+    train = JourneySearchTrainSerializer(source="*", read_only=True)
+
+    class Meta:
+        model = JourneySearchRow
+        fields = ("id", "route", "train", "departure_time", "arrival_time", "crew")
+
+
+# Same output as JourneySearchRowSerializer, for the .values() fast list path
+JOURNEY_LIST_FIELDS = {
+    "id": "journey_id",
+    "route": {
+        "id": "route_id",
+        "distance": "distance",
+    },
+    "train": {
+        "id": "train_id",
+        "name": "train_name",
+        "cargo_num": "cargo_num",
+        "places_in_cargo": "places_in_cargo",
+        "train_type": "train_type_name",
+    },
+    "departure_time": ("departure_time", iso_datetime),
+    "arrival_time": ("arrival_time", iso_datetime),
+    "crew": "crew",
+}
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    journey = serializers.IntegerField(source="journey_id", required=False)
+    # A journey listed from a schedule but not booked yet is given as its schedule and departure day
+    schedule = serializers.IntegerField(write_only=True, required=False)
+    date = serializers.DateField(write_only=True, required=False)
+
     class Meta:
         model = Ticket
-        fields = ("id", "cargo", "seat", "journey", "order")
+        fields = ("id", "cargo", "seat", "journey", "schedule", "date", "order")
+        read_only_fields = ("id", "order")
+
+    def validate(self, attrs):
+        Ticket.validate_position(attrs["cargo"], attrs["seat"], serializers.ValidationError)
+        schedule, day = attrs.pop("schedule", None), attrs.pop("date", None)
+        if "journey_id" in attrs:
+            if schedule is not None or day is not None:
+                raise serializers.ValidationError("give either a journey or a schedule and date")
+        elif schedule is None or day is None:
+            raise serializers.ValidationError("journey, or schedule and date, is required")
+        else:
+            attrs["occurrence"] = (schedule, day)
+        return attrs
 
 
 class TicketListSerializer(serializers.ModelSerializer):
-    journey_route = serializers.CharField(source="journey.route", read_only=True)
-    order_id = serializers.CharField(source="order.id", read_only=True)
+    journey_route = serializers.CharField(source="route_label", read_only=True)
+    order_id = serializers.CharField(read_only=True)
 
     class Meta:
         model = Ticket
-        fields = ("id", "cargo", "seat", "journey_route", "order_id")
+        fields = ("id", "cargo", "seat", "journey_route", "train_name", "departure_time", "arrival_time", "order_id")
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False, source="ticket")
 
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
+    @staticmethod
+    def _resolve_occurrences(tickets):
+        """
+        Points tickets for an already stored scheduled departure at its journey and returns the layouts of the
+        others by (schedule, day). Those keep their occurrence until create() stores the journey with the tickets.
+        """
+        occurrences = {ticket["occurrence"] for ticket in tickets if "occurrence" in ticket}
+        if not occurrences:
+            return {}
+        schedules = bookable_schedules(occurrences)
+        unknown = sorted(occurrences - set(schedules))
+        if unknown:
+            raise serializers.ValidationError(
+                [f"schedule {schedule_id} has no upcoming journey on {day}" for schedule_id, day in unknown]
+            )
+
+        booked = booked_journeys(occurrences)
+        for ticket in tickets:
+            if ticket.get("occurrence") in booked:
+                ticket["journey_id"] = booked[ticket.pop("occurrence")]
+        return {
+            occurrence: schedule.train.coach_layout()
+            for occurrence, schedule in schedules.items() if occurrence not in booked
+        }
+
+    @staticmethod
+    def _label(target):
+        if isinstance(target, tuple):
+            return f"schedule {target[0]} on {target[1]}"
+        return f"journey {target}"
+
+    def validate_tickets(self, tickets):
+        layouts = self._resolve_occurrences(tickets)
+        journey_ids = {ticket["journey_id"] for ticket in tickets if "journey_id" in ticket}
+        layouts.update(
+            (journey.id, journey_layout(journey))
+            for journey in Journey.objects.filter(id__in=journey_ids).select_related("train", "search_row")
+        )
+        missing = journey_ids - set(layouts)
+        if missing:
+            raise serializers.ValidationError(
+                [f"journey {journey_id} does not exist" for journey_id in sorted(missing)]
+            )
+
+        seen = set()
+        errors = []
+        for ticket in tickets:
+            target = ticket.get("journey_id", ticket.get("occurrence"))
+            key = (target, ticket["cargo"], ticket["seat"])
+            try:
+                Ticket.validate_position(ticket["cargo"], ticket["seat"], serializers.ValidationError, layouts[target])
+            except serializers.ValidationError as error:
+                errors.extend(f"{message} ({self._label(target)})" for message in error.detail)
+            if key in seen:
+                errors.append(
+                    f"seat {key[2]} in cargo {key[1]} on {self._label(target)} is requested more than once"
+                )
+            seen.add(key)
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return tickets
+
+    @staticmethod
+    def _book_occurrences(tickets_data):
+        # In create()'s transaction, so the journey is only kept if its tickets are
+        occurrences = {ticket["occurrence"] for ticket in tickets_data if "occurrence" in ticket}
+        if not occurrences:
+            return
+        journey_ids = book_occurrences(occurrences)
+        unknown = sorted(occurrences - set(journey_ids))
+        if unknown:
+            raise serializers.ValidationError({"tickets": [
+                f"schedule {schedule_id} has no upcoming journey on {day}" for schedule_id, day in unknown
+            ]})
+        for ticket in tickets_data:
+            if "occurrence" in ticket:
+                ticket["journey_id"] = journey_ids[ticket.pop("occurrence")]
+
+    @staticmethod
+    def _seats_lookup(tickets):
+        return reduce(
+            operator.or_,
+            (Q(journey_id=ticket["journey_id"], cargo=ticket["cargo"], seat=ticket["seat"]) for ticket in tickets),
+        )
+
     def create(self, validated_data):
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
+            tickets_data = validated_data.pop("ticket")
+            user_id = validated_data["user_id"]
+            self._book_occurrences(tickets_data)
+            lookup = self._seats_lookup(tickets_data)
+
+            # Lock journeys in id order, the same rows seat holds lock on
+            list(
+                Journey.objects.select_for_update()
+                .filter(id__in={ticket["journey_id"] for ticket in tickets_data})
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+            taken = set(Ticket.objects.filter(lookup).values_list("journey_id", "cargo", "seat"))
+            taken.update(
+                active_holds().filter(lookup).exclude(user_id=user_id).values_list("journey_id", "cargo", "seat")
+            )
+            if taken:
+                raise serializers.ValidationError({
+                    "tickets": [
+                        f"{seat} is already taken please select another (journey {journey_id}, cargo {cargo})"
+                        for journey_id, cargo, seat in sorted(taken)
+                    ]
+                })
+
+            journeys = Journey.objects.select_related(
+                "route__source", "route__destination", "train"
+            ).in_bulk({ticket["journey_id"] for ticket in tickets_data})
             order = Order.objects.create(**validated_data)
-            for ticket in tickets_data:
-                Ticket.objects.create(order=order, **ticket)
+            tickets = [Ticket(order=order, **ticket) for ticket in tickets_data]
+            for ticket in tickets:
+                ticket.fill_snapshot(journeys[ticket.journey_id])
+            try:
+                tickets = Ticket.objects.bulk_create(tickets)
+            except IntegrityError:
+                raise serializers.ValidationError(
+                    {"tickets": ["some of the selected seats were just taken, please try again"]}
+                )
+
+            SeatHold.objects.filter(lookup, user_id=user_id).delete()
+            record_tickets_sold(tickets)
+            transaction.on_commit(lambda: mark_tickets_taken(tickets))
             return order
 
 
 class OrderListSerializer(OrderSerializer):
-    tickets = TicketListSerializer(many=True, read_only=True)
+    tickets = TicketListSerializer(many=True, read_only=True, source="ticket")
+
+
+class OrderRequestSerializer(serializers.ModelSerializer):
+    order = OrderListSerializer(read_only=True)
+
+    class Meta:
+        model = OrderRequest
+        fields = ("token", "status", "order", "errors", "created_at", "processed_at")
+
+
+class CargoSeatsSerializer(serializers.Serializer):
+    cargo = serializers.IntegerField(read_only=True)
+    coach_class = serializers.CharField(read_only=True)
+    free = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    taken = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+
+class JourneySeatsSerializer(serializers.Serializer):
+    journey = serializers.IntegerField(read_only=True)
+    cargo_num = serializers.IntegerField(read_only=True)
+    places_in_cargo = serializers.IntegerField(read_only=True)
+    capacity = serializers.IntegerField(read_only=True)
+    free_count = serializers.IntegerField(read_only=True)
+    cargos = CargoSeatsSerializer(many=True, read_only=True)
+
+
+class SeatSerializer(serializers.Serializer):
+    cargo = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+    def validate(self, attrs):
+        Ticket.validate_position(attrs["cargo"], attrs["seat"], serializers.ValidationError)
+        return attrs
+
+
+class SeatHoldRequestSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+
+    def validate_seats(self, seats):
+        numbers = [(seat["cargo"], seat["seat"]) for seat in seats]
+        if len(numbers) != len(set(numbers)):
+            raise serializers.ValidationError("each seat can be held only once")
+        return seats
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "journey", "cargo", "seat", "expires_at")
+
+
+class ItineraryLegSerializer(serializers.Serializer):
+    journey = serializers.IntegerField(source="journey_id")
+    route = serializers.IntegerField(source="route_id")
+    source = serializers.CharField(source="source_name")
+    destination = serializers.CharField(source="destination_name")
+    train = serializers.CharField(source="train_name")
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    legs = ItineraryLegSerializer(many=True)
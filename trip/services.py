@@ -1,2 +1,56 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+TIME_FORMATS = ("%Y-%m-%d %H:%M",)
+
+
 def params_to_ints(qs):
     return [int(str_id) for str_id in qs.split(",")]
+
+
+def request_timezone(request):
+    name = request.query_params.get("tz")
+    if not name:
+        return timezone.get_current_timezone()
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError({"tz": f"unknown timezone {name}"})
+
+
+def start_of_day(day, tz):
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+def parse_time_param(name, value, tz):
+    """Parse ``YYYY-MM-DD``, ``YYYY-MM-DD HH:MM`` or ISO 8601 into an aware datetime."""
+    parsed = None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            for time_format in TIME_FORMATS:
+                try:
+                    parsed = datetime.strptime(value, time_format)
+                    break
+                except ValueError:
+                    continue
+        if parsed is None:
+            day = parse_date(value)
+            parsed = start_of_day(day, tz) if day else None
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        raise ValidationError({name: f"invalid date or time {value}"})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, tz)
+    return parsed
+
+
+def day_range(moment, tz):
+    start = start_of_day(timezone.localtime(moment, tz).date(), tz)
+    return start, start_of_day(start.date() + timedelta(days=1), tz)
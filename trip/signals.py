@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from trip.models import Ticket, Journey, Route, Station, Train, TrainType, Crew, Coach
+from trip.geo import invalidate_station_index
+from trip.planner import record_timetable_change
+from trip.occupancy import invalidate_seat_map, mark_seats_taken
+from trip.response_cache import bump_model_version
+from trip.rollups import rollup_keys, refresh_rollups, refresh_journey_rollups
+from trip.search import sync_search_rows, record_tickets_sold
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    if created:
+        record_tickets_sold([instance])
+        seats = [(instance.cargo, instance.seat)]
+        transaction.on_commit(lambda: mark_seats_taken(instance.journey_id, seats))
+    else:
+        transaction.on_commit(lambda: invalidate_seat_map(instance.journey_id))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    record_tickets_sold([instance], delta=-1)
+    transaction.on_commit(lambda: invalidate_seat_map(instance.journey_id))
+
+
+@receiver(pre_save, sender=Journey)
+def journey_saving(sender, instance, **kwargs):
+    # A journey moved to another day, route or train leaves its old rollup row to recompute
+    if not instance._state.adding:
+        instance._previous_rollup_keys = list(rollup_keys([instance.id]).values())
+
+
+@receiver(post_save, sender=Journey)
+def journey_saved(sender, instance, **kwargs):
+    sync_search_rows([instance.id])
+    refresh_rollups([*getattr(instance, "_previous_rollup_keys", ()), *rollup_keys([instance.id]).values()])
+    transaction.on_commit(lambda: record_timetable_change([instance.id]))
+
+
+@receiver(pre_delete, sender=Journey)
+def journey_deleting(sender, instance, **kwargs):
+    instance._previous_rollup_keys = list(rollup_keys([instance.id]).values())
+
+
+@receiver(post_delete, sender=Journey)
+def journey_deleted(sender, instance, **kwargs):
+    refresh_rollups(instance._previous_rollup_keys)
+    transaction.on_commit(lambda: record_timetable_change([instance.id]))
+
+
+@receiver(m2m_changed, sender=Journey.crew.through)
+def journey_crew_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            sync_search_rows([instance.id])
+    elif action == "pre_clear":
+        instance._cleared_journey_ids = list(instance.journey.values_list("id", flat=True))
+    elif action == "post_clear":
+        sync_search_rows(instance._cleared_journey_ids)
+    elif action in ("post_add", "post_remove"):
+        sync_search_rows(pk_set)
+
+
+@receiver(pre_delete, sender=Crew)
+def crew_deleting(sender, instance, **kwargs):
+    instance._deleted_journey_ids = list(instance.journey.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Crew)
+def crew_deleted(sender, instance, **kwargs):
+    sync_search_rows(instance._deleted_journey_ids)
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance, created, **kwargs):
+    if not created:
+        journey_ids = list(instance.journey.values_list("id", flat=True))
+        sync_search_rows(journey_ids)
+        transaction.on_commit(lambda: record_timetable_change(journey_ids))
+
+
+@receiver(post_save, sender=Station)
+def station_saved(sender, instance, created, **kwargs):
+    transaction.on_commit(invalidate_station_index)
+    if not created:
+        sync_search_rows(
+            Journey.objects.filter(Q(route__source=instance) | Q(route__destination=instance)).values("id")
+        )
+
+
+@receiver(post_delete, sender=Station)
+def station_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_station_index)
+
+
+@receiver(pre_save, sender=Train)
+def train_saving(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._previous_rollup_keys = list(rollup_keys(instance.journey.values("id")).values())
+
+
+@receiver(post_save, sender=Train)
+def train_saved(sender, instance, created, **kwargs):
+    if not created:
+        sync_search_rows(instance.journey.values("id"))
+        # The train type and the seat count both feed the rollups
+        refresh_rollups([*instance._previous_rollup_keys, *rollup_keys(instance.journey.values("id")).values()])
+
+
+@receiver(post_save, sender=Coach)
+@receiver(post_delete, sender=Coach)
+def coach_changed(sender, instance, **kwargs):
+    sync_search_rows(Journey.objects.filter(train_id=instance.train_id).values("id"))
+    refresh_journey_rollups(Journey.objects.filter(train_id=instance.train_id).values("id"))
+    bump_model_version(Train)
+    transaction.on_commit(lambda: bump_model_version(Train))
+
+
+@receiver(post_save, sender=TrainType)
+def train_type_saved(sender, instance, created, **kwargs):
+    if not created:
+        sync_search_rows(Journey.objects.filter(train__train_type=instance).values("id"))
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+@receiver(post_save, sender=TrainType)
+@receiver(post_delete, sender=TrainType)
+@receiver(post_save, sender=Train)
+@receiver(post_delete, sender=Train)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+def reference_data_changed(sender, **kwargs):
+    # Bump again after commit so responses cached from the old rows meanwhile are dropped too
+    bump_model_version(sender)
+    transaction.on_commit(lambda: bump_model_version(sender))
@@ -0,0 +1,97 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import path, include, reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from trip.async_views import async_read_urls
+from trip.metrics import registry
+from trip.models import Journey
+from trip.serializers import JourneyListSerializer, JourneyDetailSerializer
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey, sample_crew
+from trip.urls import router
+
+urlpatterns = [
+    path("api/trip/", include((async_read_urls(router.urls), "trip"))),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        cls.admin = sample_user(username="admin", email="admin@gmail.com", password="12345678", is_staff=True)
+        journey = sample_journey(route=sample_route(), train=sample_train())
+        journey.crew.add(sample_crew())
+        sample_route(distance=101)
+        cls.journey = Journey.objects.get(pk=journey.pk)
+        cls.list_data = JourneyListSerializer(cls.journey).data
+        cls.detail_data = JourneyDetailSerializer(cls.journey).data
+
+    def auth(self, user=None):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user or self.user)}"}
+
+    async def test_journey_list_and_detail(self):
+        res = await self.async_client.get(reverse("trip:journey-list"), headers=self.auth())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)["results"], json.loads(json.dumps([self.list_data], default=str)))
+
+        res = await self.async_client.get(reverse("trip:journey-detail", args=[self.journey.id]), headers=self.auth())
+        self.assertEqual(json.loads(res.content)["id"], self.detail_data["id"])
+        self.assertEqual(json.loads(res.content)["crew"], self.detail_data["crew"])
+
+        res = await self.async_client.get(reverse("trip:journey-detail", args=[0]), headers=self.auth())
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_requires_authentication(self):
+        res = await self.async_client.get(reverse("trip:journey-list"))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.async_client.get(reverse("trip:journey-list"), headers={"Authorization": "Bearer bad"})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_route_list_pagination(self):
+        url = reverse("trip:routes-list")
+        res = await self.async_client.get(url, {"page_size": 1}, headers=self.auth())
+        body = json.loads(res.content)
+        self.assertEqual(body["count"], 2)
+        self.assertEqual(len(body["results"]), 1)
+        self.assertIsNotNone(body["next"])
+
+        res = await self.async_client.get(url, {"pagination": "cursor", "page_size": 1}, headers=self.auth())
+        first = json.loads(res.content)
+        res = await self.async_client.get(first["next"], headers=self.auth())
+        second = json.loads(res.content)
+        self.assertNotEqual(first["results"][0]["id"], second["results"][0]["id"])
+        self.assertIsNone(second["next"])
+
+    async def test_station_list_etag(self):
+        url = reverse("trip:station-list")
+        res = await self.async_client.get(url, headers=self.auth())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = await self.async_client.get(url, headers={**self.auth(), "If-None-Match": res["ETag"]})
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_writes_fall_through_to_sync_view(self):
+        res = await self.async_client.post(
+            reverse("trip:station-list"),
+            {"name": "Async", "latitude": 1, "longitude": 2},
+            content_type="application/json",
+            headers=self.auth(self.admin),
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = await self.async_client.get(reverse("trip:station-list"), headers=self.auth())
+        self.assertIn("Async", [station["name"] for station in json.loads(res.content)["results"]])
+
+    async def test_metrics_count_queries_in_worker_threads(self):
+        registry.reset()
+        await self.async_client.get(reverse("trip:journey-list"), headers=self.auth())
+
+        series = registry.series[("JourneyViewSet", "list", "GET", 200)]
+        self.assertEqual(series["count"], 1)
+        # Count and page; the user state may already be cached by ClaimsJWTAuthentication
+        self.assertGreaterEqual(series["queries"], 2)
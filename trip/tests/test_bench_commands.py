@@ -0,0 +1,63 @@
+import json
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from trip.models import Station, Journey, JourneySearchRow, Ticket
+
+
+class BenchCommandTests(TestCase):
+    def _seed(self, seed, **options):
+        call_command(
+            "seed_trip_data", stations=10, routes=15, trains=4, crew=6, journeys=30, orders=20,
+            users=2, seed=seed, stdout=StringIO(), **options,
+        )
+
+    def test_seed_is_deterministic(self):
+        self._seed(1)
+        first = list(Station.objects.order_by("id").values_list("name", "latitude", "longitude"))
+        first_departures = list(Journey.objects.order_by("id").values_list("departure_time", flat=True))
+        Station.objects.all().delete()
+        self._seed(1)
+        second = list(Station.objects.order_by("id").values_list("name", "latitude", "longitude"))
+        second_departures = list(Journey.objects.order_by("id").values_list("departure_time", flat=True))
+
+        self.assertEqual(first, second)
+        self.assertEqual(first_departures, second_departures)
+        self.assertEqual(JourneySearchRow.objects.count(), Journey.objects.count())
+        self.assertTrue(Ticket.objects.exists())
+
+    def test_seed_start_day(self):
+        self._seed(1, start=date(2031, 3, 1))
+
+        first = Journey.objects.order_by("departure_time").first().departure_time
+        self.assertGreaterEqual(first.date(), date(2031, 3, 1))
+        self.assertLess(first.date(), date(2031, 3, 4))
+
+    @override_settings(ALLOWED_HOSTS=[])
+    def test_bench_reports_every_endpoint(self):
+        self._seed(2)
+        out = StringIO()
+
+        call_command("bench_trip_api", iterations=3, warmup=0, stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertIn("journey-list", report["endpoints"])
+        self.assertIn("order-list", report["endpoints"])
+        for name, result in report["endpoints"].items():
+            self.assertEqual(result["status"], 200, name)
+            self.assertGreaterEqual(result["p99_ms"], result["p50_ms"])
+
+    def test_bench_fails_on_error_responses(self):
+        self._seed(3)
+        endpoints = [("journey-missing", reverse("trip:journey-detail", args=[0]), {})]
+        out = StringIO()
+
+        with mock.patch("trip.management.commands.bench_trip_api.Command.endpoints", return_value=endpoints):
+            with self.assertRaisesMessage(CommandError, "journey-missing (404)"):
+                call_command("bench_trip_api", iterations=2, warmup=0, stdout=out)
+        self.assertEqual(out.getvalue(), "")
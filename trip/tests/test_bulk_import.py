@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.bulk_import import read_records, run_import
+from trip.models import Station, Route, Train, Journey, JourneySearchRow
+from trip.tests.test_trip_api import sample_user, sample_station, sample_train, sample_crew, sample_train_type
+
+
+def import_url(kind):
+    return reverse("trip:bulk-import", args=[kind])
+
+
+def jsonl(*records):
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+class BulkImportTests(TestCase):
+    def test_command_imports_csv_and_reports_bad_rows(self):
+        content = "name,latitude,longitude\nKyiv,50.45,30.52\nLviv,not a number,24.03\nOdesa,46.48,30.72\n"
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command("import_trip_data", "station", file.name, "--chunk-size", "1", stdout=out, stderr=err)
+
+        self.assertEqual(sorted(Station.objects.values_list("name", flat=True)), ["Kyiv", "Odesa"])
+        self.assertIn("line 3", err.getvalue())
+        self.assertIn("latitude", err.getvalue())
+        self.assertIn("Imported 2 of 3 station rows, 1 rows with errors", out.getvalue())
+
+    def test_routes_and_trains_resolve_names(self):
+        sample_station(name="Kyiv", latitude=50.45, longitude=30.52)
+        sample_station(name="Lviv", latitude=49.84, longitude=24.03)
+        sample_station(name="Lviv", latitude=49.80, longitude=24.00)
+        sample_train_type(name="Intercity")
+
+        report = run_import("route", read_records(io.StringIO(jsonl(
+            {"source": "Kyiv", "destination": "Lviv", "distance": 540},
+            {"source": "Kyiv", "destination": "Odesa", "distance": 470},
+        )), "jsonl"))
+        self.assertEqual(report.created, 0)
+        self.assertIn("not unique", report.errors[0]["errors"]["destination"][0])
+        self.assertIn("Unknown station", report.errors[1]["errors"]["destination"][0])
+
+        report = run_import("train", read_records(io.StringIO(
+            "name,cargo_num,places_in_cargo,train_type\nHyundai,9,56,Intercity\nTarpan,4,60,Regional\n"
+        ), "csv"))
+        self.assertEqual(report.created, 1)
+        self.assertEqual(Train.objects.get(name="Hyundai").train_type.name, "Intercity")
+        self.assertEqual(report.errors, [{"line": 3, "errors": {"train_type": ["Unknown train type Regional."]}}])
+
+
+class BulkImportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = sample_user(username="admin", email="admin@gmail.com", password="12345678", is_staff=True)
+        self.client.force_authenticate(self.admin)
+        source = sample_station(name="Kyiv", latitude=50.45, longitude=30.52)
+        destination = sample_station(name="Lviv", latitude=49.84, longitude=24.03)
+        self.route = Route.objects.create(source=source, destination=destination, distance=540)
+        self.train = sample_train(name="Hyundai")
+        self.crew = [sample_crew(), sample_crew(first_name="Second")]
+
+    def upload(self, content, name="journeys.jsonl", **params):
+        return self.client.post(
+            import_url("journey") + ("?" + "&".join(f"{k}={v}" for k, v in params.items()) if params else ""),
+            {"file": SimpleUploadedFile(name, content.encode())},
+            format="multipart",
+        )
+
+    def test_imports_journeys_with_crew(self):
+        crew_ids = [member.id for member in self.crew]
+        res = self.upload(jsonl(
+            {"source": "Kyiv", "destination": "Lviv", "train": "Hyundai",
+             "departure_time": "2030-05-01T08:00:00Z", "arrival_time": "2030-05-01T15:00:00Z", "crew": crew_ids},
+            {"route": self.route.id, "train": "Hyundai",
+             "departure_time": "2030-05-02T08:00:00Z", "arrival_time": "2030-05-02T15:00:00Z"},
+            {"route": self.route.id, "train": "Tarpan",
+             "departure_time": "2030-05-03T08:00:00Z", "arrival_time": "2030-05-03T15:00:00Z", "crew": [0]},
+        ) + "not json\n")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["error_count"], 2)
+        self.assertEqual(set(res.data["errors"][0]["errors"]), {"train", "crew"})
+        self.assertEqual(res.data["errors"][1]["line"], 4)
+
+        journey = Journey.objects.get(departure_time__day=1)
+        self.assertEqual(sorted(journey.crew.values_list("id", flat=True)), crew_ids)
+        self.assertEqual(JourneySearchRow.objects.get(journey=journey).crew, crew_ids)
+        self.assertEqual(JourneySearchRow.objects.count(), 2)
+
+    def test_dry_run_and_csv_crew(self):
+        content = (
+            "route,train,departure_time,arrival_time,crew\n"
+            f"{self.route.id},Hyundai,2030-05-01 08:00,2030-05-01 15:00,{self.crew[0].id};{self.crew[1].id}\n"
+        )
+        res = self.upload(content, name="journeys.csv", dry_run="1")
+        self.assertEqual((res.data["valid"], res.data["created"]), (1, 0))
+        self.assertFalse(Journey.objects.exists())
+
+        res = self.upload(content, name="journeys.txt", input_format="csv")
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(Journey.objects.get().crew.count(), 2)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.upload("", name="journeys.txt").status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(import_url("order"), {"file": SimpleUploadedFile("a.csv", b"")}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(sample_user(username="test1", email="test1@gmail.com", password="12345678"))
+        self.assertEqual(self.upload(jsonl({})).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from train_service.db_router import ReplicaRouter, ReplicaRoutingMiddleware, STICKY_KEY, stick_to_primary
+from trip.models import Journey
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+
+def read_alias(request, user=None):
+    router = ReplicaRouter()
+    if user is not None:
+        request.user = user
+    return ReplicaRoutingMiddleware(lambda req: router.db_for_read(Journey))(request)
+
+
+@override_settings(REPLICA_DATABASES=["replica_0"], REPLICA_STICKY_SECONDS=30)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = get_user_model()(id=1, username="test1")
+
+    def test_safe_methods_read_from_replica(self):
+        self.assertEqual(read_alias(self.factory.get("/"), AnonymousUser()), "replica_0")
+        self.assertEqual(read_alias(self.factory.post("/"), self.user), "default")
+
+    def test_outside_requests_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Journey), "default")
+        self.assertEqual(ReplicaRouter().db_for_write(Journey), "default")
+
+    def test_sticks_to_primary_after_write(self):
+        self.assertEqual(read_alias(self.factory.get("/"), self.user), "replica_0")
+
+        stick_to_primary(self.user.id)
+
+        self.assertEqual(read_alias(self.factory.get("/"), self.user), "default")
+        self.assertEqual(read_alias(self.factory.get("/"), AnonymousUser()), "replica_0")
+
+
+@override_settings(REPLICA_DATABASES=["replica_0"], REPLICA_STICKY_SECONDS=30)
+class PrimaryRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+
+    def test_open_transaction_reads_from_primary(self):
+        with transaction.atomic():
+            self.assertEqual(read_alias(RequestFactory().get("/"), AnonymousUser()), "default")
+
+    def test_order_creation_sets_stickiness(self):
+        journey = sample_journey(route=sample_route(), train=sample_train())
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        client.post(
+            reverse("trip:order-list"),
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": journey.id}]},
+            format="json",
+        )
+
+        self.assertTrue(cache.get(STICKY_KEY.format(user_id=self.user.id)))
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Order, Ticket
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+EXPORT_URL = reverse("trip:order-export")
+
+
+def sample_order(user, journey, created_at, seats):
+    order = Order.objects.create(user=user)
+    Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    for seat in seats:
+        Ticket.objects.create(order=order, journey=journey, cargo=1, seat=seat)
+    return order
+
+
+class TicketExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.other = sample_user(username="test2", email="test2@gmail.com", password="12345678")
+        self.admin = sample_user(username="admin", email="admin@gmail.com", password="12345678", is_staff=True)
+        journey = sample_journey(route=sample_route(), train=sample_train())
+        self.first = sample_order(self.user, journey, datetime(2030, 1, 10, tzinfo=timezone.utc), [1, 2])
+        self.second = sample_order(self.user, journey, datetime(2030, 2, 10, tzinfo=timezone.utc), [3])
+        self.third = sample_order(self.other, journey, datetime(2030, 2, 11, tzinfo=timezone.utc), [4])
+
+    def export(self, as_user, **params):
+        self.client.force_authenticate(as_user)
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b"".join(res.streaming_content).decode()
+
+    def test_ndjson_export_of_own_tickets(self):
+        rows = [json.loads(line) for line in self.export(self.user).splitlines()]
+
+        self.assertEqual([row["seat"] for row in rows], [1, 2, 3])
+        self.assertEqual({row["user_id"] for row in rows}, {self.user.id})
+        self.assertEqual(rows[0]["order_id"], self.first.id)
+        self.assertEqual(rows[0]["order_created_at"], "2030-01-10T00:00:00Z")
+        self.assertEqual(rows[0]["source"], "Test Station 1")
+
+    def test_staff_csv_export_with_filters(self):
+        content = self.export(self.admin, output="csv", created_after="2030-02-01")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row["seat"] for row in rows], ["3", "4"])
+
+        content = self.export(self.admin, output="csv", user=str(self.other.id), created_before="2030-02-12")
+        self.assertEqual([row["order_id"] for row in csv.DictReader(io.StringIO(content))], [str(self.third.id)])
+
+        # Other users' ids are ignored for non-staff
+        rows = self.export(self.user, user=str(self.other.id), created_before="2030-02-01").splitlines()
+        self.assertEqual(len(rows), 2)
+
+    def test_rejects_invalid_params(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(EXPORT_URL, {"output": "xml"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get(EXPORT_URL, {"created_after": "soon"}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(EXPORT_URL).status_code, status.HTTP_401_UNAUTHORIZED)
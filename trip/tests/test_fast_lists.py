@@ -0,0 +1,119 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from trip.models import Journey, Train
+from trip.parsers import ORJSONParser
+from trip.renderers import ORJSONRenderer
+from trip.serializers import JourneyListSerializer, TrainListSerializer
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey, sample_crew
+
+TRIP_URL = reverse("trip:journey-list")
+TRAIN_URL = reverse("trip:trains-list")
+
+
+class FastListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(sample_user(username="test1", email="test1@gmail.com", password="12345678"))
+        self.route = route = sample_route()
+        self.crew = crew = sample_crew()
+        start = datetime(2030, 5, 1, 8, 30, 15, 123456, tzinfo=timezone.utc)
+        for i in range(5):
+            train = sample_train(name=f"Train «{i}»", places_in_cargo=10 + i)
+            journey = sample_journey(
+                route=route, train=train,
+                departure_time=start + timedelta(hours=i),
+                arrival_time=start + timedelta(hours=i, minutes=95),
+            )
+            journey.crew.add(crew)
+
+    def assert_same_bytes(self, url, params, serializer_class, queryset):
+        cache.clear()
+        with override_settings(FAST_LIST_RESPONSES=False):
+            expected = self.client.get(url, params)
+        cache.clear()
+        with override_settings(FAST_LIST_RESPONSES=True):
+            actual = self.client.get(url, params)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+
+        # Both match what the original list serializer and JSONRenderer give for the page's rows
+        body = json.loads(actual.content)
+        objects = queryset.in_bulk([row["id"] for row in body["results"]])
+        results = serializer_class([objects[row["id"]] for row in body["results"]], many=True).data
+        self.assertEqual(actual.content, JSONRenderer().render({**body, "results": results}))
+        return body
+
+    def assert_journeys_match(self, url, params):
+        return self.assert_same_bytes(
+            url, params, JourneyListSerializer, Journey.objects.prefetch_related("route", "train", "crew")
+        )
+
+    def assert_trains_match(self, url, params):
+        return self.assert_same_bytes(url, params, TrainListSerializer, Train.objects.select_related("train_type"))
+
+    def test_journey_list_matches_serializer(self):
+        body = self.assert_journeys_match(TRIP_URL, {"page_size": 2})
+        self.assertEqual(len(body["results"]), 2)
+        # The payload the journey list had before the search table
+        journey = Journey.objects.select_related("train").order_by("id").first()
+        self.assertEqual(body["results"][0], {
+            "id": journey.id,
+            "route": {"id": self.route.id, "distance": self.route.distance},
+            "train": {
+                "id": journey.train.id,
+                "name": "Train «0»",
+                "cargo_num": journey.train.cargo_num,
+                "places_in_cargo": 10,
+                "train_type": journey.train.train_type.name,
+            },
+            "departure_time": "2030-05-01T08:30:15.123456Z",
+            "arrival_time": "2030-05-01T10:05:15.123456Z",
+            "crew": [self.crew.id],
+        })
+        self.assert_journeys_match(TRIP_URL, {"page": 3, "page_size": 2})
+
+    def test_journey_cursor_pages_match_serializer(self):
+        body = self.assert_journeys_match(TRIP_URL, {"pagination": "cursor", "page_size": 2})
+        self.assertIsNotNone(body["next"])
+        self.assert_journeys_match(body["next"], {})
+
+    def test_train_list_matches_serializer(self):
+        self.assert_trains_match(TRAIN_URL, {})
+        self.assert_trains_match(TRAIN_URL, {"pagination": "cursor", "page_size": 2})
+
+    def test_fast_lists_are_opt_in(self):
+        self.assertFalse(settings.FAST_LIST_RESPONSES)
+        self.assertEqual(api_settings.DEFAULT_RENDERER_CLASSES[0], JSONRenderer)
+
+
+class ORJSONTests(TestCase):
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            "text": "line break  «quoted» \"x\"",
+            "floats": [0.1, 1e-05, 0.00001234, 1e16, 123456789.125, -0.0],
+            "ints": [0, -1, 2 ** 63, -(2 ** 70)],
+            "nested": {"empty": [], "none": None, "bool": True},
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_renderer_falls_back_for_indent(self):
+        data = {"a": [1, 2]}
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_parser_matches_json_parser(self):
+        body = '{"tickets": [{"cargo": 1, "seat": 2, "journey": 3}], "note": "«ok»"}'.encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
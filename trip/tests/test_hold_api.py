@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import SeatHold, Ticket
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+ORDER_URL = reverse("trip:order-list")
+
+
+def hold_url(journey_id):
+    return reverse("trip:journey-hold", args=[journey_id])
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.other = sample_user(username="test2", email="test2@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(route=sample_route(), train=sample_train())
+
+    def _hold(self, seats, user=None):
+        self.client.force_authenticate(user or self.user)
+        return self.client.post(
+            hold_url(self.journey.id),
+            {"seats": [{"cargo": 1, "seat": seat} for seat in seats]},
+            format="json",
+        )
+
+    def _order(self, seats, user=None):
+        self.client.force_authenticate(user or self.user)
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": seat, "journey": self.journey.id} for seat in seats]},
+            format="json",
+        )
+
+    def test_hold_seats(self):
+        res = self._hold([1, 2])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual([hold["seat"] for hold in res.data], [1, 2])
+        self.assertEqual(SeatHold.objects.filter(user=self.user).count(), 2)
+
+    def test_held_seat_rejected_for_other_user(self):
+        self._hold([1, 2])
+
+        self.assertEqual(self._hold([2, 3], user=self.other).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self._order([2], user=self.other).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_consumes_own_hold(self):
+        self._hold([1, 2])
+
+        res = self._order([1, 2])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(self._hold([1]).status_code, status.HTTP_409_CONFLICT)
+
+    def test_expired_holds_are_released(self):
+        self._hold([1])
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self._hold([1], user=self.other).status_code, status.HTTP_201_CREATED)
+
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("release_expired_holds", stdout=StringIO())
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_release_holds(self):
+        self._hold([1, 2])
+
+        res = self.client.delete(hold_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
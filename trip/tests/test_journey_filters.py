@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+TRIP_URL = reverse("trip:journey-list")
+UTC = ZoneInfo("UTC")
+
+
+class JourneyTimeRangeFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        route, train = sample_route(), sample_train()
+        self.journeys = [
+            sample_journey(
+                route=route,
+                train=train,
+                departure_time=datetime(2024, 10, 1, hour, tzinfo=UTC),
+                arrival_time=datetime(2024, 10, 1, hour, tzinfo=UTC) + timedelta(hours=3),
+            )
+            for hour in (1, 12, 22)
+        ]
+
+    def _ids(self, params):
+        res = self.client.get(TRIP_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [row["id"] for row in res.data["results"]]
+
+    def test_departure_range(self):
+        ids = self._ids({"departure_after": "2024-10-01 06:00", "departure_before": "2024-10-01 22:00"})
+
+        self.assertEqual(ids, [self.journeys[1].id])
+
+    def test_arrival_range_by_date(self):
+        ids = self._ids({"arrival_after": "2024-10-02"})
+
+        self.assertEqual(ids, [self.journeys[2].id])
+
+    def test_departure_day_in_request_timezone(self):
+        # 22:00 UTC on Oct 1 is already Oct 2 in Kyiv
+        ids = self._ids({"departure_time": "2024-10-02", "tz": "Europe/Kyiv"})
+
+        self.assertEqual(ids, [self.journeys[2].id])
+
+    def test_invalid_values_rejected(self):
+        self.assertEqual(
+            self.client.get(TRIP_URL, {"departure_after": "soon"}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.client.get(TRIP_URL, {"tz": "Mars/Base"}).status_code, status.HTTP_400_BAD_REQUEST
+        )
@@ -0,0 +1,58 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from trip.models import JourneySearchRow, Order, Ticket
+from trip.serializers import JourneyListSerializer
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey, sample_crew
+
+TRIP_URL = reverse("trip:journey-list")
+
+
+class JourneySearchRowTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.route = sample_route()
+        self.train = sample_train(cargo_num=1, places_in_cargo=2)
+        self.journey = sample_journey(route=self.route, train=self.train)
+        self.journey.crew.add(sample_crew())
+
+    def test_row_follows_related_changes(self):
+        self.route.source.name = "Renamed"
+        self.route.source.save()
+        self.train.train_type.name = "Night"
+        self.train.train_type.save()
+        self.journey.crew.add(sample_crew(first_name="Second"))
+
+        res = self.client.get(TRIP_URL)
+
+        self.assertEqual(res.data["results"], [JourneyListSerializer(self.journey).data])
+        self.assertEqual(JourneySearchRow.objects.get().source_name, "Renamed")
+        self.assertEqual(res.data["results"][0]["train"]["train_type"], "Night")
+
+    def test_ticket_counts(self):
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(journey=self.journey, order=order, cargo=1, seat=1)
+        self.assertEqual(JourneySearchRow.objects.get().tickets_sold, 1)
+
+        Ticket.objects.create(journey=self.journey, order=order, cargo=1, seat=2)
+        self.assertEqual(self.client.get(TRIP_URL, {"min_free_seats": 1}).data["results"], [])
+
+        ticket.delete()
+        self.assertEqual(JourneySearchRow.objects.get().tickets_sold, 1)
+        self.assertEqual(len(self.client.get(TRIP_URL, {"min_free_seats": 1}).data["results"]), 1)
+        self.assertEqual(self.client.get(TRIP_URL, {"min_free_seats": "abc"}).status_code, 400)
+
+    def test_list_query_count_is_constant(self):
+        for _ in range(5):
+            sample_journey(route=sample_route(), train=sample_train()).crew.add(sample_crew())
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TRIP_URL)
+
+        self.assertEqual(len(res.data["results"]), 6)
+        self.assertEqual(len(queries), 2)
@@ -0,0 +1,42 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from trip.metrics import registry
+from trip.tests.test_trip_api import sample_user, sample_train
+
+TRAIN_URL = reverse("trip:trains-list")
+METRICS_URL = reverse("metrics")
+
+
+@override_settings(METRICS_TOKEN="secret")
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+
+    def test_metrics_recorded_per_view_and_action(self):
+        sample_train()
+        self.client.get(TRAIN_URL)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+
+        body = res.content.decode()
+        label = 'view="TrainViewSet",action="list",method="GET",status="200"'
+        self.assertIn(f"trip_http_request_duration_seconds_count{{{label}}} 1", body)
+        self.assertIn(f'trip_http_request_duration_seconds_bucket{{{label},le="+Inf"}} 1', body)
+        self.assertIn(f"trip_http_request_sql_queries_total{{{label}}} 2", body)
+        self.assertIn(f"trip_http_request_serializer_seconds_total{{{label}}}", body)
+
+    def test_metrics_require_token(self):
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong")
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_server_timing_only_for_staff(self):
+        self.assertNotIn("Server-Timing", self.client.get(TRAIN_URL))
+
+        self.client.force_authenticate(sample_user(username="admin", password="12345678", is_staff=True))
+        self.assertIn("db;dur=", self.client.get(TRAIN_URL)["Server-Timing"])
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.name_search import NameIndex
+from trip.tests.test_trip_api import sample_user, sample_station, sample_train
+
+STATION_SEARCH_URL = reverse("trip:station-search")
+TRAIN_SEARCH_URL = reverse("trip:trains-search")
+
+
+class NameIndexTests(TestCase):
+    def setUp(self):
+        self.index = NameIndex([
+            (1, "Kyiv"),
+            (2, "Kyiv Pasazhyrskyi"),
+            (3, "Lviv"),
+            (4, "Lviv Main Station"),
+            (5, "Kharkiv"),
+            (6, "Boryspil Kyiv Airport"),
+        ])
+
+    def test_prefix_matches_rank_shortest_first(self):
+        self.assertEqual(self.index.search("ky", 10), [1, 2, 6])
+        self.assertEqual(self.index.search("KYIV", 10), [1, 2, 6])
+
+    def test_later_words_match_after_name_starts(self):
+        self.assertEqual(self.index.search("main station", 10), [4])
+        self.assertEqual(self.index.search("kyiv air", 10), [6])
+
+    def test_typos_and_transpositions(self):
+        self.assertEqual(self.index.search("kharkov", 10), [5])
+        self.assertEqual(self.index.search("lvvi", 1), [3])
+        self.assertEqual(self.index.search("kharikv", 10), [5])
+
+    def test_short_queries_have_no_typo_budget(self):
+        self.assertEqual(self.index.search("xy", 10), [])
+        self.assertEqual(self.index.search("   ", 10), [])
+
+
+class NameSearchApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(sample_user(username="test1", email="test1@gmail.com", password="12345678"))
+
+    def test_station_search(self):
+        kyiv = sample_station(name="Kyiv")
+        sample_station(name="Lviv")
+        response = self.client.get(STATION_SEARCH_URL, {"q": "kiyv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([station["id"] for station in response.data], [kyiv.id])
+
+    def test_new_stations_are_found(self):
+        sample_station(name="Odesa")
+        self.assertEqual(self.client.get(STATION_SEARCH_URL, {"q": "dnipro"}).data, [])
+        dnipro = sample_station(name="Dnipro Holovnyi")
+        response = self.client.get(STATION_SEARCH_URL, {"q": "dnipro"})
+        self.assertEqual([station["id"] for station in response.data], [dnipro.id])
+
+    def test_train_search_limit(self):
+        for i in range(3):
+            sample_train(name=f"Intercity {i}")
+        sample_train(name="Night Express")
+        response = self.client.get(TRAIN_SEARCH_URL, {"q": "intercity", "limit": 2})
+        self.assertEqual([train["name"] for train in response.data], ["Intercity 0", "Intercity 1"])
+        self.assertEqual(response.data[0]["train_type"], "Test Train Type")
+
+    def test_query_is_required(self):
+        response = self.client.get(STATION_SEARCH_URL, {"q": " "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
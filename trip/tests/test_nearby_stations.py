@@ -0,0 +1,61 @@
+import random
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.geo import StationIndex, haversine_km
+from trip.tests.test_trip_api import sample_user, sample_station
+
+NEARBY_URL = reverse("trip:station-nearby")
+
+
+class StationIndexTests(TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        stations = [(index, f"S{index}", rng.uniform(-90, 90), rng.uniform(-180, 180)) for index in range(2000)]
+        index = StationIndex(stations)
+
+        for _ in range(20):
+            lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+            expected = sorted(stations, key=lambda station: haversine_km(lat, lon, station[2], station[3]))[:5]
+
+            found = index.nearest(lat, lon, 5)
+
+            self.assertEqual([station for station, _ in found], expected)
+
+    def test_radius_across_antimeridian(self):
+        index = StationIndex([(1, "East", 0, 179.9), (2, "West", 0, -179.9), (3, "Far", 0, 170)])
+
+        found = index.nearest(0, 180, 10, radius_km=50)
+
+        self.assertEqual(sorted(station[0] for station, _ in found), [1, 2])
+
+
+class NearbyStationApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+
+    def test_nearby_ranked_by_distance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            far = sample_station(name="Lviv", latitude=49.84, longitude=24.03)
+            near = sample_station(name="Kyiv", latitude=50.45, longitude=30.52)
+
+        res = self.client.get(NEARBY_URL, {"lat": 50.40, "lon": 30.60, "limit": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([station["id"] for station in res.data], [near.id, far.id])
+        self.assertLess(res.data[0]["distance_km"], 10)
+
+        res = self.client.get(NEARBY_URL, {"lat": 50.40, "lon": 30.60, "radius_km": 50})
+        self.assertEqual([station["id"] for station in res.data], [near.id])
+
+    def test_coordinates_validated(self):
+        res = self.client.get(NEARBY_URL, {"lat": 95, "lon": 30})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
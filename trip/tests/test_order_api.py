@@ -0,0 +1,119 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Order, Ticket, Coach, Route
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+ORDER_URL = reverse("trip:order-list")
+
+
+class OrderCreateApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(route=sample_route(), train=sample_train(cargo_num=2, places_in_cargo=20))
+
+    def _payload(self, seats, journey=None):
+        journey_id = (journey or self.journey).id
+        return {"tickets": [{"cargo": 1, "seat": seat, "journey": journey_id} for seat in seats]}
+
+    def _post(self, seats, journey=None):
+        return self.client.post(ORDER_URL, self._payload(seats, journey), format="json")
+
+    def test_create_order(self):
+        res = self._post([1, 2, 3])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            list(order.ticket.values_list("seat", flat=True)), [1, 2, 3]
+        )
+
+    def test_query_count_does_not_depend_on_ticket_count(self):
+        # The first request of a throttle window also creates its counters
+        self._post([])
+        with CaptureQueriesContext(connection) as small:
+            self._post([1, 2])
+        other_journey = sample_journey(route=self.journey.route, train=self.journey.train)
+        with CaptureQueriesContext(connection) as large:
+            self._post(range(1, 21), journey=other_journey)
+
+        self.assertEqual(Ticket.objects.count(), 22)
+        self.assertEqual(len(small), len(large))
+
+    def test_all_conflicts_are_reported(self):
+        self._post([2, 4])
+
+        res = self._post([1, 2, 3, 4])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_same_seat_in_other_cargo_is_free(self):
+        self._post([5])
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"cargo": 2, "seat": 5, "journey": self.journey.id}]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(Ticket.objects.filter(seat=5).count(), 2)
+
+    def test_seats_outside_layout_rejected(self):
+        Coach.objects.create(train=self.journey.train, number=2, seats=4, coach_class="first")
+
+        for cargo, seat in ((3, 1), (2, 5), (1, 21)):
+            res = self.client.post(
+                ORDER_URL, {"tickets": [{"cargo": cargo, "seat": seat, "journey": self.journey.id}]}, format="json"
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, (cargo, seat))
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_duplicate_seats_in_request_rejected(self):
+        res = self._post([5, 5])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(route=sample_route(), train=sample_train(cargo_num=2, places_in_cargo=20))
+
+    def test_tickets_keep_journey_snapshot(self):
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        label = str(Route.objects.get(pk=self.journey.route_id))
+
+        self.journey.route.distance = 250
+        self.journey.route.save()
+        ticket = self.client.get(ORDER_URL).data["results"][0]["tickets"][0]
+
+        self.assertEqual(ticket["journey_route"], label)
+        self.assertEqual(ticket["train_name"], "Test Train")
+        departure = Ticket.objects.get().departure_time
+        self.assertEqual(ticket["departure_time"], departure.isoformat().replace("+00:00", "Z"))
+
+    def test_cursor_page_takes_two_queries(self):
+        for seat in range(1, 9):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(order=order, journey=self.journey, cargo=1 + seat % 2, seat=seat)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_URL, {"pagination": "cursor", "page_size": 5})
+
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assertEqual(len(queries), 2)
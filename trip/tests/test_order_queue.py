@@ -0,0 +1,94 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Order, OrderRequest, SeatHold, Ticket
+from trip.order_queue import process_order_queue
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+ORDER_URL = reverse("trip:order-list")
+
+
+class OrderQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.other = sample_user(username="test2", email="test2@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(route=sample_route(), train=sample_train(cargo_num=2, places_in_cargo=20))
+
+    def _post(self, seats, **headers):
+        payload = {"tickets": [{"cargo": 1, "seat": seat, "journey": self.journey.id} for seat in seats]}
+        return self.client.post(ORDER_URL, payload, format="json", headers={"Prefer": "respond-async", **headers})
+
+    def test_queued_order_is_allocated_by_worker(self):
+        res = self._post([1, 2])
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED, res.data)
+        self.assertEqual(res.data["status"], "pending")
+        self.assertFalse(Order.objects.exists())
+        poll_url = res["Location"]
+        self.assertEqual(self.client.get(poll_url).data["status"], "pending")
+
+        out = io.StringIO()
+        call_command("process_order_queue", stdout=out)
+        self.assertIn("Completed 1 and failed 0", out.getvalue())
+
+        res = self.client.get(poll_url)
+        self.assertEqual(res.data["status"], "completed")
+        self.assertEqual([ticket["seat"] for ticket in res.data["order"]["tickets"]], [1, 2])
+        self.assertEqual(res.data["order"]["tickets"][0]["train_name"], "Test Train")
+        self.assertEqual(Order.objects.get().user, self.user)
+
+    def test_batch_allocates_oldest_first(self):
+        first = self._post([1, 2]).data["token"]
+        self.client.force_authenticate(self.other)
+        second = self._post([2, 3]).data["token"]
+        third = self._post([4]).data["token"]
+
+        self.assertEqual(process_order_queue(), (2, 1))
+
+        requests = {str(order_request.token): order_request for order_request in OrderRequest.objects.all()}
+        self.assertEqual(requests[first].status, OrderRequest.Status.COMPLETED)
+        self.assertEqual(requests[second].status, OrderRequest.Status.FAILED)
+        self.assertEqual(
+            requests[second].errors,
+            [f"2 is already taken please select another (journey {self.journey.id}, cargo 1)"],
+        )
+        self.assertEqual(requests[third].status, OrderRequest.Status.COMPLETED)
+        self.assertEqual(sorted(Ticket.objects.values_list("seat", flat=True)), [1, 2, 4])
+
+    def test_respects_seat_holds(self):
+        expires_at = timezone.now() + timedelta(minutes=5)
+        SeatHold.objects.create(journey=self.journey, user=self.user, cargo=1, seat=1, expires_at=expires_at)
+        SeatHold.objects.create(journey=self.journey, user=self.other, cargo=1, seat=2, expires_at=expires_at)
+        self._post([1])
+        self._post([2])
+
+        self.assertEqual(process_order_queue(), (1, 1))
+        self.assertEqual(list(SeatHold.objects.values_list("seat", flat=True)), [2])
+
+    @override_settings(ASYNC_ORDERS=True)
+    def test_setting_queues_without_header_and_validates_upfront(self):
+        payload = {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]}
+        self.assertEqual(self.client.post(ORDER_URL, payload, format="json").status_code, status.HTTP_202_ACCEPTED)
+
+        res = self._post([21])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(OrderRequest.objects.count(), 1)
+
+    def test_poll_is_private(self):
+        poll_url = self._post([1])["Location"]
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(poll_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_without_preference_orders_are_created_immediately(self):
+        res = self._post([1], Prefer="return=representation")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(OrderRequest.objects.exists())
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Order
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+TRIP_URL = reverse("trip:journey-list")
+ORDER_URL = reverse("trip:order-list")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        route, train = sample_route(), sample_train()
+        start = timezone.now()
+        # Two journeys per departure time to exercise the id tie-breaker
+        self.journeys = [
+            sample_journey(
+                route=route,
+                train=train,
+                departure_time=start + timedelta(hours=index // 2),
+                arrival_time=start + timedelta(hours=index // 2 + 1),
+            )
+            for index in range(25)
+        ]
+
+    def _walk(self, url, params):
+        ids, pages = [], []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            ids += [row["id"] for row in res.data["results"]]
+            pages.append(res.data)
+            if not res.data["next"]:
+                return ids, pages
+            res = self.client.get(res.data["next"])
+
+    def test_journeys_paged_by_departure_time(self):
+        ids, pages = self._walk(TRIP_URL, {"pagination": "cursor"})
+
+        self.assertEqual(ids, [journey.id for journey in self.journeys])
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        previous = self.client.get(pages[2]["previous"])
+        self.assertEqual(previous.data["results"], pages[1]["results"])
+
+    def test_deep_page_query_count(self):
+        _, pages = self._walk(TRIP_URL, {"pagination": "cursor", "page_size": 5})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(pages[-1]["previous"])
+
+        self.assertEqual(len(queries), 1)
+
+    def test_orders_newest_first(self):
+        orders = [Order.objects.create(user=self.user) for _ in range(12)]
+
+        ids, _ = self._walk(ORDER_URL, {"pagination": "cursor"})
+
+        self.assertEqual(ids, [order.id for order in reversed(orders)])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(TRIP_URL, {"cursor": "garbage"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_invalid_values(self):
+        for values in (["x", 1], ["2030-01-01T00:00:00+00:00", "x"]):
+            cursor = base64.urlsafe_b64encode(json.dumps({"v": values, "b": 0}).encode()).decode()
+            res = self.client.get(TRIP_URL, {"cursor": cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
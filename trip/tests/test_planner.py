@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Route
+from trip.planner import timetable
+from trip.tests.test_trip_api import sample_user, sample_train, sample_station, sample_journey
+
+PLAN_URL = reverse("trip:plan")
+START = datetime(2024, 10, 1, 8, tzinfo=ZoneInfo("UTC"))
+
+
+def at(hours, minutes=0):
+    return START + timedelta(hours=hours, minutes=minutes)
+
+
+class PlannerApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        timetable.connections = None
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.train = sample_train()
+        self.a, self.b, self.c = (sample_station(name=name) for name in "ABC")
+        self.ab = Route.objects.create(source=self.a, destination=self.b, distance=100)
+        self.bc = Route.objects.create(source=self.b, destination=self.c, distance=100)
+        self.ac = Route.objects.create(source=self.a, destination=self.c, distance=150)
+
+    def _journey(self, route, departure, arrival):
+        with self.captureOnCommitCallbacks(execute=True):
+            return sample_journey(route=route, train=self.train, departure_time=departure, arrival_time=arrival)
+
+    def _plan(self, **params):
+        params = {"from": self.a.id, "to": self.c.id, "depart_after": "2024-10-01 08:00", **params}
+        res = self.client.get(PLAN_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return res.data
+
+    def test_connection_with_transfer(self):
+        first = self._journey(self.ab, at(1), at(2))
+        missed = self._journey(self.bc, at(2, 5), at(3))
+        second = self._journey(self.bc, at(2, 30), at(4))
+        self._journey(self.ac, at(1), at(5))
+
+        itineraries = self._plan(min_transfer=10, limit=1)
+
+        self.assertEqual(len(itineraries), 1)
+        self.assertEqual([leg["journey"] for leg in itineraries[0]["legs"]], [first.id, second.id])
+        self.assertEqual(itineraries[0]["transfers"], 1)
+        self.assertNotIn(missed.id, [leg["journey"] for leg in itineraries[0]["legs"]])
+
+    def test_alternatives_and_incremental_updates(self):
+        self._journey(self.ab, at(1), at(2))
+        self._journey(self.bc, at(3), at(4))
+        self._plan()
+
+        # Leaves later and arrives earlier, so the A-B-C trip is no longer offered
+        direct = self._journey(self.ac, at(1, 30), at(3))
+        later = self._journey(self.ac, at(5), at(7))
+        with CaptureQueriesContext(connection) as queries:
+            itineraries = self._plan(limit=5)
+
+        self.assertEqual(
+            [[leg["journey"] for leg in itinerary["legs"]] for itinerary in itineraries],
+            [[direct.id], [later.id]],
+        )
+        # One query to patch the changed journey, one to load leg details
+        self.assertEqual(len(queries), 2)
+
+    def test_no_route(self):
+        self._journey(self.bc, at(1), at(2))
+
+        self.assertEqual(self._plan(), [])
+
+    def test_same_station_rejected(self):
+        res = self.client.get(PLAN_URL, {"from": self.a.id, "to": self.a.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, resolve
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Order, Ticket
+from trip.response_cache import response_cache
+from trip.tests.test_trip_api import (
+    sample_user, sample_station, sample_train_type, sample_crew, sample_train, sample_route, sample_journey
+)
+
+SMALL, LARGE = 2, 12
+PAGE_SIZES = (5, 20)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Each endpoint must run the same number of queries at two data sizes and
+    two page sizes, within the query_budget declared on its viewset.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="admin", email="admin@gmail.com", password="12345678", is_staff=True)
+        self.client.force_authenticate(self.user)
+
+    def _count_queries(self, url, params=None):
+        response_cache().clear()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return len(queries)
+
+    def _budget(self, url):
+        match = resolve(url)
+        action = match.func.actions["get"]
+        return match.func.cls.query_budget[action]
+
+    def assert_list_constant(self, url_name, populate):
+        url = reverse(url_name)
+        counts = []
+        for size in (SMALL, LARGE):
+            populate(size)
+            counts += [self._count_queries(url, {"page_size": page_size}) for page_size in PAGE_SIZES]
+
+        self.assertEqual(len(set(counts)), 1, f"{url_name} query counts vary with rows: {counts}")
+        self.assertLessEqual(counts[0], self._budget(url), f"{url_name} is over its query budget")
+
+    def assert_detail_constant(self, url_name, make_instance):
+        counts = []
+        for size in (SMALL, LARGE):
+            url = reverse(url_name, args=[make_instance(size).id])
+            counts.append(self._count_queries(url))
+
+        self.assertEqual(len(set(counts)), 1, f"{url_name} query counts vary with rows: {counts}")
+        self.assertLessEqual(counts[0], self._budget(url), f"{url_name} is over its query budget")
+
+    @staticmethod
+    def _journey_with_tickets(size):
+        journey = sample_journey(route=sample_route(), train=sample_train())
+        for _ in range(size):
+            journey.crew.add(sample_crew())
+        order = Order.objects.create(user=sample_user(username=f"buyer{journey.id}", password="12345678"))
+        for seat in range(1, size + 1):
+            Ticket.objects.create(journey=journey, order=order, cargo=1, seat=seat)
+        return journey
+
+    def test_station_list(self):
+        self.assert_list_constant("trip:station-list", lambda size: [sample_station() for _ in range(size)])
+
+    def test_train_type_list(self):
+        self.assert_list_constant("trip:traintype-list", lambda size: [sample_train_type() for _ in range(size)])
+
+    def test_crew_list(self):
+        self.assert_list_constant("trip:crew-list", lambda size: [sample_crew() for _ in range(size)])
+
+    def test_train_list_and_detail(self):
+        self.assert_list_constant("trip:trains-list", lambda size: [sample_train() for _ in range(size)])
+        self.assert_detail_constant("trip:trains-detail", lambda size: sample_train())
+
+    def test_route_list_and_detail(self):
+        self.assert_list_constant("trip:routes-list", lambda size: [sample_route() for _ in range(size)])
+        self.assert_detail_constant("trip:routes-detail", lambda size: sample_route())
+
+    def test_journey_list_detail_and_seats(self):
+        self.assert_list_constant(
+            "trip:journey-list", lambda size: [self._journey_with_tickets(2) for _ in range(size)]
+        )
+        self.assert_detail_constant("trip:journey-detail", self._journey_with_tickets)
+        self.assert_detail_constant("trip:journey-seats", self._journey_with_tickets)
+
+    def test_order_list(self):
+        def populate(size):
+            journey = sample_journey(route=sample_route(), train=sample_train(places_in_cargo=3 * size))
+            for index in range(size):
+                order = Order.objects.create(user=self.user)
+                for seat in range(1, 4):
+                    Ticket.objects.create(journey=journey, order=order, cargo=1, seat=index * 3 + seat)
+
+        self.assert_list_constant("trip:order-list", populate)
@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.tests.test_trip_api import sample_user, sample_station, sample_train, sample_route
+
+STATION_URL = reverse("trip:station-list")
+TRAIN_URL = reverse("trip:trains-list")
+ROUTES_URL = reverse("trip:routes-list")
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+
+    def test_cached_list_served_without_queries(self):
+        sample_station()
+        first = self.client.get(STATION_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(STATION_URL)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(len(queries), 0)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(TRAIN_URL)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TRAIN_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_related_change_invalidates(self):
+        train = sample_train()
+        detail_url = reverse("trip:trains-detail", args=[train.id])
+        etag = self.client.get(detail_url)["ETag"]
+
+        train.train_type.name = "Night"
+        train.train_type.save()
+        res = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["train_type"], "Night")
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_query_string_is_part_of_key(self):
+        route = sample_route()
+        sample_route(distance=101)
+
+        everything = self.client.get(ROUTES_URL)
+        filtered = self.client.get(ROUTES_URL, {"source": route.source_id})
+
+        self.assertEqual(len(everything.data["results"]), 2)
+        self.assertEqual(len(filtered.data["results"]), 1)
+        self.assertNotEqual(everything["ETag"], filtered["ETag"])
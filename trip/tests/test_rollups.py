@@ -0,0 +1,124 @@
+import io
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip import rollups
+from trip.models import OccupancyRollup, Order
+from trip.order_queue import enqueue_order, process_order_queue
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+ORDER_URL = reverse("trip:order-list")
+OCCUPANCY_URL = reverse("trip:occupancy")
+DAY = date(2030, 5, 1)
+
+
+class OccupancyRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.route = sample_route()
+        self.train = sample_train(cargo_num=2, places_in_cargo=10)
+        self.journeys = [
+            sample_journey(
+                route=self.route, train=self.train,
+                departure_time=datetime(2030, 5, 1, 8 + i, tzinfo=timezone.utc),
+                arrival_time=datetime(2030, 5, 1, 10 + i, tzinfo=timezone.utc),
+            )
+            for i in range(2)
+        ]
+
+    def _order(self, journey, seats):
+        payload = {"tickets": [{"cargo": 1, "seat": seat, "journey": journey.id} for seat in seats]}
+        response = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def _rollup(self, day=DAY):
+        return OccupancyRollup.objects.values("journeys", "capacity", "tickets_sold").get(route=self.route, day=day)
+
+    def test_journeys_and_orders_update_the_rollup(self):
+        self.assertEqual(self._rollup(), {"journeys": 2, "capacity": 40, "tickets_sold": 0})
+        self._order(self.journeys[0], [1, 2, 3])
+        self._order(self.journeys[1], [1])
+        self.assertEqual(self._rollup()["tickets_sold"], 4)
+
+        Order.objects.filter(ticket__journey=self.journeys[0]).distinct().get().delete()
+        self.assertEqual(self._rollup()["tickets_sold"], 1)
+
+    def test_missing_rows_start_from_committed_tickets(self):
+        self._order(self.journeys[0], [1, 2])
+        OccupancyRollup.objects.all().delete()
+        self._order(self.journeys[1], [1])
+        self.assertEqual(self._rollup(), {"journeys": 2, "capacity": 40, "tickets_sold": 3})
+
+    def test_concurrent_insert_of_a_missing_row_keeps_both_sales(self):
+        OccupancyRollup.objects.all().delete()
+        insert = rollups._insert_missing
+
+        def concurrent(counts):
+            # Another transaction sold one ticket and stored the row between our update and insert
+            OccupancyRollup.objects.create(
+                route=self.route, train_type=self.train.train_type, day=DAY, journeys=2, capacity=40, tickets_sold=1
+            )
+            insert(counts)
+
+        with mock.patch("trip.rollups._insert_missing", side_effect=concurrent):
+            self._order(self.journeys[0], [1, 2])
+        self.assertEqual(self._rollup()["tickets_sold"], 3)
+
+    def test_queued_orders_update_the_rollup(self):
+        enqueue_order(self.user.id, [{"journey_id": self.journeys[0].id, "cargo": 1, "seat": seat} for seat in (1, 2)])
+        self.assertEqual(process_order_queue(), (1, 0))
+        self.assertEqual(self._rollup()["tickets_sold"], 2)
+
+    def test_moved_and_deleted_journeys_refresh_their_days(self):
+        self._order(self.journeys[0], [1, 2])
+        journey = self.journeys[0]
+        journey.departure_time += timedelta(days=1)
+        journey.arrival_time += timedelta(days=1)
+        journey.save()
+        self.assertEqual(self._rollup(), {"journeys": 1, "capacity": 20, "tickets_sold": 0})
+        self.assertEqual(self._rollup(DAY + timedelta(days=1)), {"journeys": 1, "capacity": 20, "tickets_sold": 2})
+
+        self.journeys[1].delete()
+        self.assertFalse(OccupancyRollup.objects.filter(day=DAY).exists())
+
+    def test_rebuild_matches_incremental_rows(self):
+        self._order(self.journeys[0], [1, 2, 3])
+        expected = self._rollup()
+        OccupancyRollup.objects.all().delete()
+        out = io.StringIO()
+        call_command("rebuild_rollups", "--from", "2030-05-01", stdout=out)
+        self.assertIn("Wrote 1 occupancy rollup rows", out.getvalue())
+        self.assertEqual(self._rollup(), expected)
+
+    def test_occupancy_endpoint_is_staff_only(self):
+        response = self.client.get(OCCUPANCY_URL, {"from": "2030-05-01", "to": "2030-05-02"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_occupancy_series(self):
+        self._order(self.journeys[0], [1, 2, 3, 4, 5])
+        self.client.force_authenticate(sample_user(
+            username="admin", email="admin@gmail.com", password="12345678", is_staff=True
+        ))
+        response = self.client.get(
+            OCCUPANCY_URL, {"from": "2030-04-30", "to": "2030-05-02", "group_by": "train_type"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{
+            "day": DAY,
+            "train_type": self.train.train_type_id,
+            "journeys": 2,
+            "capacity": 40,
+            "tickets_sold": 5,
+            "load_factor": 0.125,
+        }])
+
+        response = self.client.get(OCCUPANCY_URL, {"group_by": "station"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
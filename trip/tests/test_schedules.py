@@ -0,0 +1,199 @@
+from datetime import date, datetime, time, timedelta, timezone
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from trip.models import Journey, JourneySchedule, OccupancyRollup
+from trip.order_queue import process_order_queue
+from trip.schedules import virtual_row
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey, sample_crew
+
+TRIP_URL = reverse("trip:journey-list")
+ORDER_URL = reverse("trip:order-list")
+SCHEDULE_URL = reverse("trip:journeyschedule-list")
+MONDAY = date(2030, 5, 6)
+
+
+class JourneyScheduleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(sample_user(username="test1", email="test1@gmail.com", password="12345678"))
+        self.route = sample_route()
+        self.train = sample_train(cargo_num=2, places_in_cargo=10)
+        self.crew = sample_crew()
+        self.schedule = JourneySchedule.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=time(8, 30),
+            duration=timedelta(hours=3),
+            weekdays="1111100",
+            valid_from=MONDAY,
+        )
+        self.schedule.crew.add(self.crew)
+
+    def _week(self, **params):
+        return self.client.get(TRIP_URL, {"departure_after": "2030-05-06", "departure_before": "2030-05-13", **params})
+
+    def _book(self, day, seat=1):
+        payload = {"tickets": [{"cargo": 1, "seat": seat, "schedule": self.schedule.id, "date": day}]}
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_list_expands_schedules_on_running_days(self):
+        response = self._week()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+        first = response.data["results"][0]
+        self.assertIsNone(first["id"])
+        self.assertEqual((first["schedule"], first["date"]), (self.schedule.id, "2030-05-06"))
+        self.assertEqual(first["departure_time"], "2030-05-06T08:30:00Z")
+        self.assertEqual(first["arrival_time"], "2030-05-06T11:30:00Z")
+        self.assertEqual(first["crew"], [self.crew.id])
+        self.assertEqual(first["train"]["name"], self.train.name)
+        self.assertEqual(Journey.objects.count(), 0)
+
+    def test_virtual_journeys_merge_with_stored_ones(self):
+        journey = sample_journey(
+            route=self.route, train=self.train,
+            departure_time=datetime(2030, 5, 6, 12, tzinfo=timezone.utc),
+            arrival_time=datetime(2030, 5, 6, 14, tzinfo=timezone.utc),
+        )
+        results = self.client.get(TRIP_URL, {"departure_time": "2030-05-06"}).data["results"]
+        self.assertEqual([row["id"] for row in results], [None, journey.id])
+
+        self.assertEqual(len(self._week(route=self.route.id + 1).data["results"]), 0)
+        self.assertEqual(len(self._week(min_free_seats=21).data["results"]), 0)
+
+    def test_first_booking_stores_the_journey(self):
+        self.assertEqual(self._book("2030-05-07").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._book("2030-05-07", seat=2).status_code, status.HTTP_201_CREATED)
+
+        journey = Journey.objects.get()
+        self.assertEqual((journey.schedule_id, journey.schedule_day), (self.schedule.id, date(2030, 5, 7)))
+        self.assertEqual(list(journey.crew.all()), [self.crew])
+        self.assertEqual(journey.ticket.count(), 2)
+        self.assertEqual(OccupancyRollup.objects.get(day=date(2030, 5, 7)).tickets_sold, 2)
+
+        results = self._week().data["results"]
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[1]["id"], journey.id)
+        self.assertNotIn("schedule", results[1])
+
+    def test_booking_a_day_the_schedule_does_not_run(self):
+        response = self._book("2030-05-11")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Journey.objects.exists())
+
+    def test_past_departures_are_not_bookable(self):
+        self.schedule.valid_from = date(2020, 1, 1)
+        self.schedule.save()
+        self.assertEqual(self._book("2020-05-04").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Journey.objects.exists())
+
+    def test_rejected_orders_store_no_journey(self):
+        self.assertEqual(self._book("2030-05-07", seat=999).status_code, status.HTTP_400_BAD_REQUEST)
+        ticket = {"cargo": 1, "seat": 1, "schedule": self.schedule.id, "date": "2030-05-07"}
+        response = self.client.post(ORDER_URL, {"tickets": [ticket, ticket]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Journey.objects.exists())
+
+    def test_queued_order_stores_the_journey_when_allocated(self):
+        payload = {"tickets": [{"cargo": 1, "seat": 1, "schedule": self.schedule.id, "date": "2030-05-07"}]}
+        response = self.client.post(ORDER_URL, payload, format="json", headers={"Prefer": "respond-async"})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Journey.objects.exists())
+
+        self.assertEqual(process_order_queue(), (1, 0))
+        journey = Journey.objects.get()
+        self.assertEqual(journey.schedule_day, date(2030, 5, 7))
+        self.assertEqual(journey.ticket.get().seat, 1)
+
+        # A second queued order for the same departure books onto the stored journey
+        response = self.client.post(ORDER_URL, payload, format="json", headers={"Prefer": "respond-async"})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(process_order_queue(), (0, 1))
+        self.assertEqual(Journey.objects.count(), 1)
+
+    def _pages(self, response, direction="next"):
+        rows = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rows.append([(row["id"], row["date"] if row["id"] is None else None) for row in response.data["results"]])
+            if not response.data[direction]:
+                return rows
+            response = self.client.get(response.data[direction])
+
+    def test_merged_lists_page_by_cursor(self):
+        journeys = [
+            sample_journey(
+                route=self.route, train=self.train,
+                departure_time=datetime(2030, 5, day, hour, 30, tzinfo=timezone.utc),
+                arrival_time=datetime(2030, 5, day, hour + 2, tzinfo=timezone.utc),
+            )
+            for day, hour in ((6, 8), (7, 6), (8, 12))
+        ]
+        first = self.client.get(TRIP_URL, {
+            "departure_after": "2030-05-06", "departure_before": "2030-05-09", "page_size": 2,
+        })
+        pages = [
+            [(None, "2030-05-06"), (journeys[0].id, None)],
+            [(journeys[1].id, None), (None, "2030-05-07")],
+            [(None, "2030-05-08"), (journeys[2].id, None)],
+        ]
+        self.assertEqual(self._pages(first), pages)
+
+        last = self.client.get(self.client.get(first.data["next"]).data["next"])
+        self.assertEqual(self._pages(last, "previous"), pages[::-1])
+
+    def test_pages_only_expand_the_days_they_reach(self):
+        params = {"departure_after": "2030-05-06", "departure_before": "2030-08-01", "page_size": 2}
+        with mock.patch("trip.views.virtual_row", wraps=virtual_row) as built:
+            first = self.client.get(TRIP_URL, params)
+        self.assertEqual([row["date"] for row in first.data["results"]], ["2030-05-06", "2030-05-07"])
+        self.assertEqual(built.call_count, 3)
+
+        with mock.patch("trip.views.virtual_row", wraps=virtual_row) as built:
+            second = self.client.get(first.data["next"])
+        self.assertEqual([row["date"] for row in second.data["results"]], ["2030-05-08", "2030-05-09"])
+        self.assertLessEqual(built.call_count, 4)
+
+        with mock.patch("trip.views.virtual_row", wraps=virtual_row) as built:
+            back = self.client.get(second.data["previous"])
+        self.assertEqual([row["date"] for row in back.data["results"]], ["2030-05-06", "2030-05-07"])
+        self.assertLessEqual(built.call_count, 4)
+
+    def test_unbounded_and_long_windows(self):
+        self.assertEqual(self.client.get(TRIP_URL).data["count"], 0)
+        later = sample_journey(
+            route=self.route, train=self.train,
+            departure_time=datetime(2031, 1, 1, tzinfo=timezone.utc),
+            arrival_time=datetime(2031, 1, 1, 3, tzinfo=timezone.utc),
+        )
+        # Schedules expand over the first SCHEDULE_LIST_MAX_DAYS of the window; stored journeys still list
+        pages = self._pages(self.client.get(
+            TRIP_URL, {"departure_after": "2030-05-06", "departure_before": "2031-05-06", "page_size": 20}
+        ))
+        rows = [row for page in pages for row in page]
+        self.assertEqual(len(rows), 67)
+        self.assertEqual(rows[-2], (None, "2030-08-05"))
+        self.assertEqual(rows[-1], (later.id, None))
+
+        response = self.client.get(TRIP_URL, {"departure_before": "2031-01-01", "min_free_seats": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_schedules_are_admin_managed(self):
+        payload = {
+            "route": self.route.id, "train": self.train.id, "crew": [self.crew.id], "departure_time": "22:15",
+            "duration": "08:00:00", "weekdays": "0000011", "valid_from": "2030-06-01", "valid_until": "2030-05-01",
+        }
+        self.assertEqual(self.client.post(SCHEDULE_URL, payload).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(sample_user(
+            username="admin", email="admin@gmail.com", password="12345678", is_staff=True
+        ))
+        self.assertEqual(self.client.post(SCHEDULE_URL, payload).status_code, status.HTTP_400_BAD_REQUEST)
+        payload["valid_until"] = "2030-08-31"
+        self.assertEqual(self.client.post(SCHEDULE_URL, payload).status_code, status.HTTP_201_CREATED)
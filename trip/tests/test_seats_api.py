@@ -0,0 +1,144 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from trip.models import Order, Ticket, Coach, Train, JourneySearchRow
+from trip.occupancy import SeatMap, train_capacity, invalidate_seat_map, mark_seats_taken
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+
+def seats_url(journey_id):
+    return reverse("trip:journey-seats", args=[journey_id])
+
+
+class SeatMapTests(TestCase):
+    def test_mark_and_lookup(self):
+        seat_map = SeatMap((10, 10, 4))
+        seat_map.mark(2, 10)
+        seat_map.mark(4, 1)
+
+        self.assertTrue(seat_map.is_taken(2, 10))
+        self.assertFalse(seat_map.is_taken(3, 1))
+        self.assertFalse(seat_map.is_taken(4, 1))
+        self.assertFalse(seat_map.is_taken(3, 5))
+        self.assertEqual(seat_map.capacity, 24)
+        self.assertEqual(seat_map.taken_count, 1)
+        self.assertEqual(SeatMap(*seat_map.dump()).bits, seat_map.bits)
+
+
+class JourneySeatsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(
+            route=sample_route(), train=sample_train(cargo_num=2, places_in_cargo=3)
+        )
+        self.order = Order.objects.create(user=self.user)
+
+    def test_seats_per_cargo(self):
+        Ticket.objects.create(journey=self.journey, order=self.order, cargo=1, seat=2)
+
+        res = self.client.get(seats_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["capacity"], 6)
+        self.assertEqual(res.data["free_count"], 5)
+        self.assertEqual(res.data["cargos"][0], {"cargo": 1, "coach_class": "", "free": [1, 3], "taken": [2]})
+        self.assertEqual(res.data["cargos"][1], {"cargo": 2, "coach_class": "", "free": [1, 2, 3], "taken": []})
+
+    def _taken(self, cargo, queries=1):
+        with CaptureQueriesContext(connection) as captured:
+            res = self.client.get(seats_url(self.journey.id))
+        # One query for the journey when the cached map is used, one more to rebuild it
+        self.assertEqual(len(captured), queries)
+        return res.data["cargos"][cargo - 1]["taken"]
+
+    def test_cached_map_follows_ticket_changes(self):
+        self._taken(2, queries=2)
+
+        # A sale sets its bits in the cached map, no rebuild
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(journey=self.journey, order=self.order, cargo=2, seat=3)
+        self.assertEqual(self._taken(2), [3])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.assertEqual(self._taken(2, queries=2), [])
+
+    def test_concurrent_sales_fall_back_to_a_rebuild(self):
+        self._taken(1, queries=2)
+        Ticket.objects.create(journey=self.journey, order=self.order, cargo=1, seat=1)
+        second = Ticket.objects.create(journey=self.journey, order=self.order, cargo=1, seat=2)
+
+        # The first writer took its version but has not stored its map when the second one commits
+        invalidate_seat_map(self.journey.id)
+        mark_seats_taken(self.journey.id, [(second.cargo, second.seat)])
+        self.assertEqual(self._taken(1, queries=2), [1, 2])
+
+        third = Ticket.objects.create(journey=self.journey, order=self.order, cargo=1, seat=3)
+        mark_seats_taken(self.journey.id, [(third.cargo, third.seat)])
+        self.assertEqual(self._taken(1), [1, 2, 3])
+
+    def test_rolled_back_ticket_leaves_cached_map(self):
+        self.client.get(seats_url(self.journey.id))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Ticket.objects.create(journey=self.journey, order=self.order, cargo=2, seat=3)
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.client.get(seats_url(self.journey.id)).data["cargos"][1]["taken"], [])
+
+
+class CoachLayoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+        self.client.force_authenticate(self.user)
+        self.train = sample_train(cargo_num=3, places_in_cargo=10)
+        self.journey = sample_journey(route=sample_route(), train=self.train)
+
+    def test_coaches_override_uniform_layout(self):
+        Coach.objects.create(train=self.train, number=1, seats=4, coach_class="first")
+
+        self.assertEqual(self.train.coach_layout(), [(4, "first"), (10, ""), (10, "")])
+        self.assertEqual(Train.objects.annotate(seats=train_capacity()).get().seats, 24)
+        self.assertEqual(JourneySearchRow.objects.get().capacity, 24)
+
+        res = self.client.get(seats_url(self.journey.id))
+        self.assertEqual(res.data["capacity"], 24)
+        self.assertEqual(res.data["cargos"][0], {"cargo": 1, "coach_class": "first", "free": [1, 2, 3, 4], "taken": []})
+
+    def test_ticket_bounds(self):
+        order = Order.objects.create(user=self.user)
+        with self.assertRaises(ValidationError):
+            Ticket.objects.create(journey=self.journey, order=order, cargo=4, seat=1)
+        with self.assertRaises(ValidationError):
+            Ticket.objects.create(journey=self.journey, order=order, cargo=1, seat=11)
+
+    def test_create_train_with_coaches(self):
+        admin = sample_user(username="admin", email="admin@gmail.com", password="12345678", is_staff=True)
+        self.client.force_authenticate(admin)
+        payload = {
+            "name": "Layout",
+            "cargo_num": 2,
+            "places_in_cargo": 60,
+            "train_type": self.train.train_type_id,
+            "coaches": [{"number": 1, "seats": 30, "coach_class": "first"}],
+        }
+
+        res = self.client.post(reverse("trip:trains-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        self.assertEqual(Train.objects.get(id=res.data["id"]).capacity, 90)
+
+        payload["coaches"] = [{"number": 3, "seats": 30}]
+        res = self.client.post(reverse("trip:trains-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
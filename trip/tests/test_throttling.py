@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from train_service.throttling import OrderIPThrottle, SlidingWindowThrottle
+from trip.tests.test_trip_api import sample_user, sample_train, sample_route, sample_journey
+
+ORDER_URL = reverse("trip:order-list")
+TOKEN_URL = reverse("user:token_obtain_pair")
+REGISTER_URL = reverse("user:create_user")
+
+
+def throttle_rates(**rates):
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}
+    )
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        self.cache.clear()
+        self.request = Request(RequestFactory().post("/"))
+
+    def allowed(self, now):
+        with mock.patch.object(SlidingWindowThrottle, "timer", return_value=now):
+            throttle = OrderIPThrottle()
+            return throttle.allow_request(self.request, None), throttle.wait()
+
+    @throttle_rates(order_ip="4/min")
+    def test_previous_window_is_weighted_by_overlap(self):
+        self.assertEqual([self.allowed(6000 + second)[0] for second in range(5)], [True] * 4 + [False])
+
+        # A quarter into the next window three quarters of the 4 earlier requests still count
+        self.assertTrue(self.allowed(6075)[0])
+        self.assertTrue(self.allowed(6076)[0])
+        allowed, wait = self.allowed(6077)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 13)
+        self.assertTrue(self.allowed(6091)[0])
+
+    @throttle_rates(order_ip="2/min")
+    def test_requests_are_counted_before_the_check(self):
+        key = OrderIPThrottle.cache_format.format(scope="order_ip", ident="127.0.0.1", window=100)
+        self.assertTrue(self.allowed(6000)[0])
+        # A request another worker counted meanwhile takes the last slot
+        self.cache.incr(key)
+        self.assertFalse(self.allowed(6001)[0])
+        # Rejected requests give their count back
+        self.assertEqual(self.cache.get(key), 2)
+
+    def test_counter_increments_keep_their_expiry(self):
+        def expires():
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT expires FROM {settings.CACHES['throttle']['LOCATION']}")
+                return cursor.fetchall()
+
+        self.cache.add("counter", 0, 7200)
+        before = expires()
+
+        counts = [self.cache.incr("counter"), self.cache.incr("counter", 2), self.cache.decr("counter")]
+        self.assertEqual(counts, [1, 3, 2])
+        self.assertEqual(self.cache.get("counter"), 2)
+        self.assertEqual(expires(), before)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    @throttle_rates(order_ip="")
+    def test_empty_rate_disables_scope(self):
+        self.assertTrue(all(self.allowed(6000)[0] for _ in range(10)))
+
+
+class EndpointThrottleTests(TestCase):
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        # A fixed clock keeps slow requests (password hashing) from straddling a window boundary
+        clock = mock.patch.object(SlidingWindowThrottle, "timer", return_value=6000)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.client = APIClient()
+        self.user = sample_user(username="test1", email="test1@gmail.com", password="12345678")
+
+    @throttle_rates(order_user="2/min", order_ip="100/min")
+    def test_order_creation_is_throttled_per_user(self):
+        journey = sample_journey(route=sample_route(), train=sample_train())
+        self.client.force_authenticate(self.user)
+        codes = [
+            self.client.post(
+                ORDER_URL, {"tickets": [{"cargo": 1, "seat": seat, "journey": journey.id}]}, format="json"
+            ).status_code
+            for seat in (1, 2, 3)
+        ]
+        self.assertEqual(codes, [201, 201, 429])
+
+        # Listing orders is not throttled
+        self.assertEqual(self.client.get(ORDER_URL).status_code, status.HTTP_200_OK)
+        other = sample_user(username="test2", email="test2@gmail.com", password="12345678")
+        self.client.force_authenticate(other)
+        res = self.client.post(
+            ORDER_URL, {"tickets": [{"cargo": 1, "seat": 3, "journey": journey.id}]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @throttle_rates(login_user="2/min", login_ip="100/min")
+    def test_login_is_throttled_per_username(self):
+        codes = [
+            self.client.post(TOKEN_URL, {"username": "test1", "password": "wrong"}).status_code for _ in range(3)
+        ]
+        self.assertEqual(codes, [401, 401, 429])
+        res = self.client.post(TOKEN_URL, {"username": "other", "password": "wrong"})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @throttle_rates(register_ip="1/hour")
+    def test_registration_is_throttled_per_ip(self):
+        payload = {"username": "new", "email": "new@gmail.com", "password": "12345678"}
+        self.client.post(REGISTER_URL, payload)
+        res = self.client.post(REGISTER_URL, {**payload, "username": "new2", "email": "new2@gmail.com"})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
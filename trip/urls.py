@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
 
 from trip.views import StationViewSet, TrainTypeViewSet, CrewViewSet, OrderViewSet, TrainViewSet, RouteViewSet, \
-    JourneyViewSet
+    JourneyViewSet, JourneyScheduleViewSet, PlanView, BulkImportView, OccupancyView
 
 router = routers.DefaultRouter()
 router.register("station", StationViewSet)
@@ -12,9 +13,18 @@ router.register("order", OrderViewSet)
 router.register("train", TrainViewSet, basename="trains")
 router.register("route", RouteViewSet, basename="routes")
 router.register("journey", JourneyViewSet, basename="journey")
+router.register("journey_schedule", JourneyScheduleViewSet)
+
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    from trip.async_views import async_read_urls
+    router_urls = async_read_urls(router_urls)
 
 urlpatterns = [
-    path("", include(router.urls))
+    path("", include(router_urls)),
+    path("plan/", PlanView.as_view(), name="plan"),
+    path("import/<str:kind>/", BulkImportView.as_view(), name="bulk-import"),
+    path("occupancy/", OccupancyView.as_view(), name="occupancy"),
 ]
 
 app_name = 'trip'
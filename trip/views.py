@@ -1,33 +1,121 @@
-from datetime import datetime
-
+import io
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, mixins
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
-from trip.models import Station, TrainType, Crew, Order, Train, Route, Journey
+from train_service.db_router import PRIMARY, stick_to_primary
+from train_service.throttling import OrderUserThrottle, OrderIPThrottle
+from trip.bulk_import import IMPORTERS, FORMATS, guess_format, read_records, run_import
+from trip.exports import EXPORT_FORMATS, ticket_export_response
+from trip.fast_lists import FastListMixin
+from trip.geo import get_station_index, EARTH_RADIUS_KM
+from trip.holds import place_holds, release_holds
+from trip.name_search import NameSearchMixin
+from trip.models import Station, TrainType, Crew, Order, Train, Route, Journey, JourneySearchRow, Ticket, \
+    OrderRequest, JourneySchedule
+from trip.occupancy import get_seat_map, journey_layout
+from trip.order_queue import enqueue_order
 from trip.pagination import DefaultPagination
+from trip.planner import timetable
+from trip.response_cache import CachedListMixin, CachedRetrieveMixin
+from trip.schedules import active_schedules, occurrences, virtual_row
+from trip.rollups import GROUP_FIELDS, occupancy_series
 from trip.permissions import IsAdminOrReadOnly
-from trip.serializers import StationSerializer, TrainTypeSerializer, CrewSerializer, \
+from trip.serializers import StationSerializer, NearbyStationSerializer, TrainTypeSerializer, CrewSerializer, \
     OrderSerializer, OrderListSerializer, TrainSerializer, TrainListSerializer, RouteListSerializer, \
-    RouteDetailSerializer, RouteSerializer, JourneySerializer, JourneyListSerializer, JourneyDetailSerializer
-from trip.services import params_to_ints
+    RouteDetailSerializer, RouteSerializer, JourneySerializer, JourneyDetailSerializer, \
+    JourneySeatsSerializer, JourneySearchRowSerializer, SeatHoldRequestSerializer, SeatHoldSerializer, \
+    ItinerarySerializer, OrderRequestSerializer, JourneyScheduleSerializer, TRAIN_LIST_FIELDS, JOURNEY_LIST_FIELDS
+from trip.services import params_to_ints, request_timezone, parse_time_param, day_range
 
 
-class StationViewSet(mixins.CreateModelMixin,
+class StationViewSet(CachedListMixin,
+                     NameSearchMixin,
+                     mixins.CreateModelMixin,
                      mixins.ListModelMixin,
                      GenericViewSet, ):
     queryset = Station.objects.all()
+    cache_models = (Station,)
+    query_budget = {"list": 2}
     serializer_class = StationSerializer
     pagination_class = DefaultPagination
     permission_classes = [IsAdminOrReadOnly, ]
+    max_nearby = 100
+
+    def get_serializer_class(self):
+        if self.action == "nearby":
+            return NearbyStationSerializer
+        return StationSerializer
 
+    @staticmethod
+    def _float_param(params, name, minimum, maximum, required=True):
+        value = params.get(name)
+        if value is None and not required:
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: "must be a number"})
+        if not minimum <= value <= maximum:
+            raise ValidationError({name: f"must be between {minimum} and {maximum}"})
+        return value
 
-class TrainTypeViewSet(mixins.CreateModelMixin,
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("lat", type=OpenApiTypes.FLOAT, required=True, description="Latitude (ex. ?lat=50.45)"),
+            OpenApiParameter("lon", type=OpenApiTypes.FLOAT, required=True, description="Longitude (ex. ?lon=30.52)"),
+            OpenApiParameter(
+                "radius_km",
+                type=OpenApiTypes.FLOAT,
+                description="Only stations within this distance (ex. ?radius_km=25)",
+            ),
+            OpenApiParameter("limit", type=OpenApiTypes.INT, description="Number of stations, max 100"),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="nearby")
+    def nearby(self, request):
+        params = request.query_params
+        latitude = self._float_param(params, "lat", -90, 90)
+        longitude = self._float_param(params, "lon", -180, 180)
+        radius_km = self._float_param(params, "radius_km", 0, math.pi * EARTH_RADIUS_KM, required=False)
+        try:
+            limit = min(max(int(params.get("limit", 10)), 1), self.max_nearby)
+        except ValueError:
+            raise ValidationError({"limit": "must be an integer"})
+
+        stations = get_station_index().nearest(latitude, longitude, limit, radius_km)
+        serializer = self.get_serializer(
+            [
+                {"id": id_, "name": name, "latitude": lat, "longitude": lon, "distance_km": round(distance, 3)}
+                for (id_, name, lat, lon), distance in stations
+            ],
+            many=True,
+        )
+        return Response(serializer.data)
+
+
+class TrainTypeViewSet(CachedListMixin,
+                       mixins.CreateModelMixin,
                        mixins.ListModelMixin,
                        GenericViewSet, ):
     queryset = TrainType.objects.all()
+    cache_models = (TrainType,)
+    query_budget = {"list": 2}
     serializer_class = TrainTypeSerializer
     pagination_class = DefaultPagination
     permission_classes = [IsAdminOrReadOnly, ]
@@ -40,36 +128,140 @@ class CrewViewSet(mixins.CreateModelMixin,
     serializer_class = CrewSerializer
     pagination_class = DefaultPagination
     permission_classes = [IsAdminUser, ]
+    query_budget = {"list": 2}
 
 
 class OrderViewSet(mixins.ListModelMixin,
                    mixins.CreateModelMixin,
                    GenericViewSet, ):
-    queryset = Order.objects.prefetch_related("ticket__journey__route", "ticket__journey__train")
+    # Tickets carry their journey snapshot, so a page is the orders query plus one for their tickets
+    queryset = Order.objects.prefetch_related("ticket")
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, ]
     pagination_class = DefaultPagination
+    keyset_ordering = ("-created_at", "-id")
+    query_budget = {"list": 3}
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user.id)
+        return self.queryset.filter(user=self.request.user.id)
 
     def get_serializer_class(self):
         if self.action == "list":
             return OrderListSerializer
         return OrderSerializer
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def get_throttles(self):
+        if self.action == "create":
+            return [OrderUserThrottle(), OrderIPThrottle()]
+        return super().get_throttles()
 
+    @staticmethod
+    def _queue_order(request):
+        if settings.ASYNC_ORDERS:
+            return True
+        preferences = request.headers.get("Prefer", "").replace(";", ",").split(",")
+        return "respond-async" in (preference.strip().lower() for preference in preferences)
+
+    def create(self, request, *args, **kwargs):
+        if not self._queue_order(request):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_request = enqueue_order(request.user.id, serializer.validated_data["ticket"])
+        stick_to_primary(request.user.id)
+        location = reverse("trip:order-request", args=[order_request.token], request=request)
+        return Response(
+            OrderRequestSerializer(order_request).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
 
-class TrainViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        serializer.save(user_id=self.request.user.id)
+        # Replicas may lag behind the new order, so this user's next reads go to the primary
+        stick_to_primary(self.request.user.id)
+
+    @extend_schema(responses=OrderRequestSerializer)
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=r"requests/(?P<token>[0-9a-f-]{36})",
+        url_name="request",
+        pagination_class=None,
+    )
+    def order_request(self, request, token):
+        """Status of an order queued with "Prefer: respond-async", with the order once it is allocated"""
+        # Read from the primary so a finished allocation never shows as pending from a lagging replica
+        order_request = (
+            OrderRequest.objects.using(PRIMARY)
+            .select_related("order")
+            .prefetch_related("order__ticket")
+            .filter(token=token, user=request.user.id)
+            .first()
+        )
+        if order_request is None:
+            raise NotFound("No such order request")
+        return Response(OrderRequestSerializer(order_request).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("output", type=OpenApiTypes.STR, description="ndjson (default) or csv"),
+            OpenApiParameter(
+                "created_after",
+                type=OpenApiTypes.DATETIME,
+                description="Orders created at or after (ex. ?created_after=2024-10-01)",
+            ),
+            OpenApiParameter(
+                "created_before",
+                type=OpenApiTypes.DATETIME,
+                description="Orders created before (ex. ?created_before=2024-11-01 12:00)",
+            ),
+            OpenApiParameter("tz", type=OpenApiTypes.STR, description="Timezone for the date filters"),
+            OpenApiParameter("user", type=OpenApiTypes.STR, description="Staff only: user ids (ex. ?user=1,2)"),
+        ],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR, (200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        """Every ticket of the user's orders, or of all orders for staff, streamed as NDJSON or CSV"""
+        params = request.query_params
+        output = params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({"output": f"must be one of {', '.join(EXPORT_FORMATS)}"})
+
+        tickets = Ticket.objects.all()
+        if not request.user.is_staff:
+            tickets = tickets.filter(order__user_id=request.user.id)
+        elif params.get("user"):
+            try:
+                tickets = tickets.filter(order__user_id__in=params_to_ints(params["user"]))
+            except ValueError:
+                raise ValidationError({"user": "must be a comma separated list of ids"})
+
+        tz = request_timezone(request)
+        if params.get("created_after"):
+            tickets = tickets.filter(
+                order__created_at__gte=parse_time_param("created_after", params["created_after"], tz)
+            )
+        if params.get("created_before"):
+            tickets = tickets.filter(
+                order__created_at__lt=parse_time_param("created_before", params["created_before"], tz)
+            )
+        return ticket_export_response(tickets, output, "tickets")
+
+
+class TrainViewSet(CachedListMixin, CachedRetrieveMixin, FastListMixin, NameSearchMixin, viewsets.ModelViewSet):
     queryset = Train.objects.select_related("train_type")
+    fast_list_fields = TRAIN_LIST_FIELDS
+    cache_models = (Train, TrainType)
+    query_budget = {"list": 2, "retrieve": 1}
     serializer_class = TrainSerializer
     permission_classes = [IsAdminOrReadOnly,]
     pagination_class = DefaultPagination
 
     def get_serializer_class(self):
-        if self.action in ("list", "retrieve"):
+        if self.action in ("list", "retrieve", "search"):
             return TrainListSerializer
         return TrainSerializer
 
@@ -124,14 +316,15 @@ class TrainViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+class RouteViewSet(CachedListMixin, CachedRetrieveMixin, viewsets.ModelViewSet):
     queryset = Route.objects.select_related("source", "destination")
+    cache_models = (Route, Station)
+    query_budget = {"list": 2, "retrieve": 1}
     serializer_class = RouteSerializer
     permission_classes = [IsAdminOrReadOnly, ]
     pagination_class = DefaultPagination
 
     def get_serializer_class(self):
-        print(self.action)
         if self.action == "list":
             return RouteListSerializer
 
@@ -172,44 +365,168 @@ class RouteViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class JourneyViewSet(viewsets.ModelViewSet):
-    queryset = Journey.objects.prefetch_related("route", "train", "crew")
+class JourneyScheduleViewSet(viewsets.ModelViewSet):
+    queryset = JourneySchedule.objects.prefetch_related("crew")
+    serializer_class = JourneyScheduleSerializer
+    permission_classes = [IsAdminOrReadOnly, ]
+    pagination_class = DefaultPagination
+
+
+class JourneyViewSet(FastListMixin, viewsets.ModelViewSet):
+    queryset = Journey.objects.select_related(
+        "route__source", "route__destination", "train__train_type"
+    ).prefetch_related("crew")
+    fast_list_fields = JOURNEY_LIST_FIELDS
     serializer_class = JourneySerializer
     permission_classes = [IsAdminOrReadOnly, ]
     pagination_class = DefaultPagination
+    keyset_ordering = ("departure_time", "journey_id")
+    query_budget = {"list": 2, "retrieve": 2, "seats": 2}
 
     def get_serializer_class(self):
         if self.action == "list":
-            return JourneyListSerializer
+            return JourneySearchRowSerializer
         if self.action == "retrieve":
             return JourneyDetailSerializer
+        if self.action == "seats":
+            return JourneySeatsSerializer
+        if self.action == "hold":
+            return SeatHoldRequestSerializer
         return JourneySerializer
 
+    def _min_free_seats(self):
+        try:
+            return int(self.request.query_params.get("min_free_seats") or 0)
+        except ValueError:
+            raise ValidationError({"min_free_seats": "must be an integer"})
+
+    def _time_bounds(self, field, tz):
+        params = self.request.query_params
+        prefix = field.split("_")[0]
+        exact = params.get(field)
+        after = params.get(f"{prefix}_after")
+        before = params.get(f"{prefix}_before")
+
+        # ?departure_time= matches the whole day as [start, next start) instead of a __date cast,
+        # which keeps the column index usable
+        start = end = None
+        if exact:
+            start, end = day_range(parse_time_param(field, exact, tz), tz)
+        if after:
+            after = parse_time_param(f"{prefix}_after", after, tz)
+            start = after if start is None else max(start, after)
+        if before:
+            before = parse_time_param(f"{prefix}_before", before, tz)
+            end = before if end is None else min(end, before)
+        return start, end
+
+    def _filter_time_range(self, queryset, field, tz):
+        start, end = self._time_bounds(field, tz)
+        if start is not None:
+            queryset = queryset.filter(**{f"{field}__gte": start})
+        if end is not None:
+            queryset = queryset.filter(**{f"{field}__lt": end})
+        return queryset
+
+    def _schedules(self):
+        """Schedules whose departures a list bounded by a departure day or departure_before expands into."""
+        params = self.request.query_params
+        start, end = self._time_bounds("departure_time", request_timezone(self.request))
+        if end is None:
+            return None
+        # Departures that have already left are never virtual
+        start = max(start or timezone.now(), timezone.now())
+        if start >= end:
+            return None
+        # Expansion stops SCHEDULE_LIST_MAX_DAYS after the start; later departures appear once booked
+        end = min(end, start + timedelta(days=settings.SCHEDULE_LIST_MAX_DAYS))
+
+        route_ids = params_to_ints(params["route"]) if params.get("route") else None
+        train_ids = params_to_ints(params["train"]) if params.get("train") else None
+        schedules = list(active_schedules(start, end, route_ids, train_ids))
+        return (schedules, start, end) if schedules else None
+
+    def _scheduled_rows(self, schedules, start, end, cursor, backwards, limit):
+        """
+        The virtual journeys of one page: from the cursor on, in the page's direction, until ``limit`` of
+        them pass the filters, so only the schedule days the page reaches are expanded.
+        """
+        if cursor is not None:
+            if backwards:
+                end = min(end, cursor[0] + timedelta(microseconds=1))
+            else:
+                start = max(start, cursor[0])
+        if start >= end:
+            return []
+
+        tz = request_timezone(self.request)
+        arrival_start, arrival_end = self._time_bounds("arrival_time", tz)
+        min_free_seats = self._min_free_seats() if self.request.query_params.get("min_free_seats") else 0
+        rows, past_cursor = [], 0
+        for occurrence in occurrences(schedules, start, end, reverse=backwards):
+            row = virtual_row(*occurrence)
+            if (
+                (arrival_start is not None and row["arrival_time"] < arrival_start)
+                or (arrival_end is not None and row["arrival_time"] >= arrival_end)
+                or row["capacity"] < min_free_seats
+            ):
+                continue
+            rows.append(row)
+            # Rows departing at the cursor's time may still fall before it, the pagination sorts them out
+            past_cursor += cursor is None or row["departure_time"] != cursor[0]
+            if past_cursor >= limit:
+                break
+        return rows
+
+    def scheduled_list(self):
+        """
+        The list response with virtual journeys merged in by departure time, or None without schedules.
+        Merged lists are always paged by cursor, so only one page of stored journeys is read.
+        """
+        window = self._schedules()
+        if window is None:
+            return None
+        field_map = self.fast_list_map()
+        queryset = self.filter_queryset(self.get_queryset()).values(*field_map.lookups)
+        page = self.paginator.paginate_merged(
+            queryset, lambda *bounds: self._scheduled_rows(*window, *bounds), self.request, self
+        )
+        return self.get_paginated_response([self._list_row(field_map, row) for row in page])
+
     @staticmethod
-    def _extract_date(time):
-        return datetime.strptime(time, "%Y-%m-%d %H:%M").date()
+    def _list_row(field_map, row):
+        data = field_map.row(row)
+        if "schedule" in row:
+            data["id"] = None
+            data["schedule"] = row["schedule"]
+            data["date"] = row["date"].isoformat()
+        return data
 
     def get_queryset(self):
         route = self.request.query_params.get("route")
         train = self.request.query_params.get("train")
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
+        min_free_seats = self.request.query_params.get("min_free_seats")
 
-        queryset = self.queryset
+        if self.action in ("seats", "hold"):
+            return Journey.objects.select_related("train", "search_row")
+
+        if self.action == "list":
+            queryset = JourneySearchRow.objects.order_by("journey_id")
+            if min_free_seats:
+                queryset = queryset.filter(capacity__gte=F("tickets_sold") + self._min_free_seats())
+        else:
+            queryset = self.queryset
 
         if route:
             route_id = params_to_ints(route)
-            queryset = queryset.filter(route__id__in=route_id)
+            queryset = queryset.filter(route_id__in=route_id)
         if train:
             train_id = params_to_ints(train)
-            queryset = queryset.filter(train__id__in=train_id)
-        if departure_time:
-            dp_time = self._extract_date(departure_time)
-            queryset = queryset.filter(departure_time__date=dp_time)
-        if arrival_time:
-            ar_time = self._extract_date(arrival_time)
-            queryset = queryset.filter(arrival_time__date=ar_time)
-        return queryset.distinct()
+            queryset = queryset.filter(train_id__in=train_id)
+        tz = request_timezone(self.request)
+        queryset = self._filter_time_range(queryset, "departure_time", tz)
+        queryset = self._filter_time_range(queryset, "arrival_time", tz)
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -233,6 +550,36 @@ class JourneyViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.DATETIME,
                 description="Filter by arrival_time  (ex. ?arrival_time=1.01.01)",
             ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Departing at or after (ex. ?departure_after=2024-10-01 or 2024-10-01 08:00)",
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="Departing before (ex. ?departure_before=2024-10-02)",
+            ),
+            OpenApiParameter(
+                "arrival_after",
+                type=OpenApiTypes.DATETIME,
+                description="Arriving at or after (ex. ?arrival_after=2024-10-01)",
+            ),
+            OpenApiParameter(
+                "arrival_before",
+                type=OpenApiTypes.DATETIME,
+                description="Arriving before (ex. ?arrival_before=2024-10-02)",
+            ),
+            OpenApiParameter(
+                "tz",
+                type=OpenApiTypes.STR,
+                description="Timezone for dates without an offset, defaults to UTC (ex. ?tz=Europe/Kyiv)",
+            ),
+            OpenApiParameter(
+                "min_free_seats",
+                type=OpenApiTypes.INT,
+                description="Filter by number of seats still available (ex. ?min_free_seats=2)",
+            ),
             OpenApiParameter(
                 "crew",
                 type={"type": "list", "items": {"type": "number"}},
@@ -241,5 +588,213 @@ class JourneyViewSet(viewsets.ModelViewSet):
         ]
     )
     def list(self, request, *args, **kwargs):
-
+        response = self.scheduled_list()
+        if response is not None:
+            return response
         return super().list(request, *args, **kwargs)
+
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        journey = self.get_object()
+        layout = journey_layout(journey)
+        seat_map = get_seat_map(journey.id, layout)
+        serializer = self.get_serializer({
+            "journey": journey.id,
+            "cargo_num": seat_map.cargo_num,
+            "places_in_cargo": journey.train.places_in_cargo,
+            "capacity": seat_map.capacity,
+            "free_count": seat_map.capacity - seat_map.taken_count,
+            "cargos": [
+                dict(cargo, coach_class=coach_class)
+                for cargo, (_, coach_class) in zip(seat_map.cargos(), layout)
+            ],
+        })
+        return Response(serializer.data)
+
+    @action(methods=["POST", "DELETE"], detail=True, url_path="hold", permission_classes=[IsAuthenticated])
+    def hold(self, request, pk=None):
+        journey = self.get_object()
+
+        if request.method == "DELETE":
+            release_holds(journey.id, request.user.id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        seats = [(seat["cargo"], seat["seat"]) for seat in serializer.validated_data["seats"]]
+        layout = journey_layout(journey)
+        for cargo, seat in seats:
+            Ticket.validate_position(cargo, seat, ValidationError, layout)
+
+        holds, conflicts = place_holds(journey.id, request.user.id, seats)
+        if conflicts:
+            return Response(
+                {"seats": [
+                    f"{seat} is already taken please select another (cargo {cargo})" for cargo, seat in conflicts
+                ]},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(SeatHoldSerializer(holds, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class PlanView(APIView):
+    permission_classes = [IsAdminOrReadOnly, ]
+    max_itineraries = 10
+
+    @staticmethod
+    def _int_param(params, name, default):
+        try:
+            return int(params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "must be an integer"})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", type=OpenApiTypes.INT, required=True, description="Origin station id"),
+            OpenApiParameter("to", type=OpenApiTypes.INT, required=True, description="Destination station id"),
+            OpenApiParameter(
+                "depart_after",
+                type=OpenApiTypes.DATETIME,
+                description="Earliest departure, defaults to now (ex. ?depart_after=2024-10-01 08:00)",
+            ),
+            OpenApiParameter("tz", type=OpenApiTypes.STR, description="Timezone for depart_after"),
+            OpenApiParameter(
+                "min_transfer",
+                type=OpenApiTypes.INT,
+                description="Minimum change time between legs in minutes",
+            ),
+            OpenApiParameter("limit", type=OpenApiTypes.INT, description="Number of itineraries, max 10"),
+        ],
+        responses=ItinerarySerializer(many=True),
+    )
+    def get(self, request):
+        params = request.query_params
+        if "from" not in params or "to" not in params:
+            raise ValidationError("from and to stations are required")
+        origin = self._int_param(params, "from", None)
+        target = self._int_param(params, "to", None)
+        if origin == target:
+            raise ValidationError("from and to must be different stations")
+
+        depart_after = params.get("depart_after")
+        depart_after = (
+            parse_time_param("depart_after", depart_after, request_timezone(request))
+            if depart_after else timezone.now()
+        )
+        min_transfer = timedelta(minutes=self._int_param(params, "min_transfer", settings.PLANNER_MIN_TRANSFER))
+        limit = min(max(self._int_param(params, "limit", 3), 1), self.max_itineraries)
+
+        itineraries = timetable.plan(origin, target, depart_after, min_transfer, limit)
+
+        rows = JourneySearchRow.objects.in_bulk(
+            {leg[4] for legs in itineraries for leg in legs}, field_name="pk"
+        )
+        data = [
+            {
+                "departure_time": legs[0][0],
+                "arrival_time": legs[-1][1],
+                "transfers": len(legs) - 1,
+                "legs": [rows[leg[4]] for leg in legs],
+            }
+            for legs in itineraries
+            if all(leg[4] in rows for leg in legs)
+        ]
+        return Response(ItinerarySerializer(data, many=True).data)
+
+
+class BulkImportView(APIView):
+    permission_classes = [IsAdminUser, ]
+    parser_classes = [MultiPartParser, ]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "input_format",
+                type=OpenApiTypes.STR,
+                description="csv or jsonl, defaults to the file extension",
+            ),
+            OpenApiParameter("dry_run", type=OpenApiTypes.BOOL, description="Only validate the rows"),
+        ],
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        },
+    )
+    def post(self, request, kind):
+        if kind not in IMPORTERS:
+            raise NotFound(f"Unknown import kind, use one of {', '.join(sorted(IMPORTERS))}")
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "a CSV or JSONL file is required"})
+        fmt = request.query_params.get("input_format") or guess_format(upload.name)
+        if fmt not in FORMATS:
+            raise ValidationError({"input_format": f"must be one of {', '.join(FORMATS)}"})
+        dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true")
+
+        # Large uploads are spooled to disk by Django, so the rows are streamed from there
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            report = run_import(kind, read_records(stream, fmt), dry_run=dry_run)
+        except UnicodeDecodeError:
+            raise ValidationError({"file": "must be UTF-8 encoded"})
+        finally:
+            stream.detach()
+        return Response(report.as_dict())
+
+
+class OccupancyView(APIView):
+    permission_classes = [IsAdminUser, ]
+    max_days = 366
+
+    @staticmethod
+    def _day_param(params, name, default):
+        value = params.get(name)
+        if not value:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: f"invalid date {value}"})
+        return day
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", type=OpenApiTypes.DATE, description="First day, defaults to 30 days ago"),
+            OpenApiParameter("to", type=OpenApiTypes.DATE, description="Last day, defaults to today"),
+            OpenApiParameter("route", type=OpenApiTypes.STR, description="Filter by route id (ex. ?route=1,2)"),
+            OpenApiParameter(
+                "train_type",
+                type=OpenApiTypes.STR,
+                description="Filter by train type id (ex. ?train_type=1,2)",
+            ),
+            OpenApiParameter(
+                "group_by",
+                type=OpenApiTypes.STR,
+                description="Split each day by route and/or train_type (ex. ?group_by=route,train_type)",
+            ),
+        ]
+    )
+    def get(self, request):
+        params = request.query_params
+        end = self._day_param(params, "to", timezone.localdate())
+        start = self._day_param(params, "from", end - timedelta(days=30))
+        if start > end:
+            raise ValidationError("from must not be after to")
+        if (end - start).days >= self.max_days:
+            raise ValidationError(f"at most {self.max_days} days at a time")
+
+        group_by = [name for name in params.get("group_by", "").split(",") if name]
+        unknown = [name for name in group_by if name not in GROUP_FIELDS]
+        if unknown:
+            raise ValidationError({"group_by": f"must be route and/or train_type, not {', '.join(unknown)}"})
+        try:
+            route_ids = params_to_ints(params["route"]) if params.get("route") else None
+            train_type_ids = params_to_ints(params["train_type"]) if params.get("train_type") else None
+        except ValueError:
+            raise ValidationError("route and train_type must be comma-separated ids")
+
+        return Response(occupancy_series(start, end, route_ids, train_type_ids, dict.fromkeys(group_by)))
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from train_service.db_router import PRIMARY
+
+USER_STATE_VERSION_KEY = "auth:user_state:version"
+USER_STATE_CHANGE_KEY = "auth:user_state:change:{version}"
+USER_STATE_CHANGE_TIMEOUT = 60 * 60
+
+UserState = namedtuple("UserState", "found is_active is_staff revoked_before")
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """simplejwt authentication that async views can await without a thread hop for the user lookup."""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def record_user_change(user_id):
+    cache.add(USER_STATE_VERSION_KEY, 0, timeout=None)
+    version = cache.incr(USER_STATE_VERSION_KEY)
+    cache.set(USER_STATE_CHANGE_KEY.format(version=version), user_id, USER_STATE_CHANGE_TIMEOUT)
+
+
+def revoke_user_tokens(user_id):
+    """Rejects every token issued to the user up to now; kept on the user row so restarts and evictions keep it."""
+    get_user_model().objects.filter(pk=user_id).update(tokens_valid_after=timezone.now())
+    record_user_change(user_id)
+    transaction.on_commit(lambda: record_user_change(user_id))
+
+
+class UserStateCache:
+    """
+    Per-process LRU of what token checks need from the user row. Changed users are evicted through the
+    version-in-cache change log, the way the planner's timetable follows journey changes; entries also
+    expire after ``ttl`` seconds, which bounds staleness when workers do not share the cache.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.states = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+
+    def _sync(self):
+        version = cache.get(USER_STATE_VERSION_KEY, 0)
+        if version == self.version:
+            return
+        with self.lock:
+            if self.version is not None and 0 < version - self.version <= self.max_size:
+                keys = [USER_STATE_CHANGE_KEY.format(version=number) for number in range(self.version + 1, version + 1)]
+                changes = cache.get_many(keys)
+                if len(changes) == len(keys):
+                    for user_id in changes.values():
+                        self.states.pop(user_id, None)
+                else:
+                    self.states.clear()
+            else:
+                self.states.clear()
+            self.version = version
+
+    def _cached(self, user_id):
+        self._sync()
+        with self.lock:
+            entry = self.states.get(user_id)
+            if entry is None:
+                return None
+            state, loaded_at = entry
+            if time.monotonic() - loaded_at >= self.ttl:
+                del self.states[user_id]
+                return None
+            self.states.move_to_end(user_id)
+            return state
+
+    def _store(self, user_id, row):
+        is_active, is_staff, valid_after = row if row is not None else (False, False, None)
+        revoked_before = valid_after.timestamp() if valid_after is not None else None
+        state = UserState(row is not None, is_active, is_staff, revoked_before)
+        with self.lock:
+            self.states[user_id] = (state, time.monotonic())
+            self.states.move_to_end(user_id)
+            while len(self.states) > self.max_size:
+                self.states.popitem(last=False)
+        return state
+
+    @staticmethod
+    def _query(user_id):
+        # The primary, so a just-deactivated user is never reloaded from a lagging replica
+        return get_user_model().objects.using(PRIMARY).filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).values_list("is_active", "is_staff", "tokens_valid_after")
+
+    def get(self, user_id):
+        state = self._cached(user_id)
+        if state is None:
+            state = self._store(user_id, self._query(user_id).first())
+        return state
+
+    async def aget(self, user_id):
+        state = self._cached(user_id)
+        if state is None:
+            state = self._store(user_id, await self._query(user_id).afirst())
+        return state
+
+
+user_states = UserStateCache(settings.AUTH_USER_STATE_CACHE_SIZE, settings.AUTH_USER_STATE_TTL)
+
+
+class ClaimsUser(TokenUser):
+    """Request user built from token claims; staff rights need both the claim and the current user state."""
+
+    def __init__(self, token, state):
+        super().__init__(token)
+        self.state = state
+
+    @cached_property
+    def is_staff(self):
+        return bool(self.token.get("is_staff", self.state.is_staff) and self.state.is_staff)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a per-request user query: the user comes from the token claims and
+    deactivation/revocation is checked against ``user_states``.
+    """
+
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    @staticmethod
+    def _claims_user(validated_token, state):
+        if not state.found:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not state.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # iat carries microseconds (see ClaimsTokenObtainPairSerializer), so a login right after the change passes
+        if state.revoked_before is not None and validated_token.get("iat", 0) <= state.revoked_before:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return ClaimsUser(validated_token, state)
+
+    def get_user(self, validated_token):
+        return self._claims_user(validated_token, user_states.get(self._user_id(validated_token)))
+
+    async def aget_user(self, validated_token):
+        return self._claims_user(validated_token, await user_states.aget(self._user_id(validated_token)))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="tokens_valid_after",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 
 class User(AbstractUser):
-    ...
+    # Tokens issued at or before this moment are rejected, see user.authentication.revoke_user_tokens
+    tokens_valid_after = models.DateTimeField(null=True, blank=True)
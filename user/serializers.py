@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from user.authentication import revoke_user_tokens
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,5 +24,18 @@ class UserSerializer(serializers.ModelSerializer):
         if password:
             user.set_password(password)
             user.save()
+            revoke_user_tokens(user.id)
 
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds is_staff to the tokens so ClaimsJWTAuthentication needs no user query."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["is_staff"] = user.is_staff
+        # Sub-second issue time, so tokens from a login right after a revocation are told apart from older ones
+        token["iat"] = token.current_time.timestamp()
+        return token
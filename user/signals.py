@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from user.authentication import record_user_change
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    # Record again after commit so a state reloaded from the old row meanwhile is dropped too
+    user_id = instance.pk
+    record_user_change(user_id)
+    transaction.on_commit(lambda: record_user_change(user_id))
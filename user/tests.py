@@ -1,3 +1,108 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.authentication import UserStateCache, revoke_user_tokens, user_states
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+ME_URL = reverse("user:manage_user")
+JOURNEY_URL = reverse("trip:journey-list")
+STATION_URL = reverse("trip:station-list")
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="test1", email="test1@gmail.com", password="12345678", is_staff=True
+        )
+
+    def login(self, password="12345678"):
+        res = self.client.post(TOKEN_URL, {"username": "test1", "password": password})
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_repeat_requests_skip_user_query(self):
+        self.login()
+        first = self.queries(JOURNEY_URL)
+        self.assertEqual(self.queries(JOURNEY_URL), first - 1)
+        self.assertEqual(self.client.get(ME_URL).data["username"], "test1")
+
+    def test_deactivated_user_is_rejected(self):
+        self.login()
+        self.queries(JOURNEY_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(JOURNEY_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_rights_follow_user_state(self):
+        self.login()
+        payload = {"name": "Kyiv", "latitude": 50.45, "longitude": 30.52}
+        self.assertEqual(self.client.post(STATION_URL, payload).status_code, status.HTTP_201_CREATED)
+
+        self.user.is_staff = False
+        self.user.save()
+
+        self.assertEqual(self.client.post(STATION_URL, payload).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_revokes_tokens(self):
+        self.login()
+        res = self.client.patch(ME_URL, {"password": "87654321"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(JOURNEY_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data["code"], "token_revoked")
+
+        self.login("87654321")
+        self.assertEqual(self.client.get(JOURNEY_URL).status_code, status.HTTP_200_OK)
+
+    def test_revoke_user_tokens(self):
+        self.login()
+        revoke_user_tokens(self.user.id)
+        self.assertEqual(self.client.get(JOURNEY_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # The revocation is on the user row, so a cleared cache or a fresh process still rejects the token
+        cache.clear()
+        user_states.states.clear()
+        self.assertEqual(self.client.get(JOURNEY_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # A token issued right after the revocation, even within the same second, is accepted
+        self.login()
+        self.assertEqual(self.client.get(JOURNEY_URL).status_code, status.HTTP_200_OK)
+
+    def test_state_expires_without_change_log(self):
+        states = UserStateCache(max_size=10, ttl=60)
+        self.assertTrue(states.get(self.user.id).is_active)
+        get_user_model().objects.filter(pk=self.user.id).update(is_active=False)
+
+        with mock.patch("user.authentication.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertFalse(states.get(self.user.id).is_active)
+
+    def test_state_cache_is_bounded(self):
+        states = UserStateCache(max_size=2, ttl=60)
+        other = get_user_model().objects.create_user(username="test2", password="12345678")
+        states.get(self.user.id)
+        states.get(other.id)
+        states.get(self.user.id)
+        missing = states.get(0)
 
-# Create your tests here.
+        self.assertFalse(missing.found)
+        self.assertEqual(list(states.states), [self.user.id, 0])
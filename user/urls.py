@@ -1,14 +1,13 @@
 from django.urls import path
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
     TokenRefreshView, TokenVerifyView,
 )
 
-from user.views import UserCreateView, UserManageView
+from user.views import UserCreateView, UserManageView, TokenObtainView
 
 urlpatterns = [
     path("register/", UserCreateView.as_view(), name="create_user"),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/', TokenObtainView.as_view(), name='token_obtain_pair'),
     path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path("me/", UserManageView.as_view(), name="manage_user")
@@ -1,11 +1,20 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from user.serializers import UserSerializer
+from train_service.throttling import LoginUserThrottle, LoginIPThrottle, RegisterIPThrottle
+from user.serializers import UserSerializer, ClaimsTokenObtainPairSerializer
 
 
 class UserCreateView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_classes = [RegisterIPThrottle]
+
+
+class TokenObtainView(TokenObtainPairView):
+    serializer_class = ClaimsTokenObtainPairSerializer
+    throttle_classes = [LoginUserThrottle, LoginIPThrottle]
 
 
 class UserManageView(generics.RetrieveUpdateAPIView):
@@ -13,4 +22,5 @@ class UserManageView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user is built from token claims, editing needs the row
+        return get_user_model().objects.get(pk=self.request.user.pk)